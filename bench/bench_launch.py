@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Team launch benchmark
+
+Times `python run.py` launching teams of 1-32 instances into WezTerm,
+with the stand-in `wezterm` (bench/fake_wezterm.py) instead of a real one.
+
+Usage:
+    python bench/bench_launch.py [--counts 1,2,4,8,16,32] [--rounds N] [--modes parallel,serial]
+                                 [--latency SECONDS] [--boot SECONDS] [--json results.json]
+
+Description:
+    Every round builds a throwaway project whose cmw.config lists N
+    instances and a fresh set of panes with one shell pane standing in for
+    the terminal run.py is started from. It then runs run.py in a
+    subprocess with CMW_LAUNCH_MODE set to each mode. --latency is added to
+    every wezterm call and --boot is how long each Claude takes to show
+    its prompt. `launch_s` is run.py's own "Launched ... in Xs" figure;
+    `wall_s` also counts interpreter start and config loading. `ready`
+    counts the instances whose launch probe saw the prompt; the first
+    instance starts in the pane run.py runs in and is never probed.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fake_wezterm
+
+repo_root = Path(__file__).resolve().parent.parent
+
+_LAUNCHED = re.compile(r"Launched (\d+)/(\d+) instance\(s\) in ([\d.]+)s")
+
+
+def _summary(samples):
+    if not samples:
+        return {"n": 0}
+    return {
+        "n": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+
+def _project(tmp: Path, count: int) -> Path:
+    project = tmp / "project"
+    project.mkdir()
+    instances = [{"id": "default", "role": "coordinator", "autostart": True}]
+    instances += [
+        {"id": f"worker{i}", "role": f"worker {i}", "autostart": True} for i in range(1, count)
+    ]
+    config = {
+        "providers": ["claude"],
+        "flags": {"claudeArgs": ["--dangerously-skip-permissions"]},
+        "claude": {"instances": instances},
+    }
+    (project / "cmw.config").write_text(json.dumps(config, indent=2), encoding="utf-8")
+    return project
+
+
+def _env(tmp: Path, shim: Path, latency: float, boot: float, mode: str) -> dict:
+    env = dict(os.environ)
+    for key in (
+        "TMUX", "TMUX_PANE", "CMW_PTY_PANE", "CMW_SESSION_ID",
+        "CMW_WARM_POOL", "CODEX_WEZTERM_BIN", "FAKE_WEZTERM_REPLY",
+    ):
+        env.pop(key, None)
+    env.update(
+        {
+            "HOME": str(tmp / "home"),
+            "USERPROFILE": str(tmp / "home"),
+            "CLAUDE_PROJECTS_ROOT": str(tmp / "claude-projects"),
+            "WEZTERM_BIN": str(shim),
+            "CMW_TERMINAL": "wezterm",
+            "CMW_WEZTERM_TRANSPORT": "cli",
+            "CMW_LAUNCH_MODE": mode,
+            "FAKE_WEZTERM_STATE": str(tmp / "wezterm-state.json"),
+            "FAKE_WEZTERM_LATENCY": str(latency),
+            "FAKE_WEZTERM_BOOT": str(boot),
+        }
+    )
+    return env
+
+
+def bench_once(shim: Path, count: int, mode: str, latency: float, boot: float, timeout: float):
+    with tempfile.TemporaryDirectory(prefix="cmw-bench-") as tmp:
+        tmp = Path(tmp)
+        project = _project(tmp, count)
+        env = _env(tmp, shim, latency, boot, mode)
+        # The pane run.py is "running in"; it gets the first instance.
+        own = subprocess.run(
+            [str(shim), "cli", "spawn", "--cwd", str(project)],
+            capture_output=True, text=True, env=env, check=True,
+        )
+        env["WEZTERM_PANE"] = own.stdout.strip()
+
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, str(repo_root / "run.py")],
+            cwd=project, env=env, capture_output=True, text=True, timeout=timeout,
+        )
+        wall = time.perf_counter() - started
+
+        match = _LAUNCHED.search(result.stdout)
+        if result.returncode != 0 or not match:
+            tail = (result.stdout + result.stderr).strip().splitlines()[-5:]
+            raise RuntimeError(f"run.py exited {result.returncode}: " + " | ".join(tail))
+        try:
+            mapping = json.loads(
+                (project / ".cmw_config" / "tab_mapping.json").read_text(encoding="utf-8")
+            )
+            ready = sum(1 for t in mapping.get("tabs", {}).values() if t.get("ready_at"))
+        except (OSError, ValueError):
+            ready = 0
+        return {
+            "wall_s": wall,
+            "launch_s": float(match.group(3)),
+            "launched": int(match.group(1)),
+            "ready": ready,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run.py team launch time")
+    parser.add_argument("--counts", default="1,2,4,8,16,32")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--modes", default="parallel,serial")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--boot", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+    json_path = Path(args.json_path).resolve() if args.json_path else None
+    counts = [int(c) for c in args.counts.split(",") if c.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    report = {
+        "latency_s": args.latency,
+        "boot_s": args.boot,
+        "rounds": args.rounds,
+        "modes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="cmw-bench-bin-") as bin_dir:
+        shim = fake_wezterm.install(Path(bin_dir))
+        for mode in modes:
+            report["modes"][mode] = {}
+            for count in counts:
+                samples = [
+                    bench_once(shim, count, mode, args.latency, args.boot, args.timeout)
+                    for _ in range(args.rounds)
+                ]
+                report["modes"][mode][str(count)] = {
+                    "wall_s": _summary([s["wall_s"] for s in samples]),
+                    "launch_s": _summary([s["launch_s"] for s in samples]),
+                    "launched": min(s["launched"] for s in samples),
+                    "ready": min(s["ready"] for s in samples),
+                }
+
+    print(f"{'mode':<9} {'count':>5} {'launch median':>14} {'wall median':>12} {'ready':>7}")
+    for mode, by_count in report["modes"].items():
+        for count, data in by_count.items():
+            print(
+                f"{mode:<9} {count:>5} {data['launch_s']['median']:>13.2f}s "
+                f"{data['wall_s']['median']:>11.2f}s {data['ready']:>3}/{int(count) - 1:<3}"
+            )
+
+    if json_path:
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[+] Results written to {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+MCP send latency benchmark
+
+Measures send_message latency in the MCP server for both delivery paths:
+    subprocess - `python send.py` per message (CMW_MCP_SUBPROCESS_SEND=1)
+    in-process - warm Router + terminal backend inside the server
+
+Usage:
+    python bench/bench_mcp_send.py [--messages N] [--latency SECONDS] [--json results.json]
+
+Description:
+    Runs against a throwaway project and the stand-in `wezterm`
+    (bench/fake_wezterm.py), which adds --latency seconds to every call, so
+    no real WezTerm is needed. Messages stay under the long-message
+    threshold to exclude the submit confirmation. Latencies are measured
+    until the message was typed into the pane: a subprocess send returns
+    only then, an in-process one returns once queued (`returned`) and its
+    outbox row is polled until delivered.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fake_wezterm
+
+repo_root = Path(__file__).resolve().parent.parent
+
+
+def _setup(tmp: Path, latency: float) -> None:
+    bin_dir = tmp / "bin"
+    fake = fake_wezterm.install(bin_dir)
+    os.environ["FAKE_WEZTERM_STATE"] = str(tmp / "wezterm-state.json")
+    os.environ.pop("WEZTERM_PANE", None)
+
+    project = tmp / "project"
+    (project / ".cmw_config").mkdir(parents=True)
+    pane_id = subprocess.run(
+        [str(fake), "cli", "spawn", "--cwd", str(project), "--", "claude"],
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    mapping = {
+        "work_dir": str(project),
+        "tabs": {
+            "coder": {
+                "pane_id": pane_id,
+                "role": "developer",
+                "terminal": "wezterm",
+                "ready_at": time.time(),
+            }
+        },
+        "created_at": time.time(),
+    }
+    (project / ".cmw_config" / "tab_mapping.json").write_text(
+        json.dumps(mapping), encoding="utf-8"
+    )
+
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ["WEZTERM_BIN"] = str(fake)
+    os.environ["CMW_WEZTERM_TRANSPORT"] = "cli"
+    os.environ["FAKE_WEZTERM_LATENCY"] = str(latency)
+    os.chdir(project)
+
+
+def _delivered(server, msg_id: str, timeout: float = 30.0) -> None:
+    """Poll the outbox until the in-process writer has typed the message"""
+    from outbox import STATUS_DELIVERED, STATUS_DELIVERING, STATUS_PENDING
+
+    outbox = server._get_router().outbox()
+    deadline = time.monotonic() + timeout
+    while True:
+        row = outbox.get(msg_id)
+        if row and row["status"] == STATUS_DELIVERED:
+            return
+        if row and row["status"] not in (STATUS_PENDING, STATUS_DELIVERING):
+            raise RuntimeError(f"{msg_id}: {row['status']}: {row['last_error']}")
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"{msg_id} not delivered after {timeout}s")
+        time.sleep(0.001)
+
+
+def _measure(server, count: int, in_process: bool) -> tuple[list[float], list[float]]:
+    """
+    Per message, the time until send_message returned and until the message
+    was delivered to the pane. A subprocess send returns only after `send.py`
+    confirmed delivery; an in-process one returns once queued, so its row
+    is polled until the writer marks it delivered.
+    """
+    returned, delivered = [], []
+    for i in range(count):
+        msg_id = f"bench-{'in' if in_process else 'sub'}-{i}"
+        started = time.perf_counter()
+        result = server._handle_send_message(
+            {"instance": "coder", "message": f"benchmark message {i}", "message_id": msg_id}
+        )
+        returned.append(time.perf_counter() - started)
+        if result.get("isError"):
+            raise RuntimeError(result["content"][0]["text"])
+        if in_process:
+            _delivered(server, msg_id)
+        delivered.append(time.perf_counter() - started)
+    return returned, delivered
+
+
+def _summary(samples: list[float]) -> dict:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "median_ms": statistics.median(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP send_message latency")
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+    json_path = Path(args.json_path).resolve() if args.json_path else None
+
+    with tempfile.TemporaryDirectory(prefix="cmw-bench-") as tmp:
+        _setup(Path(tmp), args.latency)
+        sys.path.insert(0, str(repo_root / "mcp" / "send-tool"))
+        import server
+
+        report = {"latency_s": args.latency, "modes": {}}
+        for mode, subprocess_send in (("subprocess", True), ("in-process", False)):
+            server.SUBPROCESS_SEND = subprocess_send
+            returned, delivered = _measure(server, args.messages, not subprocess_send)
+            report["modes"][mode] = {
+                **_summary(delivered),
+                "returned_median_ms": statistics.median(returned) * 1000,
+            }
+        server._finish_outbox()
+
+    print(f"{'mode':<12} {'median':>10} {'mean':>10} {'p95':>10} {'returned':>10}")
+    for mode, data in report["modes"].items():
+        print(
+            f"{mode:<12} {data['median_ms']:>8.1f}ms {data['mean_ms']:>8.1f}ms "
+            f"{data['p95_ms']:>8.1f}ms {data['returned_median_ms']:>8.1f}ms"
+        )
+
+    if json_path:
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[+] Results written to {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Session registry lookup benchmark
+
+Times how `send` finds the session of an instance whose tab mapping entry
+has no session id (e.g. one started with --resume): `Router.session_ids`
+looks its pane up in the registry index. A glob-and-parse pass over the
+same records, the lookup's cost before the index, is timed for comparison.
+
+Usage:
+    python bench/bench_registry.py [--records N] [--repeat N] [--json results.json]
+
+Description:
+    Builds a throwaway HOME with N records in ~/.cmw/run (all but one
+    belonging to other projects) and a project whose tab mapping lists one
+    instance without a session id. `cold_ms` includes building the index;
+    `median_us` is a warm lookup with the router's cache cleared.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+
+
+def _setup(tmp: Path, records: int) -> tuple[Path, dict]:
+    run_dir = tmp / "home" / ".cmw" / "run"
+    run_dir.mkdir(parents=True)
+    project = tmp / "project"
+    (project / ".cmw_config").mkdir(parents=True)
+    os.environ["HOME"] = str(tmp / "home")
+    os.environ["USERPROFILE"] = str(tmp / "home")
+    os.environ["CLAUDE_PROJECTS_ROOT"] = str(tmp / "claude-projects")
+
+    now = int(time.time())
+    own = {
+        "cmw_session_id": uuid.uuid4().hex,
+        "work_dir": str(project),
+        "terminal": "wezterm",
+        "updated_at": now,
+        "providers": {"claude": {"pane_id": "7", "claude_session_id": str(uuid.uuid4())}},
+    }
+    (run_dir / "cmw-session-coder.json").write_text(json.dumps(own), encoding="utf-8")
+    for i in range(max(0, records - 1)):
+        record = {
+            "cmw_session_id": uuid.uuid4().hex,
+            "cmw_project_id": uuid.uuid4().hex,
+            "work_dir": str(tmp / "other" / str(i % 500)),
+            "terminal": "wezterm",
+            "updated_at": now - i - 1,
+            "providers": {
+                "claude": {"pane_id": str(1000 + i), "claude_session_id": str(uuid.uuid4())}
+            },
+        }
+        (run_dir / f"cmw-session-{i:06d}.json").write_text(json.dumps(record), encoding="utf-8")
+
+    tab = {"pane_id": "7", "role": "developer", "terminal": "wezterm"}
+    (project / ".cmw_config" / "tab_mapping.json").write_text(
+        json.dumps({"work_dir": str(project), "tabs": {"coder": tab}}), encoding="utf-8"
+    )
+    return project, {"coder": tab}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session registry lookup latency")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+    json_path = Path(args.json_path).resolve() if args.json_path else None
+
+    with tempfile.TemporaryDirectory(prefix="cmw-bench-") as tmp:
+        project, tabs = _setup(Path(tmp), args.records)
+        sys.path.insert(0, str(repo_root / "lib"))
+        sys.path.insert(0, str(repo_root / "mcp" / "send-tool"))
+        import pane_registry
+        import send
+        from registry_index import default_run_dir, record_keys
+
+        router = send.Router(project)
+        started = time.perf_counter()
+        found = router.session_ids(tabs)
+        cold = (time.perf_counter() - started) * 1000
+
+        samples = []
+        for _ in range(args.repeat):
+            router._registry_sessions.clear()
+            started = time.perf_counter()
+            router.session_ids(tabs)
+            samples.append((time.perf_counter() - started) * 1e6)
+
+        started = time.perf_counter()
+        pane_registry._scan(
+            default_run_dir(), lambda record: record_keys(record)["pane_id"] == "7"
+        )
+        scan = (time.perf_counter() - started) * 1000
+
+    samples.sort()
+    report = {
+        "records": args.records,
+        "found": bool(found),
+        "cold_ms": cold,
+        "median_us": statistics.median(samples),
+        "p95_us": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "scan_ms": scan,
+    }
+    print(f"{args.records} records, session {'found' if found else 'NOT found'}")
+    print(f"index: cold {cold:.1f}ms, warm median {report['median_us']:.1f}us, p95 {report['p95_us']:.1f}us")
+    print(f"full scan: {scan:.1f}ms")
+
+    if json_path:
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[+] Results written to {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
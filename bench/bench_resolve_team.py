@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Team session resolution benchmark
+
+Compares resolving every instance of a team one call at a time
+(`resolve_claude_session` per instance) with one `resolve_team_sessions`
+call, against a synthetic registry.
+
+Usage:
+    python bench/bench_resolve_team.py [--records N] [--instances N] [--repeat N] [--json results.json]
+
+Description:
+    Builds a throwaway HOME with N registry records in ~/.cmw/run (most of
+    them belonging to other projects), a project whose tab mapping lists the
+    team, and a Claude projects dir with one transcript per instance. The
+    first round of each mode includes building the registry index.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+
+
+def _setup(tmp: Path, records: int, instances: int) -> tuple[Path, list[str]]:
+    home = tmp / "home"
+    run_dir = home / ".cmw" / "run"
+    run_dir.mkdir(parents=True)
+    claude_root = tmp / "claude-projects"
+    project = tmp / "project"
+    (project / ".cmw_config").mkdir(parents=True)
+
+    os.environ["HOME"] = str(home)
+    os.environ["USERPROFILE"] = str(home)
+    os.environ["CLAUDE_PROJECTS_ROOT"] = str(claude_root)
+    os.environ["PWD"] = str(project)
+    for key in ("CMW_SESSION_ID", "WEZTERM_PANE", "TMUX_PANE"):
+        os.environ.pop(key, None)
+    sys.path.insert(0, str(repo_root / "lib"))
+    from claude_transcript import _project_key_for_path
+
+    transcripts = claude_root / _project_key_for_path(project)
+    transcripts.mkdir(parents=True)
+
+    ids = ["default"] + [f"worker{i}" for i in range(1, instances)]
+    now = int(time.time())
+    tabs = {}
+    for i, inst in enumerate(ids):
+        sid = str(uuid.uuid4())
+        pane_id = str(i + 1)
+        tabs[inst] = {"pane_id": pane_id, "terminal": "wezterm", "claude_session_id": sid}
+        (transcripts / f"{sid}.jsonl").write_text("{}\n", encoding="utf-8")
+        record = {
+            "cmw_session_id": uuid.uuid4().hex,
+            "work_dir": str(project),
+            "terminal": "wezterm",
+            "updated_at": now,
+            "providers": {"claude": {"pane_id": pane_id, "claude_session_id": sid}},
+        }
+        (run_dir / f"cmw-session-team-{inst}.json").write_text(
+            json.dumps(record), encoding="utf-8"
+        )
+
+    for i in range(max(0, records - len(ids))):
+        record = {
+            "cmw_session_id": uuid.uuid4().hex,
+            "cmw_project_id": uuid.uuid4().hex,
+            "work_dir": str(tmp / "other" / str(i % 500)),
+            "terminal": "wezterm",
+            "updated_at": now - i,
+            "providers": {
+                "claude": {"pane_id": str(1000 + i), "claude_session_id": str(uuid.uuid4())}
+            },
+        }
+        (run_dir / f"cmw-session-{i:06d}.json").write_text(
+            json.dumps(record), encoding="utf-8"
+        )
+
+    (project / ".cmw_config" / "tab_mapping.json").write_text(
+        json.dumps({"work_dir": str(project), "tabs": tabs}), encoding="utf-8"
+    )
+    os.chdir(project)
+    return project, ids
+
+
+def _time(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Team session resolution latency")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--instances", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+    json_path = Path(args.json_path).resolve() if args.json_path else None
+
+    with tempfile.TemporaryDirectory(prefix="cmw-bench-") as tmp:
+        project, ids = _setup(Path(tmp), args.records, args.instances)
+        import claude_session_resolver as resolver
+        import pane_registry
+        from providers import get_claude_instance, register_claude_instance
+
+        for inst in ids[1:]:
+            register_claude_instance(inst)
+
+        def per_instance():
+            return {
+                inst: resolver.resolve_claude_session(
+                    project, get_claude_instance(inst).session_filename
+                )
+                for inst in ids
+            }
+
+        def batch():
+            return resolver.resolve_team_sessions(project, ids)
+
+        results = batch()
+        resolved = sum(1 for r in results.values() if r is not None)
+        report = {
+            "records": args.records,
+            "instances": len(ids),
+            "resolved": resolved,
+            "modes": {},
+        }
+        for mode, fn in (("per-instance", per_instance), ("batch", batch)):
+            # Drop the cached index so the first round pays for building it.
+            pane_registry._registry_indexes.clear()
+            index_db = Path(tmp) / "home" / ".cmw" / "run" / ".registry-index.db"
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{index_db}{suffix}").unlink(missing_ok=True)
+            cold = _time(fn)
+            warm = [_time(fn) for _ in range(args.repeat)]
+            report["modes"][mode] = {
+                "cold_ms": cold,
+                "median_ms": statistics.median(warm),
+                "mean_ms": statistics.fmean(warm),
+            }
+
+    print(f"{args.records} records, {len(ids)} instances ({resolved} resolved)")
+    print(f"{'mode':<14} {'cold':>10} {'median':>10} {'mean':>10}")
+    for mode, data in report["modes"].items():
+        print(
+            f"{mode:<14} {data['cold_ms']:>8.1f}ms {data['median_ms']:>8.1f}ms "
+            f"{data['mean_ms']:>8.1f}ms"
+        )
+    per, bat = report["modes"]["per-instance"], report["modes"]["batch"]
+    if bat["median_ms"] > 0:
+        report["speedup"] = per["median_ms"] / bat["median_ms"]
+        print(f"batch speedup: {report['speedup']:.1f}x")
+
+    if json_path:
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[+] Results written to {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
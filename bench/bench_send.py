@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Message send latency benchmark
+
+Measures `Router.send` (what both `send` and the MCP server use) per
+message size, against a Claude pane of the stand-in `wezterm`
+(bench/fake_wezterm.py), plus the cost of resolving an instance name.
+
+Usage:
+    python bench/bench_send.py [--sizes 16,100,1000,10000] [--messages N] [--latency SECONDS]
+                               [--json results.json]
+
+Description:
+    Runs against a throwaway project with one running instance. Messages
+    over the long-message threshold (100 characters) go through the
+    confirmed submit: the pane is polled until the text lands in the input
+    box, then Enter is sent until it clears. The per-phase figures come
+    from the project's send_timing.jsonl. --latency is added to every
+    wezterm call.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fake_wezterm
+
+repo_root = Path(__file__).resolve().parent.parent
+
+FILLER = "Please review the change in lib/terminal.py and report back. "
+
+
+def _setup(tmp: Path, latency: float) -> Path:
+    shim = fake_wezterm.install(tmp / "bin")
+    project = tmp / "project"
+    (project / ".cmw_config").mkdir(parents=True)
+
+    for key in ("CMW_SESSION_ID", "WEZTERM_PANE", "TMUX", "TMUX_PANE", "CMW_PTY_PANE"):
+        os.environ.pop(key, None)
+    os.environ["HOME"] = str(tmp / "home")
+    os.environ["USERPROFILE"] = str(tmp / "home")
+    os.environ["CLAUDE_PROJECTS_ROOT"] = str(tmp / "claude-projects")
+    os.environ["WEZTERM_BIN"] = str(shim)
+    os.environ["CMW_WEZTERM_TRANSPORT"] = "cli"
+    os.environ["FAKE_WEZTERM_STATE"] = str(tmp / "wezterm-state.json")
+    os.environ["FAKE_WEZTERM_LATENCY"] = "0"
+    os.environ["FAKE_WEZTERM_BOOT"] = "0"
+
+    pane_id = subprocess.run(
+        [str(shim), "cli", "spawn", "--cwd", str(project), "--", "claude"],
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    mapping = {
+        "work_dir": str(project),
+        "tabs": {
+            "coder": {
+                "pane_id": pane_id,
+                "role": "developer",
+                "terminal": "wezterm",
+                "ready_at": time.time(),
+            }
+        },
+        "created_at": time.time(),
+    }
+    (project / ".cmw_config" / "tab_mapping.json").write_text(
+        json.dumps(mapping), encoding="utf-8"
+    )
+    os.environ["FAKE_WEZTERM_LATENCY"] = str(latency)
+    os.chdir(project)
+    return project
+
+
+def _message(size: int, i: int) -> str:
+    # Unique tail: the submit check looks for the end of the message on screen.
+    suffix = f" #{i:05d}"
+    body = (FILLER * (size // len(FILLER) + 1))[: max(0, size - len(suffix))]
+    return (body + suffix)[-size:]
+
+
+def _summary(samples: list[float]) -> dict:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "median_ms": statistics.median(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+    }
+
+
+def _timing_records(project: Path) -> list[dict]:
+    path = project / ".cmw_config" / "send_timing.jsonl"
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Router.send latency by message size")
+    parser.add_argument("--sizes", default="16,100,1000,10000")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--resolves", type=int, default=2000)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+    json_path = Path(args.json_path).resolve() if args.json_path else None
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    report = {"latency_s": args.latency, "sizes": {}}
+    with tempfile.TemporaryDirectory(prefix="cmw-bench-") as tmp:
+        project = _setup(Path(tmp), args.latency)
+        sys.path.insert(0, str(repo_root / "mcp" / "send-tool"))
+        import send
+
+        router = send.Router(project)
+        samples = []
+        for _ in range(args.resolves):
+            started = time.perf_counter()
+            router.resolve("coder", start=False)
+            samples.append(time.perf_counter() - started)
+        resolve = _summary(samples)
+        report["resolve"] = {
+            "n": resolve["n"],
+            "median_us": resolve["median_ms"] * 1000,
+            "p95_us": resolve["p95_ms"] * 1000,
+        }
+
+        count = 0
+        for size in sizes:
+            samples = []
+            for _ in range(args.messages):
+                message = _message(size, count)
+                count += 1
+                started = time.perf_counter()
+                router.send("coder", message)
+                samples.append(time.perf_counter() - started)
+            records = _timing_records(project)[-args.messages:]
+            data = _summary(samples)
+            data["typed_ms"] = statistics.median(r.get("typed_s", 0.0) for r in records) * 1000
+            data["enter_attempts_max"] = max((r.get("enter_attempts", 1) for r in records), default=0)
+            data["confirmed"] = sum(1 for r in records if r.get("confirmed", True))
+            report["sizes"][str(size)] = data
+
+    print(f"resolve: median {report['resolve']['median_us']:.1f}us, p95 {report['resolve']['p95_us']:.1f}us")
+    print(f"{'chars':>6} {'median':>10} {'p95':>10} {'typed':>10} {'enters':>7} {'confirmed':>10}")
+    for size, data in report["sizes"].items():
+        print(
+            f"{size:>6} {data['median_ms']:>8.1f}ms {data['p95_ms']:>8.1f}ms "
+            f"{data['typed_ms']:>8.1f}ms {data['enter_attempts_max']:>7} "
+            f"{data['confirmed']:>4}/{data['n']:<5}"
+        )
+
+    if json_path:
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[+] Results written to {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Spawn mode benchmark
+
+Compares the two ways run.py can start Claude in a new tab:
+    direct - `wezterm cli spawn -- claude <args>`
+    shell  - `wezterm cli spawn` + typing `claude <args>` with send-text
+
+Usage:
+    python bench/bench_spawn_modes.py [--rounds N] [--json results.json] [-- claude args]
+
+Description:
+    Must run inside WezTerm. Every round spawns one tab per mode, measures the
+    time until the pane id is returned and until the Claude prompt appears,
+    then kills the tab.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+sys.path.insert(0, str(repo_root / "lib"))
+
+import run  # noqa: E402
+from instance_state import wait_for_ready  # noqa: E402
+
+MODES = ("direct", "shell")
+
+
+def _summary(samples):
+    if not samples:
+        return {"n": 0}
+    return {
+        "n": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+
+def bench_once(wezterm_bin, cwd, mode, claude_args_list, timeout):
+    backend = run._pane_backend(wezterm_bin)
+    started = time.perf_counter()
+    pane_id = run.spawn_new_tab(wezterm_bin, cwd, "bench", claude_args_list, mode=mode)
+    spawned = time.perf_counter()
+    if not pane_id:
+        return None
+    try:
+        ready = wait_for_ready(backend, pane_id, timeout=timeout)
+        finished = time.perf_counter()
+    finally:
+        backend.kill_pane(pane_id)
+    return {
+        "spawn_s": spawned - started,
+        "ready_s": (finished - started) if ready else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare direct vs shell spawn")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", dest="json_path", default="")
+    parser.add_argument("claude_args", nargs="*")
+    args = parser.parse_args()
+
+    wezterm_bin = run._find_wezterm_bin()
+    if not wezterm_bin:
+        print("[!] WezTerm not found", file=sys.stderr)
+        return 1
+
+    samples = {mode: {"spawn_s": [], "ready_s": [], "timeouts": 0} for mode in MODES}
+    for i in range(args.rounds):
+        # Alternate order so neither mode always benefits from a warm cache.
+        order = MODES if i % 2 == 0 else tuple(reversed(MODES))
+        for mode in order:
+            result = bench_once(
+                wezterm_bin, Path.cwd(), mode, args.claude_args, args.timeout
+            )
+            if result is None:
+                print(f"[!] round {i + 1}: {mode} spawn failed")
+                continue
+            samples[mode]["spawn_s"].append(result["spawn_s"])
+            if result["ready_s"] is None:
+                samples[mode]["timeouts"] += 1
+            else:
+                samples[mode]["ready_s"].append(result["ready_s"])
+
+    report = {
+        "rounds": args.rounds,
+        "modes": {
+            mode: {
+                "spawn_s": _summary(data["spawn_s"]),
+                "ready_s": _summary(data["ready_s"]),
+                "timeouts": data["timeouts"],
+            }
+            for mode, data in samples.items()
+        },
+    }
+
+    print(f"{'mode':<8} {'spawn median':>14} {'ready median':>14} {'timeouts':>9}")
+    for mode, data in report["modes"].items():
+        spawn = data["spawn_s"].get("median")
+        ready = data["ready_s"].get("median")
+        print(
+            f"{mode:<8} "
+            f"{(f'{spawn:.3f}s' if spawn is not None else '-'):>14} "
+            f"{(f'{ready:.3f}s' if ready is not None else '-'):>14} "
+            f"{data['timeouts']:>9}"
+        )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[+] Results written to {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
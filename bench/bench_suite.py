@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite
+
+Runs the benchmarks that need no real terminal (team launch, send latency
+by message size, MCP send, team session resolution, registry lookup) and
+writes their results, with the commit and platform they ran on, to one
+JSON file.
+Given a previous results file, it flags regressions.
+
+Usage:
+    python bench/bench_suite.py [--only launch,send,...] [--quick] [--json bench_results.json]
+                                [--baseline old.json] [--tolerance 0.25]
+
+Description:
+    Every benchmark runs in its own process with its own --json output,
+    which is stored under "benchmarks" by name. With --baseline, every
+    median (launch seconds, send/resolve milliseconds or microseconds)
+    that grew by more than --tolerance (a fraction) and by at least
+    --min-delta-ms is reported, and the suite exits with 1. --quick uses
+    smaller team sizes and fewer rounds, for a smoke run.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+bench_dir = Path(__file__).resolve().parent
+repo_root = bench_dir.parent
+
+# name -> (script, args, args with --quick)
+BENCHES = {
+    "launch": ("bench_launch.py", [], ["--counts", "1,4,8", "--rounds", "1"]),
+    "send": ("bench_send.py", [], ["--messages", "5", "--resolves", "500"]),
+    "mcp_send": ("bench_mcp_send.py", [], ["--messages", "10"]),
+    "resolve_team": ("bench_resolve_team.py", [], ["--records", "2000", "--repeat", "5"]),
+    "registry": ("bench_registry.py", [], ["--records", "2000", "--repeat", "50"]),
+}
+
+# Median keys and their unit in seconds.
+_MEDIANS = {"median": 1.0, "median_ms": 1e-3, "median_us": 1e-6}
+
+
+def _git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=repo_root, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def _medians(node, path=()) -> dict[str, float]:
+    """Every median in a report, in seconds, keyed by its dotted path"""
+    out = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in _MEDIANS and isinstance(value, (int, float)):
+                out[".".join(path + (key,))] = value * _MEDIANS[key]
+            else:
+                out.update(_medians(value, path + (str(key),)))
+    return out
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta: float) -> list[str]:
+    now = _medians(current.get("benchmarks", {}))
+    before = _medians(baseline.get("benchmarks", {}))
+    regressions = []
+    for key, base in sorted(before.items()):
+        value = now.get(key)
+        if value is None or base <= 0:
+            continue
+        if value > base * (1 + tolerance) and value - base >= min_delta:
+            regressions.append(
+                f"{key}: {base * 1000:.2f}ms -> {value * 1000:.2f}ms (+{(value / base - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cmw benchmarks and record the results")
+    parser.add_argument("--only", default="", help=f"comma-separated subset of: {', '.join(BENCHES)}")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--json", dest="json_path", default="bench_results.json")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    json_path = Path(args.json_path).resolve()
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(BENCHES)
+    unknown = [n for n in names if n not in BENCHES]
+    if unknown:
+        print(f"[!] Unknown benchmark(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "benchmarks": {},
+    }
+    failed = []
+    with tempfile.TemporaryDirectory(prefix="cmw-bench-suite-") as tmp:
+        for name in names:
+            script, full, quick = BENCHES[name]
+            out = Path(tmp) / f"{name}.json"
+            cmd = [sys.executable, str(bench_dir / script), *(quick if args.quick else full)]
+            print(f"[*] {name}: {' '.join(cmd[1:])}", flush=True)
+            started = time.perf_counter()
+            result = subprocess.run([*cmd, "--json", str(out)], cwd=repo_root)
+            elapsed = time.perf_counter() - started
+            if result.returncode != 0 or not out.exists():
+                failed.append(name)
+                report["benchmarks"][name] = {"error": f"exit code {result.returncode}"}
+                print(f"[!] {name} failed (exit code {result.returncode})")
+                continue
+            data = json.loads(out.read_text(encoding="utf-8"))
+            data["elapsed_s"] = elapsed
+            report["benchmarks"][name] = data
+            print()
+
+    json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[+] Results written to {json_path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms / 1000)
+        commit = (baseline.get("meta", {}).get("commit") or "baseline")[:12]
+        if regressions:
+            print(f"[!] {len(regressions)} regression(s) against {commit}:")
+            for line in regressions:
+                print(f"    {line}")
+            return 1
+        print(f"[+] No regressions against {commit} (tolerance {args.tolerance:.0%})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Stand-in `wezterm` executable
+
+Emulates the `wezterm cli` subcommands cmw uses (spawn, split-pane,
+send-text, send-key, get-text, list, set-tab-title, kill-pane,
+activate-pane) against simulated panes, so run.py, send.py and the MCP
+server can be driven without WezTerm.
+
+Usage:
+    python bench/fake_wezterm.py cli spawn --cwd DIR -- claude --session-id ID
+    python bench/fake_wezterm.py cli list --format json
+
+    or point WEZTERM_BIN at the `wezterm` shim written by `install(bin_dir)`.
+
+Description:
+    No process runs in a pane; a pane only draws what its program would.
+    A pane whose command runs `claude` shows Claude's input box once
+    FAKE_WEZTERM_BOOT seconds have passed since it started, takes text
+    typed into that box and submits it on Enter. It then shows
+    "esc to interrupt" for FAKE_WEZTERM_REPLY seconds. Any other pane is a
+    shell prompt; typing `claude ...` plus Enter into it starts Claude.
+
+    Every call sleeps FAKE_WEZTERM_LATENCY seconds, or
+    FAKE_WEZTERM_LATENCY_<SUBCOMMAND> (e.g. FAKE_WEZTERM_LATENCY_SPAWN).
+    Each CLI call is its own process, so panes live in the JSON file
+    FAKE_WEZTERM_STATE (default: fake-wezterm-<uid>.json in the temp dir).
+    Writers take an flock; readers see whole files (atomic replace). POSIX only.
+"""
+
+import fcntl
+import json
+import os
+import shlex
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+VERSION = "wezterm 20240203-110809-5046fc22 (cmw stand-in)"
+
+COLS = 120
+ROWS = 40
+INPUT_ROWS = 4  # wrapped input lines shown in Claude's input box
+HISTORY = 200  # transcript lines kept per pane
+
+_KEYS = {
+    "enter": "\r",
+    "return": "\r",
+    "escape": "\x1b",
+    "esc": "\x1b",
+    "tab": "\t",
+    "backspace": "\x7f",
+}
+
+
+class CliError(Exception):
+    pass
+
+
+def state_path() -> Path:
+    override = os.environ.get("FAKE_WEZTERM_STATE", "").strip()
+    if override:
+        return Path(override)
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return Path(tempfile.gettempdir()) / f"fake-wezterm-{uid}.json"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "") or default)
+    except ValueError:
+        return default
+
+
+def install(bin_dir: Path) -> Path:
+    """Write an executable `wezterm` shim into `bin_dir` and return its path"""
+    bin_dir = Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    shim = bin_dir / "wezterm"
+    script = Path(__file__).resolve()
+    shim.write_text(
+        f'#!/bin/sh\nexec {shlex.quote(sys.executable)} {shlex.quote(str(script))} "$@"\n',
+        encoding="utf-8",
+    )
+    shim.chmod(0o755)
+    return shim
+
+
+# ----- state -----
+
+
+def _empty() -> dict:
+    return {"next_pane": 0, "next_tab": 0, "next_window": 0, "panes": {}}
+
+
+def _read(path: Path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return _empty()
+    return state if isinstance(state, dict) and "panes" in state else _empty()
+
+
+class _Locked:
+    """Read-modify-write of the state file under an exclusive flock"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.state = None
+
+    def __enter__(self) -> dict:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = open(f"{self.path}.lock", "a+")
+        fcntl.flock(self._lock, fcntl.LOCK_EX)
+        self.state = _read(self.path)
+        return self.state
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self.state, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+        finally:
+            fcntl.flock(self._lock, fcntl.LOCK_UN)
+            self._lock.close()
+
+
+def _pane(state: dict, pane_id) -> dict:
+    pane = state["panes"].get(str(pane_id).strip()) if pane_id is not None else None
+    if pane is None:
+        raise CliError(f"pane id {pane_id} not found in mux")
+    return pane
+
+
+def _runs_claude(argv: list[str]) -> bool:
+    for arg in argv:
+        for word in str(arg).split():
+            if os.path.basename(word.strip("'\"")).lower() in ("claude", "claude.exe"):
+                return True
+    return False
+
+
+def _new_pane(state: dict, argv: list[str], cwd: str, tab_id=None, window_id=None) -> dict:
+    now = time.time()
+    if window_id is None:
+        window_id = state["next_window"]
+        state["next_window"] += 1
+    if tab_id is None:
+        tab_id = state["next_tab"]
+        state["next_tab"] += 1
+    pane_id = state["next_pane"]
+    state["next_pane"] += 1
+    claude = _runs_claude(argv)
+    pane = {
+        "pane_id": pane_id,
+        "tab_id": tab_id,
+        "window_id": window_id,
+        "cwd": cwd or os.getcwd(),
+        "argv": argv,
+        "program": "claude" if claude else "shell",
+        "started_at": now,
+        "ready_after": now + (_env_float("FAKE_WEZTERM_BOOT", 0.0) if claude else 0.0),
+        "busy_until": 0.0,
+        "title": "claude" if claude else (os.path.basename(argv[0]) if argv else "sh"),
+        "tab_title": "",
+        "input": "",
+        "pastes": 0,
+        "history": [] if claude or not argv else [" ".join(argv)],
+        "submitted": 0,
+    }
+    state["panes"][str(pane_id)] = pane
+    return pane
+
+
+# ----- input -----
+
+
+def _submit(pane: dict) -> None:
+    now = time.time()
+    text = pane["input"]
+    pane["input"] = ""
+    if pane["program"] == "shell":
+        pane["history"].append(f"$ {text}")
+        if _runs_claude(shlex.split(text) if text.strip() else []):
+            pane["program"] = "claude"
+            pane["title"] = "claude"
+            pane["started_at"] = now
+            pane["ready_after"] = now + _env_float("FAKE_WEZTERM_BOOT", 0.0)
+            pane["history"] = []
+    elif now >= pane["ready_after"] and text.strip():
+        first = text.strip().splitlines()[0]
+        pane["history"].append(f"> {first[:COLS - 4]}")
+        pane["history"].append(f"● Received {len(text)} characters.")
+        pane["submitted"] += 1
+        pane["busy_until"] = now + _env_float("FAKE_WEZTERM_REPLY", 0.0)
+    del pane["history"][:-HISTORY]
+
+
+def _type(pane: dict, text: str, paste: bool) -> None:
+    """Feed keyboard input (or a bracketed paste) to the pane's program"""
+    if pane["program"] == "claude" and time.time() < pane["ready_after"]:
+        return  # still booting: input is lost, as in the real TUI
+    if paste and pane["program"] == "claude":
+        # A shell runs pasted lines; Claude keeps them in its input box.
+        if "\n" in text:
+            pane["pastes"] += 1
+            lines = text.count("\n")
+            pane["input"] += f"[Pasted text #{pane['pastes']} +{lines} lines]"
+        else:
+            pane["input"] += text
+        return
+    i = 0
+    while i < len(text):
+        if text.startswith("\x1b[200~", i):
+            end = text.find("\x1b[201~", i + 6)
+            end = len(text) if end < 0 else end
+            _type(pane, text[i + 6:end], paste=True)
+            i = end + 6
+            continue
+        ch = text[i]
+        if ch == "\r":
+            _submit(pane)
+        elif ch == "\n":
+            pane["input"] += "\n"
+        elif ch in ("\x7f", "\x08"):
+            pane["input"] = pane["input"][:-1]
+        elif ch in ("\x1b", "\x15"):
+            pane["input"] = ""
+        elif ch == "\t" or ch >= " ":
+            pane["input"] += ch
+        i += 1
+
+
+# ----- screen -----
+
+
+def _wrap(text: str, width: int) -> list[str]:
+    lines = []
+    for line in text.split("\n"):
+        lines.extend(line[i:i + width] for i in range(0, max(len(line), 1), width))
+    return lines
+
+
+def _screen(pane: dict) -> list[str]:
+    now = time.time()
+    if pane["program"] == "shell":
+        return [*pane["history"], f"$ {pane['input']}"]
+    if now < pane["ready_after"]:
+        return ["Starting claude..."]
+    width = COLS - 4
+    bar = "─" * (COLS - 2)
+    lines = [f"╭{bar}╮", f"│ ✻ claude (stand-in) · {pane['cwd']}"[:COLS], f"╰{bar}╯", ""]
+    lines.extend(pane["history"])
+    if now < pane["busy_until"]:
+        lines.append("✻ Working… (esc to interrupt)")
+    lines.append(f"╭{bar}╮")
+    box = _wrap(pane["input"], width)[-INPUT_ROWS:]
+    for n, line in enumerate(box):
+        lines.append(f"│ {'>' if n == 0 else ' '} {line}")
+    lines.append(f"╰{bar}╯")
+    lines.append("  ? for shortcuts")
+    return lines
+
+
+def _list_entry(pane: dict) -> dict:
+    return {
+        "window_id": pane["window_id"],
+        "tab_id": pane["tab_id"],
+        "pane_id": pane["pane_id"],
+        "workspace": "default",
+        "size": {"rows": ROWS, "cols": COLS, "pixel_width": COLS * 8, "pixel_height": ROWS * 16, "dpi": 96},
+        "title": pane["title"],
+        "cwd": "file://localhost" + Path(pane["cwd"]).as_posix(),
+        "cursor_x": 0,
+        "cursor_y": 0,
+        "cursor_shape": "Default",
+        "cursor_visibility": "Visible",
+        "left_col": 0,
+        "top_row": 0,
+        "tab_title": pane["tab_title"],
+        "window_title": pane["title"],
+        "is_active": False,
+        "is_zoomed": False,
+        "tty_name": None,
+    }
+
+
+# ----- subcommands -----
+
+
+def _parse(args: list[str], flags: set[str], options: set[str]) -> tuple[dict, list[str], list[str]]:
+    """(options, positionals, argv after `--`) of a subcommand's arguments"""
+    opts: dict = {}
+    positional: list[str] = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            return opts, positional, args[i + 1:]
+        name, eq, value = arg.partition("=")
+        if name in flags:
+            opts[name] = True
+        elif name in options:
+            if not eq:
+                i += 1
+                if i >= len(args):
+                    raise CliError(f"a value is required for '{name}'")
+                value = args[i]
+            opts[name] = value
+        elif arg.startswith("--") and len(arg) > 2:
+            raise CliError(f"unexpected argument '{arg}'")
+        else:
+            positional.append(arg)
+        i += 1
+    return opts, positional, []
+
+
+def _target(opts: dict):
+    return opts.get("--pane-id") or os.environ.get("WEZTERM_PANE")
+
+
+def cmd_spawn(args: list[str]) -> str:
+    opts, _, argv = _parse(
+        args, {"--new-window"}, {"--pane-id", "--domain-name", "--window-id", "--cwd", "--workspace"}
+    )
+    with _Locked(state_path()) as state:
+        window_id = opts.get("--window-id")
+        if window_id is None and not opts.get("--new-window"):
+            current = state["panes"].get(str(_target(opts) or "").strip())
+            window_id = current["window_id"] if current else None
+        pane = _new_pane(state, argv, opts.get("--cwd", ""), window_id=window_id)
+    return f"{pane['pane_id']}\n"
+
+
+def cmd_split_pane(args: list[str]) -> str:
+    opts, _, argv = _parse(
+        args,
+        {"--horizontal", "--left", "--right", "--top", "--bottom", "--top-level"},
+        {"--pane-id", "--cells", "--percent", "--cwd", "--move-pane-id", "--domain-name"},
+    )
+    with _Locked(state_path()) as state:
+        target = _target(opts)
+        if target is None:
+            raise CliError("--pane-id was not specified and $WEZTERM_PANE is not set")
+        parent = _pane(state, target)
+        cwd = opts.get("--cwd") or parent["cwd"]
+        pane = _new_pane(state, argv, cwd, tab_id=parent["tab_id"], window_id=parent["window_id"])
+    return f"{pane['pane_id']}\n"
+
+
+def cmd_send_text(args: list[str]) -> str:
+    opts, positional, _ = _parse(args, {"--no-paste"}, {"--pane-id"})
+    text = " ".join(positional) if positional else sys.stdin.buffer.read().decode("utf-8", "replace")
+    with _Locked(state_path()) as state:
+        _type(_pane(state, _target(opts)), text, paste=not opts.get("--no-paste"))
+    return ""
+
+
+def cmd_send_key(args: list[str]) -> str:
+    opts, positional, _ = _parse(args, set(), {"--pane-id", "--key"})
+    key = opts.get("--key") or (positional[0] if positional else "")
+    seq = _KEYS.get(key.lower())
+    if seq is None:
+        raise CliError(f"unknown key '{key}'")
+    with _Locked(state_path()) as state:
+        _type(_pane(state, _target(opts)), seq, paste=False)
+    return ""
+
+
+def cmd_get_text(args: list[str]) -> str:
+    opts, _, _ = _parse(args, {"--escapes"}, {"--pane-id", "--start-line", "--end-line"})
+    lines = _screen(_pane(_read(state_path()), _target(opts)))
+    start = opts.get("--start-line")
+    if start is not None and int(start) < 0:
+        # Negative lines reach into scrollback, which is the whole screen here.
+        return "\n".join(lines) + "\n"
+    return "\n".join(lines[-ROWS:]) + "\n"
+
+
+def cmd_list(args: list[str]) -> str:
+    opts, _, _ = _parse(args, set(), {"--format"})
+    panes = [_list_entry(p) for p in _read(state_path())["panes"].values()]
+    if opts.get("--format") == "json":
+        return json.dumps(panes, indent=2, ensure_ascii=False) + "\n"
+    rows = ["WINID TABID PANEID WORKSPACE SIZE   TITLE                            CWD"]
+    for p in panes:
+        rows.append(
+            f"{p['window_id']:>5} {p['tab_id']:>5} {p['pane_id']:>6} {p['workspace']:<9} "
+            f"{COLS}x{ROWS} {p['title']:<32} {p['cwd']}"
+        )
+    return "\n".join(rows) + "\n"
+
+
+def cmd_list_clients(args: list[str]) -> str:
+    return "USER HOST PID CONNECTED IDLE WORKSPACE FOCUS\n"
+
+
+def cmd_set_tab_title(args: list[str]) -> str:
+    opts, positional, _ = _parse(args, set(), {"--pane-id", "--tab-id"})
+    if not positional:
+        raise CliError("the title argument is required")
+    with _Locked(state_path()) as state:
+        if opts.get("--tab-id") is not None:
+            panes = [p for p in state["panes"].values() if str(p["tab_id"]) == opts["--tab-id"]]
+            if not panes:
+                raise CliError(f"tab id {opts['--tab-id']} not found in mux")
+        else:
+            tab_id = _pane(state, _target(opts))["tab_id"]
+            panes = [p for p in state["panes"].values() if p["tab_id"] == tab_id]
+        for pane in panes:
+            pane["tab_title"] = " ".join(positional)
+    return ""
+
+
+def cmd_kill_pane(args: list[str]) -> str:
+    opts, _, _ = _parse(args, set(), {"--pane-id"})
+    with _Locked(state_path()) as state:
+        pane = _pane(state, _target(opts))
+        del state["panes"][str(pane["pane_id"])]
+    return ""
+
+
+def cmd_activate_pane(args: list[str]) -> str:
+    opts, _, _ = _parse(args, set(), {"--pane-id"})
+    _pane(_read(state_path()), _target(opts))
+    return ""
+
+
+COMMANDS = {
+    "spawn": cmd_spawn,
+    "split-pane": cmd_split_pane,
+    "send-text": cmd_send_text,
+    "send-key": cmd_send_key,
+    "get-text": cmd_get_text,
+    "list": cmd_list,
+    "list-clients": cmd_list_clients,
+    "set-tab-title": cmd_set_tab_title,
+    "kill-pane": cmd_kill_pane,
+    "activate-pane": cmd_activate_pane,
+}
+
+
+def main(argv: list[str]) -> int:
+    if argv[:1] in (["--version"], ["-V"]):
+        print(VERSION)
+        return 0
+    if argv[:1] != ["cli"]:
+        print(f"error: the stand-in only implements `wezterm cli` ({' '.join(argv)})", file=sys.stderr)
+        return 2
+    args = argv[1:]
+    while args and args[0] in ("--class", "--prefer-mux", "--no-auto-start"):
+        args = args[2:] if args[0] == "--class" else args[1:]
+    if not args or args[0] not in COMMANDS:
+        print(f"error: unrecognized subcommand '{args[0] if args else ''}'", file=sys.stderr)
+        return 2
+    name = args[0]
+    delay = _env_float(
+        f"FAKE_WEZTERM_LATENCY_{name.replace('-', '_').upper()}",
+        _env_float("FAKE_WEZTERM_LATENCY", 0.0),
+    )
+    if delay > 0:
+        time.sleep(delay)
+    try:
+        out = COMMANDS[name](args[1:])
+    except CliError as e:
+        print(f"ERROR wezterm > {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
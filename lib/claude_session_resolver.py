@@ -2,17 +2,26 @@ from __future__ import annotations
 
 import json
 import os
-import re
+import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from pane_registry import (
     load_registry_by_claude_pane,
     load_registry_by_project_id,
     load_registry_by_session_id,
+    registry_index,
+)
+from claude_transcript import (
+    CLAUDE_PROJECTS_ROOT,
+    _candidate_project_dirs,
+    _project_key_for_path,
+    _session_path_from_id,
 )
 from project_id import compute_cmw_project_id
+from providers import get_claude_instance, is_claude_instance
+from registry_index import record_keys
 from session_utils import find_project_session_file, project_config_dir
 
 
@@ -24,13 +33,6 @@ SESSION_ENV_KEYS = (
 )
 
 
-CLAUDE_PROJECTS_ROOT = Path(
-    os.environ.get("CLAUDE_PROJECTS_ROOT")
-    or os.environ.get("CLAUDE_PROJECT_ROOT")
-    or (Path.home() / ".claude" / "projects")
-).expanduser()
-
-
 @dataclass
 class ClaudeSessionResolution:
     data: dict
@@ -153,49 +155,15 @@ def _registry_updated_at(data: dict, path: Path) -> int:
         return 0
 
 
-def _project_key_for_path(path: Path) -> str:
-    return re.sub(r"[^A-Za-z0-9]", "-", str(path))
-
-
-def _candidate_project_dirs(root: Path, work_dir: Path) -> list[Path]:
-    candidates: list[Path] = []
-    env_pwd = os.environ.get("PWD")
-    if env_pwd:
-        try:
-            candidates.append(Path(env_pwd))
-        except Exception:
-            pass
-    candidates.append(work_dir)
-    try:
-        candidates.append(work_dir.resolve())
-    except Exception:
-        pass
-
-    out: list[Path] = []
-    seen: set[str] = set()
-    for candidate in candidates:
-        key = _project_key_for_path(candidate)
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(root / key)
-    return out
-
-
-def _session_path_from_id(session_id: str, work_dir: Path) -> Optional[Path]:
-    sid = str(session_id or "").strip()
-    if not sid:
-        return None
-    for project_dir in _candidate_project_dirs(CLAUDE_PROJECTS_ROOT, work_dir):
-        candidate = project_dir / f"{sid}.jsonl"
-        if candidate.exists():
-            return candidate
-    return None
-
-
-def _normalize_session_binding(data: dict, work_dir: Path) -> None:
+def _normalize_session_binding(
+    data: dict,
+    work_dir: Path,
+    session_path_for: Optional[Callable[[str], Optional[Path]]] = None,
+) -> None:
     if not isinstance(data, dict):
         return
+    if session_path_for is None:
+        session_path_for = lambda sid: _session_path_from_id(sid, work_dir)
     sid = str(data.get("claude_session_id") or data.get("session_id") or "").strip()
     path_value = str(data.get("claude_session_path") or "").strip()
     path: Optional[Path] = None
@@ -206,7 +174,7 @@ def _normalize_session_binding(data: dict, work_dir: Path) -> None:
             path = None
     if path and path.exists():
         if sid and path.stem != sid:
-            candidate = _session_path_from_id(sid, work_dir)
+            candidate = session_path_for(sid)
             if candidate and candidate.exists():
                 data["claude_session_path"] = str(candidate)
             else:
@@ -215,19 +183,12 @@ def _normalize_session_binding(data: dict, work_dir: Path) -> None:
             data["claude_session_id"] = path.stem
         return
     if sid:
-        candidate = _session_path_from_id(sid, work_dir)
+        candidate = session_path_for(sid)
         if candidate and candidate.exists():
             data["claude_session_path"] = str(candidate)
 
 
-def _load_registry_by_project_id_unfiltered(
-    cmw_project_id: str, work_dir: Path
-) -> Optional[dict]:
-    if not cmw_project_id:
-        return None
-    run_dir = _registry_run_dir()
-    if not run_dir.exists():
-        return None
+def _scan_registry_by_project_id(cmw_project_id: str, run_dir: Path) -> Optional[dict]:
     best: Optional[dict] = None
     best_ts = -1
     for path in sorted(run_dir.glob("cmw-session-*.json")):
@@ -254,6 +215,21 @@ def _load_registry_by_project_id_unfiltered(
     return best
 
 
+def _load_registry_by_project_id_unfiltered(
+    cmw_project_id: str, work_dir: Path
+) -> Optional[dict]:
+    if not cmw_project_id:
+        return None
+    run_dir = _registry_run_dir()
+    if not run_dir.exists():
+        return None
+    try:
+        return registry_index(run_dir).by_project_id(cmw_project_id)
+    except sqlite3.Error:
+        # Index unusable (e.g. read-only home): fall back to a full scan.
+        return _scan_registry_by_project_id(cmw_project_id, run_dir)
+
+
 def resolve_claude_session(
     work_dir: Path, session_filename: str = ".claude-session"
 ) -> Optional[ClaudeSessionResolution]:
@@ -396,3 +372,256 @@ def resolve_claude_session(
         return best_fallback
 
     return None
+
+
+# ----- batch resolution -----
+
+
+def _instance_session_filename(instance_id: str) -> str:
+    if not instance_id or instance_id == "default":
+        return ".claude-session"
+    if is_claude_instance(instance_id):
+        return get_claude_instance(instance_id).session_filename
+    return f".claude-{instance_id}-session"
+
+
+class _TeamContext:
+    """
+    Everything `resolve_team_sessions` reads once and shares between
+    instances: env flags, the project id, the tab mapping, one pass over the
+    registry and one listing of the Claude project dirs.
+    """
+
+    def __init__(self, work_dir: Path):
+        self.work_dir = Path(work_dir)
+        try:
+            self.project_id = compute_cmw_project_id(self.work_dir)
+        except Exception:
+            self.project_id = ""
+        self.strict_project = (self.work_dir / ".cmw_config").is_dir()
+        self.allow_cross = os.environ.get("CMW_ALLOW_CROSS_PROJECT_SESSION") in (
+            "1",
+            "true",
+            "yes",
+        )
+        self._pid_by_work_dir: dict[str, str] = {}
+        self.tabs = self._load_tabs()
+        self.by_session: dict[str, dict] = {}
+        self.by_pane: dict[str, dict] = {}
+        self.project_record: Optional[dict] = None
+        self._load_registry()
+        self.transcripts = self._load_transcripts()
+
+    @property
+    def enabled(self) -> bool:
+        return self.strict_project or self.allow_cross
+
+    def _load_tabs(self) -> dict[str, dict]:
+        data = _read_json(self.work_dir / ".cmw_config" / "tab_mapping.json")
+        tabs = data.get("tabs")
+        if not isinstance(tabs, dict):
+            return {}
+        return {
+            str(inst_id).lower(): tab
+            for inst_id, tab in tabs.items()
+            if isinstance(tab, dict)
+        }
+
+    def _record_project_id(self, record: dict) -> str:
+        pid = str(record.get("cmw_project_id") or "").strip()
+        if pid:
+            return pid
+        wd = str(record.get("work_dir") or "").strip()
+        if not wd:
+            return ""
+        if wd not in self._pid_by_work_dir:
+            try:
+                self._pid_by_work_dir[wd] = compute_cmw_project_id(Path(wd))
+            except Exception:
+                self._pid_by_work_dir[wd] = ""
+        return self._pid_by_work_dir[wd]
+
+    def _load_registry(self) -> None:
+        run_dir = _registry_run_dir()
+        if not run_dir.exists():
+            return
+        session_ids = {tab.get("claude_session_id") for tab in self.tabs.values()}
+        pane_ids = {tab.get("pane_id") for tab in self.tabs.values()}
+        project = (
+            self.project_id
+            if self.project_id and self.strict_project and not self.allow_cross
+            else None
+        )
+        try:
+            index = registry_index(run_dir)
+            self.by_session = index.best_many("claude_session_id", session_ids, project)
+            for key, record in index.best_many("session_id", session_ids, project).items():
+                self.by_session.setdefault(key, record)
+            self.by_pane = index.best_many("pane_id", pane_ids, project)
+            if self.project_id:
+                self.project_record = index.by_project_id(self.project_id)
+        except sqlite3.Error:
+            # Index unusable (e.g. read-only home): fall back to one full scan.
+            self._scan_registry(run_dir)
+
+    def _scan_registry(self, run_dir: Path) -> None:
+        stamps: dict[tuple[str, str], int] = {}
+
+        def keep(kind: str, key: str, record: dict, ts: int) -> None:
+            if not key or stamps.get((kind, key), -1) >= ts:
+                return
+            stamps[(kind, key)] = ts
+            target = self.by_pane if kind == "pane" else self.by_session
+            target[key] = record
+
+        for path in sorted(run_dir.glob("cmw-session-*.json")):
+            record = _read_json(path)
+            if not record:
+                continue
+            pid = self._record_project_id(record)
+            same_project = bool(pid) and pid == self.project_id
+            if not same_project and self.strict_project and not self.allow_cross:
+                continue
+            ts = _registry_updated_at(record, path)
+            keys = record_keys(record)
+            keep("session", keys["claude_session_id"], record, ts)
+            keep("session", keys["session_id"], record, ts)
+            keep("pane", keys["pane_id"], record, ts)
+            if same_project and stamps.get(("project", pid), -1) < ts:
+                stamps[("project", pid)] = ts
+                self.project_record = record
+
+    def _load_transcripts(self) -> dict[str, Path]:
+        out: dict[str, Path] = {}
+        for project_dir in _candidate_project_dirs(CLAUDE_PROJECTS_ROOT, self.work_dir):
+            try:
+                with os.scandir(project_dir) as it:
+                    for entry in it:
+                        if entry.name.endswith(".jsonl"):
+                            out.setdefault(entry.name[: -len(".jsonl")], Path(entry.path))
+            except OSError:
+                continue
+        return out
+
+    def session_path_for(self, session_id: str) -> Optional[Path]:
+        return self.transcripts.get(str(session_id or "").strip())
+
+
+def _resolve_team_instance(
+    ctx: _TeamContext, instance_id: str
+) -> Optional[ClaudeSessionResolution]:
+    work_dir = ctx.work_dir
+    session_filename = _instance_session_filename(instance_id)
+    tab = ctx.tabs.get(instance_id.lower()) or {}
+    best_fallback: Optional[ClaudeSessionResolution] = None
+    instance_file: list[Optional[Path]] = []
+
+    def own_session_file() -> Optional[Path]:
+        if not instance_file:
+            instance_file.append(find_project_session_file(work_dir, session_filename))
+        return instance_file[0]
+
+    def consider(
+        data: dict, session_file: Optional[Path], record: Optional[dict], source: str
+    ) -> Optional[ClaudeSessionResolution]:
+        nonlocal best_fallback
+        _normalize_session_binding(data, work_dir, ctx.session_path_for)
+        candidate = _select_resolution(data, session_file, record, source)
+        if _pane_from_data(data):
+            return candidate
+        if best_fallback is None:
+            best_fallback = candidate
+        return None
+
+    def from_record(record: Optional[dict], source: str) -> Optional[ClaudeSessionResolution]:
+        if not isinstance(record, dict):
+            return None
+        data = _data_from_registry(record, work_dir)
+        session_file = _session_file_from_record(record) or own_session_file()
+        return consider(data, session_file, record, source)
+
+    # 1) Registry via the session id pinned in the tab mapping
+    sid = str(tab.get("claude_session_id") or "").strip()
+    resolved = from_record(ctx.by_session.get(sid) if sid else None, "registry:session")
+    if resolved:
+        return resolved
+
+    # 2) Registry via the instance's pane
+    pane_id = str(tab.get("pane_id") or "").strip()
+    resolved = from_record(ctx.by_pane.get(pane_id) if pane_id else None, "registry:pane")
+    if resolved:
+        return resolved
+
+    # 3) The tab mapping entry itself
+    if tab:
+        data = {
+            "cmw_project_id": ctx.project_id,
+            "work_dir": str(work_dir),
+            "terminal": tab.get("terminal") or "wezterm",
+        }
+        if pane_id:
+            data["pane_id"] = pane_id
+        if sid:
+            data["claude_session_id"] = sid
+        resolved = consider(data, own_session_file(), None, "tab_mapping")
+        if resolved:
+            return resolved
+
+    # 4) Instance-specific session file
+    session_file = own_session_file()
+    if session_file:
+        data = _read_json(session_file)
+        if data:
+            data.setdefault("work_dir", str(work_dir))
+            resolved = consider(data, session_file, None, "session_file")
+            if resolved:
+                return resolved
+
+    # 5) Latest project record, for the default instance only
+    if instance_id.lower() == "default":
+        resolved = from_record(ctx.project_record, "registry:project_unfiltered")
+        if resolved:
+            return resolved
+
+    if best_fallback:
+        if not best_fallback.session_file:
+            best_fallback.session_file = _candidate_default_session_file(
+                work_dir, session_filename
+            )
+        return best_fallback
+
+    return None
+
+
+def resolve_team_sessions(
+    work_dir: Path, instance_ids: list[str]
+) -> dict[str, Optional[ClaudeSessionResolution]]:
+    """
+    Resolve the Claude session of every instance in `instance_ids` in one pass.
+
+    Unlike calling `resolve_claude_session` per instance, the registry, the
+    tab mapping and the Claude project dirs are read once and shared. Each
+    instance is matched by the session id and pane id recorded for it in
+    the tab mapping, then by its own session file. Returns a resolution (or
+    None) per instance id, in the order given.
+    """
+    ctx = _TeamContext(Path(work_dir))
+    if not ctx.enabled:
+        return {instance_id: None for instance_id in instance_ids}
+    return {
+        instance_id: _resolve_team_instance(ctx, instance_id)
+        for instance_id in instance_ids
+    }
+
+
+def team_session_ids(work_dir: Path, instance_ids: list[str]) -> dict[str, str]:
+    """
+    Claude session id of every instance in `instance_ids` that
+    `resolve_team_sessions` can bind to one; the others are left out.
+    """
+    out = {}
+    for instance_id, resolution in resolve_team_sessions(work_dir, instance_ids).items():
+        sid = str(resolution.data.get("claude_session_id") or "") if resolution else ""
+        if sid:
+            out[instance_id] = sid
+    return out
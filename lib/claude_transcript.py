@@ -0,0 +1,437 @@
+"""
+Reading Claude session transcripts.
+
+Claude appends every turn of a session to
+`~/.claude/projects/<project-key>/<session-id>.jsonl`. This module locates
+those files for a work directory and reads them incrementally: each reader
+remembers its byte offset and only ever parses complete lines that were
+appended since the last read. `TranscriptWatcher` turns those entries into
+per-instance turn-started / turn-finished events, so callers do not need to
+scrape pane text to learn when an instance is busy or has answered.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from terminal import env_float
+
+
+CLAUDE_PROJECTS_ROOT = Path(
+    os.environ.get("CLAUDE_PROJECTS_ROOT")
+    or os.environ.get("CLAUDE_PROJECT_ROOT")
+    or (Path.home() / ".claude" / "projects")
+).expanduser()
+
+# stop_reason values that end an assistant turn (tool_use does not).
+TURN_END_STOP_REASONS = ("end_turn", "stop_sequence", "max_tokens")
+
+
+def _project_key_for_path(path: Path) -> str:
+    return re.sub(r"[^A-Za-z0-9]", "-", str(path))
+
+
+def _candidate_project_dirs(root: Path, work_dir: Path) -> list[Path]:
+    candidates: list[Path] = []
+    env_pwd = os.environ.get("PWD")
+    if env_pwd:
+        try:
+            candidates.append(Path(env_pwd))
+        except Exception:
+            pass
+    candidates.append(work_dir)
+    try:
+        candidates.append(work_dir.resolve())
+    except Exception:
+        pass
+
+    out: list[Path] = []
+    seen: set[str] = set()
+    for candidate in candidates:
+        key = _project_key_for_path(candidate)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(root / key)
+    return out
+
+
+def _session_path_from_id(session_id: str, work_dir: Path) -> Optional[Path]:
+    sid = str(session_id or "").strip()
+    if not sid:
+        return None
+    for project_dir in _candidate_project_dirs(CLAUDE_PROJECTS_ROOT, work_dir):
+        candidate = project_dir / f"{sid}.jsonl"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def project_transcripts(work_dir: Path) -> list[Path]:
+    """Every session transcript Claude has written for `work_dir`."""
+    out: list[Path] = []
+    for project_dir in _candidate_project_dirs(CLAUDE_PROJECTS_ROOT, Path(work_dir)):
+        try:
+            out.extend(p for p in project_dir.glob("*.jsonl") if p.is_file())
+        except OSError:
+            continue
+    return out
+
+
+# ----- entries -----
+
+
+def entry_role(entry: dict) -> str:
+    message = entry.get("message")
+    if isinstance(message, dict) and message.get("role"):
+        return str(message["role"])
+    return str(entry.get("type") or "")
+
+
+def _content_blocks(entry: dict) -> list:
+    message = entry.get("message")
+    if not isinstance(message, dict):
+        return []
+    content = message.get("content")
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    return content if isinstance(content, list) else []
+
+
+def entry_text(entry: dict) -> str:
+    """Concatenated text blocks of a transcript entry."""
+    parts = []
+    for block in _content_blocks(entry):
+        if isinstance(block, dict) and block.get("type") == "text":
+            parts.append(str(block.get("text") or ""))
+    return "\n".join(p for p in parts if p)
+
+
+def entry_has_tool_activity(entry: dict) -> bool:
+    """True for tool calls and tool results (the turn is still going)."""
+    return any(
+        isinstance(block, dict) and block.get("type") in ("tool_use", "tool_result")
+        for block in _content_blocks(entry)
+    )
+
+
+def is_user_prompt(entry: dict) -> bool:
+    """A prompt typed by the user, as opposed to a tool result or meta entry."""
+    if entry.get("type") != "user" or entry.get("isMeta"):
+        return False
+    return entry_role(entry) == "user" and not entry_has_tool_activity(entry)
+
+
+def is_turn_end(entry: dict) -> bool:
+    """True if the entry explicitly closes an assistant turn."""
+    if entry.get("type") == "assistant":
+        message = entry.get("message")
+        if isinstance(message, dict):
+            return message.get("stop_reason") in TURN_END_STOP_REASONS
+    if entry.get("type") == "system":
+        return entry.get("subtype") in ("turn_duration", "stop_hook_summary")
+    return False
+
+
+class TranscriptReader:
+    """Offset-tracked reader for one transcript file."""
+
+    def __init__(self, path: Path, offset: Optional[int] = None):
+        self.path = Path(path)
+        if offset is None:
+            try:
+                offset = self.path.stat().st_size
+            except OSError:
+                offset = 0
+        self.offset = offset
+
+    def read(self) -> list[dict]:
+        """Entries appended since the last read; partial lines are left for later."""
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return []
+        if size < self.offset:
+            # Rewritten (e.g. compacted): start over.
+            self.offset = 0
+        if size == self.offset:
+            return []
+        try:
+            with open(self.path, "rb") as handle:
+                handle.seek(self.offset)
+                data = handle.read(size - self.offset)
+        except OSError:
+            return []
+        end = data.rfind(b"\n")
+        if end < 0:
+            return []
+        self.offset += end + 1
+        entries = []
+        for line in data[: end + 1].splitlines():
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line.decode("utf-8", errors="replace"))
+            except ValueError:
+                continue
+            if isinstance(obj, dict):
+                entries.append(obj)
+        return entries
+
+
+TURN_STARTED = "turn_started"
+TURN_FINISHED = "turn_finished"
+
+
+@dataclass
+class TranscriptEvent:
+    kind: str
+    instance: Optional[str]
+    path: Path
+    ts: float
+    prompt: str = ""
+    # Reply text (the assistant text after the turn's last tool round).
+    text: str = ""
+    # True if the end of the turn was inferred from a quiet transcript.
+    inferred: bool = False
+
+
+class TurnTracker:
+    """Turn state of one transcript, fed with the entries appended to it."""
+
+    def __init__(
+        self,
+        path: Path,
+        instance: Optional[str] = None,
+        offset: Optional[int] = None,
+        prime: bool = True,
+    ):
+        self.path = Path(path)
+        self.instance = instance
+        self.busy = False
+        self.prompt = ""
+        self.last_activity = time.monotonic()
+        self._texts: list[str] = []
+        self._in_tools = False
+        if offset is None and prime:
+            self._prime()
+        else:
+            self.reader = TranscriptReader(self.path, offset)
+
+    def _prime(self, tail_bytes: int = 256 * 1024) -> None:
+        """Start at the end of the file, with the turn state its tail implies."""
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            size = 0
+        # A line cut off by the seek fails to parse and is skipped.
+        self.reader = TranscriptReader(self.path, max(0, size - tail_bytes))
+        self.feed(self.reader.read())
+
+    def _event(self, kind: str, inferred: bool = False) -> TranscriptEvent:
+        return TranscriptEvent(
+            kind=kind,
+            instance=self.instance,
+            path=self.path,
+            ts=time.time(),
+            prompt=self.prompt,
+            text="\n\n".join(self._texts) if kind == TURN_FINISHED else "",
+            inferred=inferred,
+        )
+
+    def _finish(self, inferred: bool = False) -> TranscriptEvent:
+        event = self._event(TURN_FINISHED, inferred)
+        self.busy = False
+        self._texts = []
+        self._in_tools = False
+        return event
+
+    def feed(self, entries: list[dict]) -> list[TranscriptEvent]:
+        events: list[TranscriptEvent] = []
+        for entry in entries:
+            if is_user_prompt(entry):
+                if self.busy:
+                    # A new prompt while busy: the previous turn was interrupted.
+                    events.append(self._finish(inferred=True))
+                self.busy = True
+                self.prompt = entry_text(entry)
+                events.append(self._event(TURN_STARTED))
+                continue
+            if entry.get("type") not in ("assistant", "user", "system"):
+                continue
+            if not self.busy and (
+                entry.get("type") == "assistant" or entry_has_tool_activity(entry)
+            ):
+                # Joined in the middle of a turn.
+                self.busy = True
+                self.prompt = ""
+                events.append(self._event(TURN_STARTED))
+            if entry_has_tool_activity(entry):
+                # Only the text after the last tool round is the reply.
+                self._texts = []
+                self._in_tools = True
+                continue
+            if entry.get("type") == "assistant":
+                text = entry_text(entry)
+                if text:
+                    self._texts.append(text)
+                    self._in_tools = False
+            if self.busy and is_turn_end(entry):
+                events.append(self._finish())
+        return events
+
+    def poll(self) -> list[TranscriptEvent]:
+        entries = self.reader.read()
+        if not entries:
+            return []
+        self.last_activity = time.monotonic()
+        return self.feed(entries)
+
+    def settled(self, quiet: float) -> bool:
+        """True if a reply has been written and nothing followed for `quiet` seconds."""
+        return (
+            self.busy
+            and bool(self._texts)
+            and not self._in_tools
+            and time.monotonic() - self.last_activity >= quiet
+        )
+
+
+class TranscriptWatcher:
+    """
+    Tails the Claude transcripts of a project and emits turn events.
+
+    Instances with a known session are registered with `watch`. With
+    `discover=True` every other transcript of the project is followed too
+    (from its size at start-up, or from the beginning for files created
+    later) and reported with `instance=None` until `assign` names it.
+
+    Turns end on an explicit end marker in the transcript. When none is
+    written, a turn that has produced reply text counts as finished after
+    `quiet` seconds without new entries, if `idle_check(instance, path)`
+    (when given) agrees.
+
+    `poll` can be driven by the caller, or `start` runs it on a thread.
+    Subscribers are called from the polling thread.
+    """
+
+    def __init__(
+        self,
+        work_dir: Path,
+        discover: bool = True,
+        quiet: Optional[float] = None,
+        idle_check: Optional[Callable[[Optional[str], Path], bool]] = None,
+    ):
+        self.work_dir = Path(work_dir)
+        self.discover = discover
+        self.quiet = quiet if quiet is not None else env_float("CMW_TURN_QUIET", 2.0)
+        self.interval = env_float("CMW_TRANSCRIPT_POLL", 0.2) or 0.2
+        self.idle_check = idle_check
+        self._trackers: dict[Path, TurnTracker] = {}
+        self._subscribers: list[Callable[[TranscriptEvent], None]] = []
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._discovered_at = 0.0
+        if discover:
+            for path in project_transcripts(self.work_dir):
+                self._trackers[path] = TurnTracker(path, prime=False)
+            self._discovered_at = time.monotonic()
+
+    def watch(self, instance: str, session: str | Path) -> Optional[Path]:
+        """Follow an instance's transcript, given its session id or path."""
+        path = Path(session) if os.sep in str(session) else None
+        if path is None:
+            path = _session_path_from_id(str(session), self.work_dir)
+            if path is None:
+                # Not written yet: Claude creates it with the first prompt.
+                dirs = _candidate_project_dirs(CLAUDE_PROJECTS_ROOT, self.work_dir)
+                path = dirs[-1] / f"{session}.jsonl"
+        with self._lock:
+            tracker = self._trackers.get(path)
+            if tracker is None or tracker.instance is None:
+                self._trackers[path] = TurnTracker(path, instance)
+            else:
+                tracker.instance = instance
+        return path
+
+    def assign(self, path: Path, instance: str) -> None:
+        with self._lock:
+            tracker = self._trackers.get(Path(path))
+            if tracker is not None:
+                tracker.instance = instance
+
+    def is_busy(self, instance: str) -> Optional[bool]:
+        """Whether the instance is in a turn; None if its transcript is unknown."""
+        with self._lock:
+            for tracker in self._trackers.values():
+                if tracker.instance == instance:
+                    return tracker.busy
+        return None
+
+    def subscribe(self, callback: Callable[[TranscriptEvent], None]) -> Callable[[], None]:
+        """Register a callback for every event; returns an unsubscribe function."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _discover(self) -> None:
+        if not self.discover or time.monotonic() - self._discovered_at < 1.0:
+            return
+        self._discovered_at = time.monotonic()
+        for path in project_transcripts(self.work_dir):
+            if path not in self._trackers:
+                self._trackers[path] = TurnTracker(path, offset=0)
+
+    def poll(self) -> list[TranscriptEvent]:
+        """Read new entries from every transcript and dispatch the events."""
+        with self._lock:
+            self._discover()
+            events: list[TranscriptEvent] = []
+            for tracker in list(self._trackers.values()):
+                events.extend(tracker.poll())
+                if tracker.settled(self.quiet) and (
+                    self.idle_check is None or self.idle_check(tracker.instance, tracker.path)
+                ):
+                    events.append(tracker._finish(inferred=True))
+            subscribers = list(self._subscribers)
+        for event in events:
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception:
+                    pass
+        return events
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="cmw-transcripts", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                pass
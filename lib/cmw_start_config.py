@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
 import re
 from typing import Optional, Tuple
 
 
 CONFIG_FILENAME = "cmw.config"
+CACHE_FILENAME = "config.cache.json"
+CACHE_VERSION = 1
+TAB_MAPPING_FILENAME = "tab_mapping.json"
 DEFAULT_PROVIDERS = ["codex", "gemini", "opencode", "claude"]
 
 
@@ -252,7 +257,7 @@ def _config_paths(work_dir: Path) -> Tuple[Path, Path]:
     return project_cmw, global_path
 
 
-def load_start_config(work_dir: Path) -> StartConfig:
+def _parse_start_config(work_dir: Path) -> StartConfig:
     project, global_path = _config_paths(work_dir)
     if project.exists():
         return StartConfig(data=_read_config(project), path=project)
@@ -261,6 +266,170 @@ def load_start_config(work_dir: Path) -> StartConfig:
     return StartConfig(data={}, path=None)
 
 
+@dataclass
+class Routing:
+    """Where messages for each instance go"""
+
+    panes: dict = field(default_factory=dict)  # instance -> pane id
+    tabs: dict = field(default_factory=dict)  # instance -> tab_mapping entry
+
+
+@dataclass
+class _Compiled:
+    key: dict
+    config: StartConfig
+    routing: Routing
+
+
+_compiled: dict[str, _Compiled] = {}
+_compiled_lock = threading.Lock()
+
+
+def config_cache_enabled() -> bool:
+    return os.environ.get("CMW_CONFIG_CACHE", "1").strip().lower() not in {
+        "0",
+        "false",
+        "no",
+        "off",
+    }
+
+
+def _source_paths(work_dir: Path) -> dict[str, Path]:
+    cfg_dir = Path(work_dir) / ".cmw_config"
+    return {
+        "project": Path(work_dir) / CONFIG_FILENAME,
+        "project_cmw": cfg_dir / CONFIG_FILENAME,
+        "global": Path.home() / ".cmw" / CONFIG_FILENAME,
+        "tab_mapping": cfg_dir / TAB_MAPPING_FILENAME,
+    }
+
+
+def _source_key(work_dir: Path) -> dict:
+    """(mtime_ns, size) of every file the compiled config depends on"""
+    key = {}
+    for name, path in _source_paths(work_dir).items():
+        try:
+            st = path.stat()
+            key[name] = [str(path), st.st_mtime_ns, st.st_size]
+        except OSError:
+            key[name] = [str(path), None, None]
+    return key
+
+
+def _read_tabs(work_dir: Path) -> dict:
+    path = Path(work_dir) / ".cmw_config" / TAB_MAPPING_FILENAME
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            mapping = json.load(f)
+        tabs = mapping.get("tabs", {})
+        return {
+            str(inst_id).lower(): tab
+            for inst_id, tab in tabs.items()
+            if isinstance(tab, dict) and "pane_id" in tab
+        }
+    except Exception:
+        return {}
+
+
+def _build_routing(config: StartConfig, tabs: dict) -> Routing:
+    if tabs:
+        panes = {inst_id: str(tab["pane_id"]) for inst_id, tab in tabs.items()}
+        return Routing(panes=panes, tabs=tabs)
+    # No launch yet: instances are numbered in config order.
+    claude = config.data.get("claude")
+    explicit = isinstance(claude, dict) and claude.get("instances")
+    panes = {}
+    if explicit:
+        for idx, inst in enumerate(config.claude_config.instances):
+            if inst.id:
+                panes[inst.id.lower()] = str(idx)
+    return Routing(panes=panes, tabs={})
+
+
+def _snapshot_path(work_dir: Path) -> Path:
+    return Path(work_dir) / ".cmw_config" / CACHE_FILENAME
+
+
+def _load_snapshot(work_dir: Path, key: dict) -> Optional[_Compiled]:
+    try:
+        with open(_snapshot_path(work_dir), "r", encoding="utf-8") as f:
+            snap = json.load(f)
+        if snap.get("version") != CACHE_VERSION or snap.get("sources") != key:
+            return None
+        path = snap.get("config_path")
+        config = StartConfig(data=snap["data"], path=Path(path) if path else None)
+        routing = Routing(panes=snap["routing"], tabs=snap["tabs"])
+    except Exception:
+        return None
+    return _Compiled(key=key, config=config, routing=routing)
+
+
+def _write_snapshot(work_dir: Path, compiled: _Compiled) -> None:
+    path = _snapshot_path(work_dir)
+    if not path.parent.is_dir():
+        return
+    snap = {
+        "version": CACHE_VERSION,
+        "sources": compiled.key,
+        "config_path": str(compiled.config.path) if compiled.config.path else None,
+        "data": compiled.config.data,
+        "routing": compiled.routing.panes,
+        "tabs": compiled.routing.tabs,
+    }
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps(snap, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError):
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _compile(work_dir: Path) -> _Compiled:
+    """
+    Parsed config and routing table for a project, re-read only when one of
+    its source files changes. Between processes the result is shared through
+    .cmw_config/config.cache.json (CMW_CONFIG_CACHE=0 disables it).
+    """
+    work_dir = Path(work_dir)
+    cache_key = str(work_dir.resolve())
+    key = _source_key(work_dir)
+    with _compiled_lock:
+        compiled = _compiled.get(cache_key)
+        if compiled is not None and compiled.key == key:
+            return compiled
+    use_snapshot = config_cache_enabled()
+    compiled = _load_snapshot(work_dir, key) if use_snapshot else None
+    if compiled is None:
+        config = _parse_start_config(work_dir)
+        compiled = _Compiled(
+            key=key, config=config, routing=_build_routing(config, _read_tabs(work_dir))
+        )
+        if use_snapshot:
+            _write_snapshot(work_dir, compiled)
+    with _compiled_lock:
+        _compiled[cache_key] = compiled
+    return compiled
+
+
+def load_start_config(work_dir: Path) -> StartConfig:
+    """
+    Project (or global) cmw.config for `work_dir`. The result is cached and
+    shared between callers, so treat it as read-only.
+    """
+    return _compile(work_dir).config
+
+
+def load_routing(work_dir: Path) -> Routing:
+    """
+    Instance -> pane routing for `work_dir`: the tab mapping of the last
+    launch, or the configured instances in order before any launch.
+    """
+    return _compile(work_dir).routing
+
+
 def ensure_default_start_config(work_dir: Path) -> Tuple[Optional[Path], bool]:
     project, _global_path = _config_paths(work_dir)
     if project.exists():
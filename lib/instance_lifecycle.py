@@ -0,0 +1,549 @@
+"""
+Starting and stopping Claude instances after the team launch.
+
+Instances configured with `autostart: false` are not started by `cmw`;
+`start_instance` spawns one on demand (on the first message sent to it), in
+the same terminal and session as the rest of the team, waits until Claude
+is ready and records it in `.cmw_config/tab_mapping.json`.
+
+`stop_instance` does the reverse for an instance that is no longer needed
+(e.g. idle): it kills the pane, drops it from the mapping and parks its
+Claude session id in the instance's state file
+(`.cmw_config/<ClaudeInstanceSpec.state_file_name>`), so the next start
+resumes the conversation with `claude --resume` instead of starting cold.
+`restart_instance` replaces the pane of an instance whose Claude process
+exited the same way, resuming its session.
+
+Starts and stops are serialized per instance across processes with a lock
+file in `.cmw_config` named after `ClaudeInstanceSpec.lock_name`, so two
+senders racing to the same cold instance start it once.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from outbox import _owner_alive
+from terminal import env_float
+
+# run.py (the launcher) lives next to lib/ and owns the spawn helpers.
+_repo_root = Path(__file__).resolve().parent.parent
+if str(_repo_root) not in sys.path:
+    sys.path.insert(0, str(_repo_root))
+
+LOCK_STALE_SECONDS = 300.0
+
+# Process names of a running Claude CLI: the native binary, or node for the
+# npm package.
+CLAUDE_PROCESS_NAMES = {"claude", "claude.exe", "node", "node.exe"}
+
+_stdout_lock = threading.Lock()
+
+
+def lazy_start_enabled() -> bool:
+    return os.environ.get("CMW_LAZY_START", "1").strip().lower() not in {
+        "0",
+        "false",
+        "no",
+        "off",
+    }
+
+
+def configured_instance(work_dir: Path, instance_id: str):
+    """The cmw.config entry (ClaudeInstanceConfig) of an instance, or None"""
+    from cmw_start_config import load_start_config
+
+    wanted = str(instance_id or "").strip().lower()
+    for spec in load_start_config(Path(work_dir)).claude_config.instances:
+        if spec.id and spec.id.lower() == wanted:
+            return spec
+    return None
+
+
+def instance_spec(work_dir: Path, instance_id: str):
+    """The ClaudeInstanceSpec of an instance, registered from cmw.config if needed"""
+    from providers import get_claude_instance, is_claude_instance, register_claude_instance
+
+    if not instance_id or instance_id.lower() == "default":
+        return get_claude_instance("default")
+    if not is_claude_instance(instance_id):
+        config = configured_instance(work_dir, instance_id)
+        register_claude_instance(
+            instance_id,
+            config.role if config else "",
+            config.session_file if config else "",
+        )
+    return get_claude_instance(instance_id)
+
+
+# ----- locking -----
+
+
+def _lock_stale(path: Path) -> bool:
+    try:
+        owner = path.read_text(encoding="utf-8").strip()
+        age = time.time() - path.stat().st_mtime
+    except OSError:
+        return False
+    return age > LOCK_STALE_SECONDS or (bool(owner) and not _owner_alive(owner))
+
+
+@contextlib.contextmanager
+def file_lock(path: Path, timeout: float) -> Iterator[None]:
+    """Exclusive lock file shared by every process (and thread) of a project"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(str(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if _lock_stale(path):
+                with contextlib.suppress(OSError):
+                    path.unlink()
+                continue
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{path.name} is held by another process")
+            time.sleep(0.1)
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        break
+    try:
+        yield
+    finally:
+        with contextlib.suppress(OSError):
+            path.unlink()
+
+
+def instance_lock(work_dir: Path, instance_id: str, timeout: float):
+    """Lock held while an instance is started or stopped"""
+    spec = instance_spec(work_dir, instance_id)
+    return file_lock(Path(work_dir) / ".cmw_config" / f"{spec.lock_name}.lock", timeout)
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    """
+    run.py's helpers report progress on stdout, which is the JSON-RPC channel
+    in the MCP server and the reply channel of `send --ask`.
+    """
+    with _stdout_lock, contextlib.redirect_stdout(sys.stderr):
+        yield
+
+
+# ----- tab mapping -----
+
+
+def _mapping_file(work_dir: Path) -> Path:
+    return Path(work_dir) / ".cmw_config" / "tab_mapping.json"
+
+
+def record_tab(work_dir: Path, instance_id: str, tab: Optional[dict]) -> None:
+    """Add, replace (or with `tab=None` remove) one entry of the tab mapping"""
+    work_dir = Path(work_dir)
+    mapping_file = _mapping_file(work_dir)
+    with file_lock(mapping_file.with_suffix(".lock"), timeout=10.0):
+        try:
+            with open(mapping_file, "r", encoding="utf-8") as f:
+                mapping = json.load(f)
+        except (OSError, ValueError):
+            mapping = {}
+        if not isinstance(mapping, dict):
+            mapping = {}
+        mapping.setdefault("work_dir", str(work_dir))
+        mapping.setdefault("created_at", time.time())
+        tabs = mapping.get("tabs")
+        if not isinstance(tabs, dict):
+            tabs = mapping["tabs"] = {}
+        for key in [k for k in tabs if k.lower() == instance_id.lower()]:
+            del tabs[key]
+        if tab is not None:
+            tabs[instance_id] = tab
+        tmp = mapping_file.with_name(f"{mapping_file.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(mapping, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, mapping_file)
+
+
+# ----- per-instance state and log -----
+
+
+def _state_path(work_dir: Path, instance_id: str) -> Path:
+    spec = instance_spec(work_dir, instance_id)
+    return Path(work_dir) / ".cmw_config" / spec.state_file_name
+
+
+def read_state(work_dir: Path, instance_id: str) -> dict:
+    try:
+        with open(_state_path(work_dir, instance_id), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(work_dir: Path, instance_id: str, state: dict) -> None:
+    path = _state_path(work_dir, instance_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def log_event(work_dir: Path, instance_id: str, message: str) -> None:
+    """Append a line to the instance's log (.cmw_config/<log_file_name>)"""
+    spec = instance_spec(work_dir, instance_id)
+    path = Path(work_dir) / ".cmw_config" / spec.log_file_name
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"{stamp} {message}\n")
+    except OSError:
+        pass
+
+
+def is_parked(state: dict) -> bool:
+    """Stopped with a session to resume, and not started since"""
+    return bool(state.get("stopped_at")) and not state.get("resumed_at")
+
+
+def parked_instances(work_dir: Path, instance_ids) -> set[str]:
+    """Lowercased ids of instances that were stopped and wait to be resumed"""
+    return {
+        inst_id.lower()
+        for inst_id in instance_ids
+        if inst_id and is_parked(read_state(work_dir, inst_id))
+    }
+
+
+# ----- processes -----
+
+
+def _process_table() -> list[tuple[int, int, int, str, str]]:
+    """(pid, ppid, rss_kb, tty, command name) of every process, from `ps`"""
+    if os.name == "nt":
+        return []
+    try:
+        cp = subprocess.run(
+            ["ps", "-A", "-o", "pid=,ppid=,rss=,tty=,comm="],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return []
+    rows = []
+    for line in cp.stdout.splitlines():
+        parts = line.split(None, 4)
+        if len(parts) < 5:
+            continue
+        try:
+            rows.append((int(parts[0]), int(parts[1]), int(parts[2]), parts[3], parts[4]))
+        except ValueError:
+            continue
+    return rows
+
+
+def _pane_pids(pane: dict, rows: list) -> Optional[list[int]]:
+    """
+    Processes running in a listed pane: the tree under the pane's pid (tmux)
+    or the processes on its tty (WezTerm). None when the pane has neither.
+    """
+    root = str(pane.get("pane_pid") or "").strip()
+    if root.isdigit():
+        children: dict[int, list[int]] = {}
+        for pid, ppid, _rss, _tty, _comm in rows:
+            children.setdefault(ppid, []).append(pid)
+        pids, stack = [], [int(root)]
+        while stack:
+            pid = stack.pop()
+            pids.append(pid)
+            stack.extend(children.get(pid, ()))
+        return pids
+    tty = str(pane.get("tty_name") or "").strip()
+    if tty:
+        tty = tty[len("/dev/"):] if tty.startswith("/dev/") else tty
+        return [pid for pid, _ppid, _rss, row_tty, _comm in rows if row_tty == tty]
+    return None
+
+
+def pane_rss_kb(backend, pane_id: str) -> Optional[int]:
+    """Resident memory of everything running in a pane; None when it cannot be measured"""
+    try:
+        pane = backend.pane_states().get(str(pane_id)) or {}
+    except Exception:
+        return None
+    rows = _process_table()
+    pids = _pane_pids(pane, rows) if rows else None
+    if pids is None:
+        return None
+    rss = {pid: rss_kb for pid, _ppid, rss_kb, _tty, _comm in rows}
+    return sum(rss.get(pid, 0) for pid in pids)
+
+
+def claude_running(pane: dict, rows: list) -> Optional[bool]:
+    """
+    Whether a Claude process runs in a pane from a `pane_states()` listing,
+    given a `_process_table()`. None when it cannot be told (no process
+    table, or nothing to find the pane's processes by).
+    """
+    pids = _pane_pids(pane, rows) if rows else None
+    if pids is None:
+        return None
+    names = {pid: comm for pid, _ppid, _rss, _tty, comm in rows}
+    return any(
+        Path(names.get(pid, "")).name.lower() in CLAUDE_PROCESS_NAMES for pid in pids
+    )
+
+
+def _running_tab(work_dir: Path, instance_id: str) -> Optional[dict]:
+    import run
+
+    for inst_id, tab in run.read_tab_mapping(Path(work_dir)).items():
+        if inst_id.lower() == instance_id.lower():
+            return tab
+    return None
+
+
+# ----- spawning -----
+
+
+def _team_terminal(tabs: dict) -> tuple[Optional[str], Optional[str]]:
+    """(terminal, tmux session) the running team uses"""
+    for tab in tabs.values():
+        terminal = tab.get("terminal") or "wezterm"
+        return terminal, tab.get("tmux_session") if terminal == "tmux" else None
+    return None, None
+
+
+def backend_for(tab: dict):
+    """Terminal backend of a tab mapping entry"""
+    import run
+    from terminal import PtyBackend, TmuxBackend
+
+    if tab.get("terminal") == "tmux":
+        return TmuxBackend()
+    if tab.get("terminal") == "pty":
+        return PtyBackend()
+    return run._pane_backend(run._find_wezterm_bin())
+
+
+def spawn_target(work_dir: Path) -> tuple[str, Optional[str], Optional[str]]:
+    """(terminal, tmux session, wezterm binary) new panes of the team go to"""
+    import run
+
+    wezterm_bin = run._find_wezterm_bin()
+    terminal, session = _team_terminal(run.read_tab_mapping(Path(work_dir)))
+    terminal = terminal or run.choose_terminal(wezterm_bin)
+    if terminal == "tmux":
+        session = session or run._tmux_session_name(Path(work_dir))
+    return terminal, session, wezterm_bin
+
+
+def spawn_pane(work_dir: Path, name: str, title: str, claude_args_list: list) -> dict:
+    """
+    Spawn a pane running Claude next to the running team and wait until it
+    is ready. Returns its tab entry without a role; raises RuntimeError.
+    """
+    import run
+    from instance_state import wait_for_ready
+    from terminal import PtyBackend, TmuxBackend
+
+    work_dir = Path(work_dir)
+    terminal, session, wezterm_bin = spawn_target(work_dir)
+    session_id, args = run.pin_session_id(claude_args_list)
+
+    if terminal == "tmux":
+        backend = TmuxBackend()
+        argv = run.build_claude_argv(args, run.KEEP_OPEN)
+        pane_id = backend.create_window(argv, str(work_dir), session, name)
+        backend.set_pane_title(pane_id, title)
+        tab = {"pane_id": pane_id, "terminal": "tmux", "tmux_session": session}
+    elif terminal == "pty":
+        backend = PtyBackend()
+        argv = run.build_claude_argv(args, run.KEEP_OPEN)
+        pane_id = backend.create_window(argv, str(work_dir), run._tmux_session_name(work_dir), name)
+        backend.set_pane_title(pane_id, title)
+        tab = {"pane_id": pane_id, "terminal": "pty"}
+    else:
+        if not wezterm_bin:
+            raise RuntimeError("WezTerm not found")
+        with _quiet():
+            pane_id = run.spawn_new_tab(wezterm_bin, work_dir, name, args)
+            if pane_id:
+                run.set_tab_title(wezterm_bin, pane_id, title)
+        if not pane_id:
+            raise RuntimeError("could not spawn a WezTerm tab")
+        backend = run._pane_backend(wezterm_bin)
+        tab = {"pane_id": pane_id, "terminal": "wezterm"}
+
+    tab["claude_session_id"] = session_id
+    tab["ready_at"] = wait_for_ready(backend, pane_id)
+    return tab
+
+
+def spawn_instance(work_dir: Path, spec, claude_args_list: list) -> dict:
+    """
+    Start Claude for `spec` next to the running team: claim a pane from the
+    warm pool if one was started with the same args, else spawn one and wait
+    until it is ready. Returns its tab mapping entry; raises RuntimeError.
+    """
+    from warm_pool import claim, refill_in_background
+
+    tab = claim(work_dir, spec, claude_args_list)
+    if tab is None:
+        tab = spawn_pane(work_dir, spec.id, f"{spec.id} - {spec.role}", claude_args_list)
+        tab["role"] = spec.role
+    refill_in_background(work_dir)
+    return tab
+
+
+def _with_resume(work_dir: Path, claude_args_list: list, session_id: str) -> tuple[list, str]:
+    """
+    Add `--resume <session_id>` to the Claude args, unless they already pick
+    a session or the session's transcript is gone. Returns the args and the
+    session id resumed ("" for a new session).
+    """
+    import run
+    from claude_transcript import _session_path_from_id
+
+    session_id = str(session_id or "").strip()
+    selects = any(a.split("=", 1)[0] in run._SESSION_SELECT_ARGS for a in claude_args_list)
+    if session_id and not selects and _session_path_from_id(session_id, work_dir):
+        return [*claude_args_list, "--resume", session_id], session_id
+    return list(claude_args_list), ""
+
+
+def start_instance(work_dir: Path, instance_id: str) -> dict:
+    """
+    Start a configured instance that is not running and record it in the
+    tab mapping. Returns its tab entry (the existing one if another process
+    started it meanwhile). Raises LookupError for unknown instances and
+    RuntimeError/TimeoutError if the start fails.
+    """
+    import run
+    from cmw_start_config import load_start_config
+
+    work_dir = Path(work_dir)
+    spec = configured_instance(work_dir, instance_id)
+    if spec is None:
+        raise LookupError(f"Instance '{instance_id}' is not configured in cmw.config")
+    timeout = env_float("CMW_READY_TIMEOUT", 30.0) + 30.0
+    with instance_lock(work_dir, spec.id, timeout):
+        tab = _running_tab(work_dir, spec.id)
+        if tab is not None:
+            return tab
+        started = time.perf_counter()
+        claude_args_list = run.claude_args_from_config(load_start_config(work_dir), work_dir)
+
+        # Resume the conversation of an instance that was stopped earlier.
+        state = read_state(work_dir, spec.id)
+        parked_id = str(state.get("claude_session_id") or "") if is_parked(state) else ""
+        claude_args_list, resume_id = _with_resume(work_dir, claude_args_list, parked_id)
+
+        tab = spawn_instance(work_dir, spec, claude_args_list)
+        if resume_id:
+            tab["claude_session_id"] = resume_id
+        record_tab(work_dir, spec.id, tab)
+        if is_parked(state):
+            write_state(work_dir, spec.id, {**state, "resumed_at": time.time()})
+    how = f"resumed session {resume_id}" if resume_id else "new session"
+    elapsed = time.perf_counter() - started
+    print(
+        f"Started {spec.id} on demand (pane {tab['pane_id']}, {how}) in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    log_event(work_dir, spec.id, f"started on demand in pane {tab['pane_id']} ({how})")
+    return tab
+
+
+def stop_instance(work_dir: Path, instance_id: str, reason: str) -> Optional[dict]:
+    """
+    Kill a running instance's pane, remove it from the tab mapping and park
+    its session id for resume. Returns the state written (with the resident
+    memory reclaimed as `rss_kb`, if measurable), or None if it was not
+    running.
+    """
+    work_dir = Path(work_dir)
+    with instance_lock(work_dir, instance_id, timeout=30.0):
+        tab = _running_tab(work_dir, instance_id)
+        if tab is None:
+            return None
+        pane_id = str(tab["pane_id"])
+        backend = backend_for(tab)
+        rss_kb = pane_rss_kb(backend, pane_id)
+        backend.kill_pane(pane_id)
+        record_tab(work_dir, instance_id, None)
+        state = {
+            "instance": instance_id,
+            "claude_session_id": tab.get("claude_session_id"),
+            "pane_id": pane_id,
+            "role": tab.get("role"),
+            "stopped_at": time.time(),
+            "reason": reason,
+            "rss_kb": rss_kb,
+        }
+        write_state(work_dir, instance_id, state)
+    freed = f"{rss_kb / 1024:.1f} MB" if rss_kb is not None else "unknown memory"
+    log_event(
+        work_dir,
+        instance_id,
+        f"stopped ({reason}), pane {pane_id}, reclaimed {freed}, "
+        f"session {state['claude_session_id'] or 'unknown'} parked for resume",
+    )
+    return state
+
+
+def restart_instance(
+    work_dir: Path, instance_id: str, pane_id: str, session_id: str = "", reason: str = "crashed"
+) -> Optional[dict]:
+    """
+    Replace `pane_id`, the pane of an instance whose Claude process exited,
+    with a new one resuming `session_id` (or the session recorded in the tab
+    mapping). Returns the new tab entry, or None if the instance was removed
+    from the config, stopped or restarted by another process meanwhile.
+    Raises RuntimeError/TimeoutError if the spawn fails.
+    """
+    import run
+    from cmw_start_config import load_start_config
+
+    work_dir = Path(work_dir)
+    spec = configured_instance(work_dir, instance_id)
+    if spec is None:
+        return None
+    timeout = env_float("CMW_READY_TIMEOUT", 30.0) + 30.0
+    with instance_lock(work_dir, spec.id, timeout):
+        tab = _running_tab(work_dir, spec.id)
+        if tab is None or str(tab.get("pane_id")) != str(pane_id):
+            return None
+        started = time.perf_counter()
+        try:
+            # A pane left with a bare shell (CMW_KEEP_OPEN, shell launch mode).
+            backend_for(tab).kill_pane(str(pane_id))
+        except Exception:
+            pass
+        claude_args_list = run.claude_args_from_config(load_start_config(work_dir), work_dir)
+        claude_args_list, resume_id = _with_resume(
+            work_dir, claude_args_list, session_id or tab.get("claude_session_id")
+        )
+        new_tab = spawn_instance(work_dir, spec, claude_args_list)
+        if resume_id:
+            new_tab["claude_session_id"] = resume_id
+        record_tab(work_dir, spec.id, new_tab)
+    how = f"resumed session {resume_id}" if resume_id else "new session"
+    elapsed = time.perf_counter() - started
+    log_event(
+        work_dir,
+        spec.id,
+        f"restarted ({reason}), pane {pane_id} -> {new_tab['pane_id']} ({how}) in {elapsed:.1f}s",
+    )
+    return new_tab
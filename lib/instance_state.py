@@ -0,0 +1,215 @@
+"""
+Instance state detection for Claude panes.
+
+Works on top of `TerminalBackend.get_text` snapshots, so it does not depend on
+any particular terminal as long as the backend can capture pane text.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from typing import Optional
+
+from terminal import env_float
+
+
+# Markers the Claude TUI draws once it is accepting input.
+DEFAULT_READY_PATTERNS = (
+    r"\? for shortcuts",
+    r"bypass permissions on",
+    r"accept edits on",
+    r"plan mode on",
+    r"^[\s│|]*>\s",
+)
+
+
+def _ready_patterns() -> list[re.Pattern]:
+    override = (os.environ.get("CMW_READY_PATTERN") or "").strip()
+    raw = [override] if override else list(DEFAULT_READY_PATTERNS)
+    patterns = []
+    for item in raw:
+        try:
+            patterns.append(re.compile(item, re.MULTILINE))
+        except re.error:
+            continue
+    return patterns
+
+
+def looks_ready(text: Optional[str]) -> bool:
+    """Return True if the pane text shows the Claude input prompt."""
+    if not text:
+        return False
+    return any(p.search(text) for p in _ready_patterns())
+
+
+def looks_started(text: Optional[str]) -> bool:
+    """Return True once the pane has drawn anything (e.g. a shell prompt)."""
+    return bool(text and text.strip())
+
+
+# Drawn while Claude is working on a turn.
+GENERATING_PATTERNS = (
+    r"esc to interrupt",
+)
+
+# Drawn while Claude waits for the user to approve a tool call. Text typed
+# into such a pane would answer the dialog, so it must never receive input.
+PERMISSION_PATTERNS = (
+    r"Do you want to proceed\?",
+    r"Do you want to (make this edit|create|allow|run)",
+    r"No, and tell Claude what to do differently",
+    r"^[\s│|]*❯\s*1\.\s*Yes",
+)
+
+STATE_IDLE = "idle"
+STATE_GENERATING = "generating"
+STATE_AWAITING_PERMISSION = "awaiting_permission"
+STATE_DEAD = "dead"
+STATE_UNKNOWN = "unknown"
+# Configured but not running (no pane yet); started by the first message.
+STATE_STOPPED = "stopped"
+
+# Claude collapses large pastes into a placeholder instead of echoing them.
+_PASTE_PLACEHOLDER = "[Pastedtext"
+
+_SCREEN_NOISE = re.compile(r"[\s│|╭╮╰╯─>]+")
+
+# A horizontal border of Claude's input box, with or without rounded corners.
+_BOX_BORDER = re.compile(r"^\s*[╭╰]?─{8,}[╮╯]?\s*$")
+
+
+def looks_generating(text: Optional[str]) -> bool:
+    """Return True if the pane text shows Claude working on a turn."""
+    if not text:
+        return False
+    return any(re.search(p, text, re.IGNORECASE) for p in GENERATING_PATTERNS)
+
+
+def looks_awaiting_permission(text: Optional[str]) -> bool:
+    """Return True if the pane text shows a tool permission dialog."""
+    if not text:
+        return False
+    return any(re.search(p, text, re.MULTILINE) for p in PERMISSION_PATTERNS)
+
+
+def classify(text: Optional[str]) -> str:
+    """
+    Classify a Claude pane from a snapshot of its bottom lines.
+
+    `None` (capture failed) means the pane is gone. Anything that is not one
+    of the known screens, e.g. Claude still starting, is STATE_UNKNOWN.
+    """
+    if text is None:
+        return STATE_DEAD
+    if looks_awaiting_permission(text):
+        return STATE_AWAITING_PERMISSION
+    if looks_generating(text):
+        return STATE_GENERATING
+    if looks_ready(text):
+        return STATE_IDLE
+    return STATE_UNKNOWN
+
+
+def instance_state(backend, pane_id: str, lines: int = 40) -> str:
+    """Current state of the Claude instance in `pane_id`."""
+    text = backend.get_text(pane_id, lines=lines)
+    if text is None and backend.is_alive(pane_id):
+        # Capture failed on a live pane; don't report it as dead.
+        return STATE_UNKNOWN
+    return classify(text)
+
+
+def compact_screen(text: str) -> str:
+    """Strip whitespace and box drawing so wrapped input can be matched."""
+    return _SCREEN_NOISE.sub("", text or "")
+
+
+def input_box(text: Optional[str]) -> Optional[str]:
+    """
+    The lines inside Claude's input box (between its last two borders), or
+    None if `text` shows no box. Submitted messages are echoed above the box,
+    so only this region tells whether a message is still pending.
+    """
+    lines = (text or "").splitlines()
+    borders = [n for n, line in enumerate(lines) if _BOX_BORDER.match(line)]
+    if len(borders) < 2:
+        return None
+    return "\n".join(lines[borders[-2] + 1:borders[-1]])
+
+
+def input_shows(text: Optional[str], message: str, tail_chars: int = 24) -> bool:
+    """
+    Return True if `text` (the bottom of a pane) shows `message` as pending
+    input: either its tail or Claude's "[Pasted text ...]" placeholder.
+    """
+    if not text:
+        return False
+    screen = compact_screen(text)
+    if _PASTE_PLACEHOLDER in screen:
+        return True
+    needle = compact_screen(message)[-tail_chars:]
+    return bool(needle) and needle in screen
+
+
+def _poll(backend, pane_id: str, predicate, timeout: float, lines: int) -> bool:
+    deadline = time.monotonic() + max(0.0, timeout)
+    delay = env_float("CMW_READY_POLL_INITIAL", 0.1) or 0.1
+    max_delay = env_float("CMW_READY_POLL_MAX", 1.0) or 1.0
+    while True:
+        if predicate(backend.get_text(pane_id, lines=lines)):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 1.5, max_delay)
+
+
+def wait_for_ready(
+    backend, pane_id: str, timeout: Optional[float] = None, lines: int = 40
+) -> Optional[float]:
+    """
+    Poll a pane with backoff until the Claude prompt appears.
+
+    Returns the wall-clock time (`time.time()`) the prompt was seen, or None
+    if the instance did not become ready within `timeout` seconds.
+    """
+    if timeout is None:
+        timeout = env_float("CMW_READY_TIMEOUT", 30.0)
+    if _poll(backend, pane_id, looks_ready, timeout, lines):
+        return time.time()
+    return None
+
+
+def wait_for_output(backend, pane_id: str, timeout: float = 5.0) -> bool:
+    """Wait until a freshly spawned pane has drawn its first output."""
+    return _poll(backend, pane_id, looks_started, timeout, lines=5)
+
+
+def wait_for_idle(
+    backend, pane_id: str, timeout: Optional[float] = None, lines: int = 40
+) -> tuple[str, float]:
+    """
+    Poll a pane with backoff until the instance is idle or dead.
+
+    Returns (state, seconds waited); the state is whatever was last seen when
+    `timeout` (CMW_SEND_IDLE_TIMEOUT, default 30s) runs out.
+    """
+    if timeout is None:
+        timeout = env_float("CMW_SEND_IDLE_TIMEOUT", 30.0)
+    start = time.monotonic()
+    deadline = start + max(0.0, timeout)
+    delay = env_float("CMW_READY_POLL_INITIAL", 0.1) or 0.1
+    max_delay = env_float("CMW_READY_POLL_MAX", 1.0) or 1.0
+    while True:
+        state = instance_state(backend, pane_id, lines=lines)
+        if state in (STATE_IDLE, STATE_DEAD):
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 1.5, max_delay)
+    return state, time.monotonic() - start
@@ -0,0 +1,376 @@
+"""
+Durable per-instance message outbox.
+
+Messages are appended to `.cmw_config/outbox.db` (SQLite, WAL mode) before
+any keystroke is sent. Each instance has at most one writer at a time, across
+every process sharing the project directory: a worker takes a lease row for
+the instance and delivers that instance's messages strictly in enqueue order,
+retrying a failing head message with exponential backoff before moving on.
+
+Message ids make enqueueing idempotent: re-submitting an id that is already
+in the outbox does not queue a second copy. While a message is being typed
+its row is marked in flight and a heartbeat keeps the writer's lease alive,
+however long the delivery takes. A writer that takes over a lapsed lease
+never types a message another live writer still has in flight. Delivery is
+at-least-once: a process that dies between typing a message and recording it
+as delivered leaves it in flight, and the next writer delivers it again.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+from terminal import env_float
+
+
+STATUS_PENDING = "pending"
+# Claimed by a writer (`claimed_by`) that is typing it right now.
+STATUS_DELIVERING = "delivering"
+STATUS_DELIVERED = "delivered"
+STATUS_FAILED = "failed"
+
+LEASE_SECONDS = 60.0
+# A writer renews its lease this often while a delivery runs.
+HEARTBEAT_SECONDS = LEASE_SECONDS / 4
+SCHEMA_VERSION = 1
+# Delivered and failed rows are kept this long for status lookups.
+RETAIN_SECONDS = 24 * 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    instance TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    delivered_at REAL,
+    last_error TEXT,
+    result TEXT,
+    claimed_by TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_queue ON messages (instance, status, seq);
+CREATE TABLE IF NOT EXISTS writers (
+    instance TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    lease_until REAL NOT NULL
+);
+"""
+
+
+def outbox_enabled() -> bool:
+    return os.environ.get("CMW_OUTBOX", "1").strip().lower() not in {
+        "0",
+        "false",
+        "no",
+        "off",
+    }
+
+
+def _owner_alive(owner: str) -> bool:
+    """False if the owner is a process on this machine, or a thread of this process, that has exited."""
+    try:
+        pid_text, ident_text = owner.split(":")[:2]
+        pid, ident = int(pid_text), int(ident_text)
+    except ValueError:
+        return True
+    if pid == os.getpid():
+        return any(t.ident == ident for t in threading.enumerate())
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class Outbox:
+    """Queue and deliver messages for the instances of one project."""
+
+    def __init__(self, work_dir: Path | str):
+        self.path = Path(work_dir) / ".cmw_config" / "outbox.db"
+        self.max_attempts = max(1, int(env_float("CMW_OUTBOX_RETRIES", 5)))
+        self.backoff = env_float("CMW_OUTBOX_BACKOFF", 0.5) or 0.5
+        self.max_backoff = env_float("CMW_OUTBOX_MAX_BACKOFF", 30.0) or 30.0
+        self._local = threading.local()
+        self._workers: dict[str, threading.Thread] = {}
+        self._workers_lock = threading.Lock()
+        self._pruned_at = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._migrate(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Bring an outbox written by an older version up to SCHEMA_VERSION."""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(messages)")}
+        if "claimed_by" not in columns:
+            try:
+                conn.execute("ALTER TABLE messages ADD COLUMN claimed_by TEXT")
+            except sqlite3.OperationalError:
+                pass  # added by a concurrent process
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _close_db(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ----- queue -----
+
+    def enqueue(self, instance: str, body: str, msg_id: Optional[str] = None) -> tuple[str, bool]:
+        """
+        Durably queue a message. Returns (id, created); `created` is False when
+        a message with this id was already queued.
+        """
+        msg_id = (msg_id or "").strip() or uuid.uuid4().hex[:12]
+        now = time.time()
+        cur = self._db().execute(
+            "INSERT OR IGNORE INTO messages (id, instance, body, created_at, next_attempt_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (msg_id, instance.lower(), body, now, now),
+        )
+        self._maybe_prune(now)
+        return msg_id, cur.rowcount > 0
+
+    def get(self, msg_id: str) -> Optional[dict]:
+        row = self._db().execute("SELECT * FROM messages WHERE id = ?", (msg_id,)).fetchone()
+        return dict(row) if row else None
+
+    def pending_instances(self) -> list[str]:
+        rows = self._db().execute(
+            "SELECT DISTINCT instance FROM messages WHERE status IN (?, ?)",
+            (STATUS_PENDING, STATUS_DELIVERING),
+        ).fetchall()
+        return [r["instance"] for r in rows]
+
+    def _maybe_prune(self, now: float) -> None:
+        if now - self._pruned_at < 3600:
+            return
+        self._pruned_at = now
+        self._db().execute(
+            "DELETE FROM messages WHERE status NOT IN (?, ?) AND created_at < ?",
+            (STATUS_PENDING, STATUS_DELIVERING, now - RETAIN_SECONDS),
+        )
+
+    # ----- single writer per instance -----
+
+    def _acquire(self, instance: str, owner: str) -> bool:
+        now = time.time()
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT owner, lease_until FROM writers WHERE instance = ?", (instance,)
+            ).fetchone()
+            if (
+                row
+                and row["owner"] != owner
+                and row["lease_until"] > now
+                and _owner_alive(row["owner"])
+            ):
+                db.execute("COMMIT")
+                return False
+            db.execute(
+                "INSERT OR REPLACE INTO writers (instance, owner, lease_until) VALUES (?, ?, ?)",
+                (instance, owner, now + LEASE_SECONDS),
+            )
+            db.execute("COMMIT")
+            return True
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def _renew(self, instance: str, owner: str) -> None:
+        self._db().execute(
+            "UPDATE writers SET lease_until = ? WHERE instance = ? AND owner = ?",
+            (time.time() + LEASE_SECONDS, instance, owner),
+        )
+
+    def _heartbeat(self, instance: str, owner: str, stop: threading.Event) -> None:
+        try:
+            while not stop.wait(HEARTBEAT_SECONDS):
+                try:
+                    self._renew(instance, owner)
+                except sqlite3.Error:
+                    continue
+        finally:
+            self._close_db()
+
+    def _deliver_leased(
+        self, instance: str, owner: str, body: str, deliver: Callable[[str, str], str]
+    ) -> str:
+        """`deliver(instance, body)` with the lease renewed until it returns"""
+        stop = threading.Event()
+        beat = threading.Thread(
+            target=self._heartbeat,
+            args=(instance, owner, stop),
+            name=f"cmw-outbox-lease-{instance}",
+            daemon=True,
+        )
+        beat.start()
+        try:
+            return deliver(instance, body)
+        finally:
+            stop.set()
+            beat.join()
+
+    def _release(self, instance: str, owner: str) -> None:
+        self._db().execute(
+            "DELETE FROM writers WHERE instance = ? AND owner = ?", (instance, owner)
+        )
+
+    def _head(self, instance: str) -> Optional[sqlite3.Row]:
+        return self._db().execute(
+            "SELECT * FROM messages WHERE instance = ? AND status IN (?, ?)"
+            " ORDER BY seq LIMIT 1",
+            (instance, STATUS_PENDING, STATUS_DELIVERING),
+        ).fetchone()
+
+    def drain(self, instance: str, deliver: Callable[[str, str], str]) -> bool:
+        """
+        Deliver every pending message for `instance`, in order, with
+        `deliver(instance, body)`; it returns a result string or raises.
+
+        Returns False without doing anything if another writer holds the
+        instance; True once its queue is empty.
+        """
+        instance = instance.lower()
+        owner = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:6]}"
+        if not self._acquire(instance, owner):
+            return False
+        db = self._db()
+        try:
+            while True:
+                row = self._head(instance)
+                if row is None:
+                    return True
+                if row["status"] == STATUS_DELIVERING:
+                    if _owner_alive(row["claimed_by"] or ""):
+                        # Its writer lost the lease but may still be typing it.
+                        return False
+                    # Its writer died mid-delivery: deliver it again.
+                    db.execute(
+                        "UPDATE messages SET status = ?, claimed_by = NULL"
+                        " WHERE seq = ? AND status = ?",
+                        (STATUS_PENDING, row["seq"], STATUS_DELIVERING),
+                    )
+                    continue
+                wait = row["next_attempt_at"] - time.time()
+                if wait > 0:
+                    # Head-of-line backoff keeps later messages in order.
+                    time.sleep(min(wait, LEASE_SECONDS / 4))
+                    if not self._acquire(instance, owner):
+                        return False
+                    continue
+                claimed = db.execute(
+                    "UPDATE messages SET status = ?, claimed_by = ? WHERE seq = ? AND status = ?",
+                    (STATUS_DELIVERING, owner, row["seq"], STATUS_PENDING),
+                )
+                if claimed.rowcount != 1:
+                    continue
+                try:
+                    result = self._deliver_leased(instance, owner, row["body"], deliver)
+                except Exception as e:
+                    attempts = row["attempts"] + 1
+                    status = STATUS_FAILED if attempts >= self.max_attempts else STATUS_PENDING
+                    delay = min(self.backoff * (2 ** (attempts - 1)), self.max_backoff)
+                    db.execute(
+                        "UPDATE messages SET attempts = ?, status = ?, next_attempt_at = ?,"
+                        " last_error = ?, claimed_by = NULL WHERE seq = ?",
+                        (attempts, status, time.time() + delay, str(e), row["seq"]),
+                    )
+                else:
+                    db.execute(
+                        "UPDATE messages SET attempts = attempts + 1, status = ?,"
+                        " delivered_at = ?, result = ?, claimed_by = NULL WHERE seq = ?",
+                        (STATUS_DELIVERED, time.time(), str(result or ""), row["seq"]),
+                    )
+                if not self._acquire(instance, owner):
+                    return False
+        finally:
+            self._release(instance, owner)
+
+    # ----- background workers -----
+
+    def kick(self, instance: str, deliver: Callable[[str, str], str]) -> None:
+        """Make sure a background writer is draining `instance`."""
+        instance = instance.lower()
+        with self._workers_lock:
+            if instance in self._workers:
+                return
+            worker = threading.Thread(
+                target=self._work,
+                args=(instance, deliver),
+                name=f"cmw-outbox-{instance}",
+                daemon=True,
+            )
+            self._workers[instance] = worker
+            worker.start()
+
+    def _work(self, instance: str, deliver: Callable[[str, str], str]) -> None:
+        delay = 0.1
+        try:
+            while True:
+                if self.drain(instance, deliver):
+                    delay = 0.1
+                else:
+                    # Another process is the writer; take over if its lease
+                    # lapses while messages are still pending.
+                    time.sleep(delay)
+                    delay = min(delay * 2, 2.0)
+                # Decide to exit under the lock so a concurrent `kick` either
+                # sees this worker or its message is seen here.
+                with self._workers_lock:
+                    if self._head(instance) is None:
+                        self._workers.pop(instance, None)
+                        return
+        except Exception:
+            with self._workers_lock:
+                self._workers.pop(instance, None)
+        finally:
+            self._close_db()
+
+    def join(self, timeout: float) -> None:
+        """Wait up to `timeout` seconds for background writers to finish."""
+        deadline = time.monotonic() + timeout
+        with self._workers_lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+
+    def wait(self, msg_id: str, timeout: float) -> Optional[dict]:
+        """Poll until a message is delivered or failed; returns its row."""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            row = self.get(msg_id)
+            if row is None or row["status"] not in (STATUS_PENDING, STATUS_DELIVERING):
+                return row
+            if time.monotonic() >= deadline:
+                return row
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
@@ -0,0 +1,145 @@
+"""
+Lookups in the session registry (`~/.cmw/run/cmw-session-*.json`).
+
+Each record describes one running cmw session: its project, work dir,
+terminal and, per provider, the pane and session it runs in. Lookups go
+through the SQLite index in `registry_index`; when that cannot be opened
+(e.g. a read-only home) they fall back to scanning the records.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Callable, Optional
+
+from project_id import compute_cmw_project_id
+from registry_index import RegistryIndex, default_run_dir, record_keys, record_updated_at
+from terminal import get_backend_for_session
+
+
+_registry_indexes: dict[str, RegistryIndex] = {}
+
+
+def registry_index(run_dir: Optional[Path] = None) -> RegistryIndex:
+    """The process-wide index of `run_dir` (default ~/.cmw/run)"""
+    run_dir = Path(run_dir) if run_dir else default_run_dir()
+    key = str(run_dir)
+    index = _registry_indexes.get(key)
+    if index is None:
+        index = RegistryIndex(run_dir)
+        _registry_indexes[key] = index
+    return index
+
+
+def record_project_id(record: dict) -> str:
+    """A record's stored project id, else the one of its work dir"""
+    pid = str(record.get("cmw_project_id") or "").strip()
+    if pid:
+        return pid
+    work_dir = str(record.get("work_dir") or "").strip()
+    return compute_cmw_project_id(Path(work_dir)) if work_dir else ""
+
+
+def _scan(run_dir: Path, matches: Callable[[dict], bool]) -> list[dict]:
+    """Matching records, most recently updated first"""
+    found = []
+    for path in run_dir.glob("cmw-session-*.json"):
+        try:
+            record = json.loads(path.read_text(encoding="utf-8-sig", errors="replace"))
+            mtime = path.stat().st_mtime
+        except (OSError, ValueError):
+            continue
+        if isinstance(record, dict) and record and matches(record):
+            found.append((record_updated_at(record, mtime), record))
+    found.sort(key=lambda item: item[0], reverse=True)
+    return [record for _, record in found]
+
+
+def _lookup(
+    query: Callable[[RegistryIndex], list[dict]], matches: Callable[[dict], bool]
+) -> list[dict]:
+    """`query` against the index; `matches` filters the scan fallback"""
+    run_dir = default_run_dir()
+    if not run_dir.exists():
+        return []
+    try:
+        return query(registry_index(run_dir))
+    except sqlite3.Error:
+        return _scan(run_dir, matches)
+
+
+def _listed(record: Optional[dict]) -> list[dict]:
+    return [record] if record else []
+
+
+def _provider_pane(record: dict, provider: str) -> str:
+    providers = record.get("providers")
+    entry = providers.get(provider) if isinstance(providers, dict) else None
+    pane_id = entry.get("pane_id") if isinstance(entry, dict) else None
+    if not pane_id and provider == "claude":
+        pane_id = record.get("claude_pane_id")
+    return str(pane_id or "").strip()
+
+
+def _first_alive(records: list[dict], provider: str) -> Optional[dict]:
+    """The first record whose `provider` pane still exists; one listing per terminal"""
+    by_terminal: dict[str, list[str]] = {}
+    for record in records:
+        pane_id = _provider_pane(record, provider)
+        if pane_id:
+            by_terminal.setdefault(record.get("terminal") or "tmux", []).append(pane_id)
+    alive: dict[str, dict[str, bool]] = {}
+    for terminal, pane_ids in by_terminal.items():
+        backend = get_backend_for_session({"terminal": terminal})
+        try:
+            alive[terminal] = backend.is_alive_many(pane_ids) if backend else {}
+        except OSError:
+            alive[terminal] = {}
+    for record in records:
+        pane_id = _provider_pane(record, provider)
+        if pane_id and alive.get(record.get("terminal") or "tmux", {}).get(pane_id):
+            return record
+    return None
+
+
+def load_registry_by_session_id(session_id: str) -> Optional[dict]:
+    """Latest record of a cmw or Claude session id"""
+    session_id = str(session_id or "").strip()
+    if not session_id:
+        return None
+
+    def matches(record: dict) -> bool:
+        keys = record_keys(record)
+        return session_id in (keys["session_id"], keys["claude_session_id"])
+
+    found = _lookup(lambda index: _listed(index.by_session_id(session_id)), matches)
+    return found[0] if found else None
+
+
+def load_registry_by_claude_pane(pane_id: str) -> Optional[dict]:
+    """Latest record whose Claude runs in `pane_id`"""
+    pane_id = str(pane_id or "").strip()
+    if not pane_id:
+        return None
+    found = _lookup(
+        lambda index: _listed(index.by_pane_id(pane_id)),
+        lambda record: record_keys(record)["pane_id"] == pane_id,
+    )
+    return found[0] if found else None
+
+
+def load_registry_by_project_id(cmw_project_id: str, provider: str = "claude") -> Optional[dict]:
+    """
+    Latest record of a project whose `provider` pane is still alive. Records
+    of panes that are gone (or whose terminal cannot be reached) are
+    skipped; see `claude_session_resolver` for the unfiltered fallback.
+    """
+    if not cmw_project_id:
+        return None
+    records = _lookup(
+        lambda index: index.project_records(cmw_project_id),
+        lambda record: record_project_id(record) == cmw_project_id,
+    )
+    return _first_alive(records, provider)
@@ -0,0 +1,59 @@
+"""
+Project identity.
+
+`cmw_project_id` tells apart the session records of different projects in
+~/.cmw/run. It is the SHA-256 of the project's normalized work dir: the
+same directory seen from Windows, WSL or MSYS (`C:\\src\\app`, `/mnt/c/src/app`,
+`/c/src/app`) yields the same id, so records written from any of them match.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import posixpath
+import re
+from pathlib import Path
+
+
+def normalize_work_dir(value: str | Path) -> str:
+    """Comparable form of a work dir: absolute, `/`-separated, drive letters lowercased"""
+    s = str(value or "").strip()
+    if not s:
+        return ""
+    if s.startswith("~"):
+        s = os.path.expanduser(s)
+    preview = s.replace("\\", "/")
+    if not (preview.startswith("/") or re.match(r"^[A-Za-z]:/", preview)):
+        s = str(Path.cwd() / s)
+    s = s.replace("\\", "/")
+
+    # WSL /mnt/<drive>/... and (on Windows) MSYS /<drive>/... -> <drive>:/...
+    m = re.match(r"^/mnt/([A-Za-z])(/.*)?$", s)
+    if not m and os.name == "nt":
+        m = re.match(r"^/([A-Za-z])(/.*)?$", s)
+    if m:
+        s = f"{m.group(1)}:{m.group(2) or '/'}"
+
+    if s.startswith("//"):
+        # UNC path: keep the leading double slash
+        s = "//" + posixpath.normpath(s[2:]).lstrip("/")
+    else:
+        s = posixpath.normpath(s)
+    if re.match(r"^[A-Za-z]:", s):
+        s = s[0].lower() + s[1:]
+        if len(s) == 2:
+            s += "/"
+    if os.name == "nt":
+        s = s.lower()
+    return s
+
+
+def compute_cmw_project_id(work_dir: Path) -> str:
+    """Project id of `work_dir`; nested projects keep their own ids"""
+    try:
+        base = Path(work_dir).expanduser().absolute()
+    except (OSError, RuntimeError):
+        base = Path.cwd()
+    norm = normalize_work_dir(base) or str(base)
+    return hashlib.sha256(norm.encode("utf-8", errors="ignore")).hexdigest()
@@ -128,55 +128,19 @@ def is_claude_instance(instance_id: str) -> bool:
 def _auto_load_claude_instances():
     """Automatically load Claude instances from config files"""
     try:
-        import json
         from pathlib import Path
 
-        config_paths = [
-            Path.cwd() / "cmw.config",
-            Path.cwd() / ".cmw_config" / "cmw.config",
-            Path.home() / ".cmw" / "cmw.config",
-        ]
+        from cmw_start_config import load_start_config
 
-        for config_path in config_paths:
-            if not config_path.exists():
-                continue
-
-            try:
-                content = config_path.read_text(encoding="utf-8-sig")
-                if not content.strip():
-                    continue
-                data = json.loads(content)
-            except Exception:
-                continue
-
-            if not isinstance(data, dict):
-                continue
+        config = load_start_config(Path.cwd())
+        if config.path is None or not isinstance(config.data.get("claude"), dict):
+            return
 
-            claude_config = data.get("claude", {})
-            if isinstance(claude_config, bool):
+        for inst in config.claude_config.instances:
+            inst_id = inst.id
+            if not inst_id or inst_id == "default" or inst_id in _CLAUDE_INSTANCES:
                 continue
-            if not isinstance(claude_config, dict):
-                continue
-
-            instances = claude_config.get("instances", [])
-            if not isinstance(instances, list):
-                continue
-
-            for inst in instances:
-                if isinstance(inst, dict):
-                    inst_id = inst.get("id", "")
-                    if not inst_id or inst_id == "default":
-                        continue
-                    if inst_id not in _CLAUDE_INSTANCES:
-                        role = inst.get("role", "")
-                        session_file = inst.get("session_file", "")
-                        register_claude_instance(inst_id, role, session_file)
-                elif isinstance(inst, str):
-                    if inst and inst != "default" and inst not in _CLAUDE_INSTANCES:
-                        register_claude_instance(inst)
-
-            # Only load from first successful config file
-            break
+            register_claude_instance(inst_id, inst.role, inst.session_file)
     except Exception:
         pass  # Silently ignore errors during auto-load
 
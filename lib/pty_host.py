@@ -0,0 +1,520 @@
+"""
+Headless pane host for the `pty` terminal backend.
+
+One host process per user owns every headless pane: each pane is a process
+on a pseudo-terminal allocated here, with an asyncio reader that feeds its
+output into a small screen model and a bounded scrollback ring buffer
+(CMW_PTY_SCROLLBACK lines). Panes therefore outlive the `cmw` run that
+created them, like tmux windows outlive the client.
+
+Clients (`terminal.PtyBackend`) keep one connection to the host's unix
+socket (CMW_PTY_SOCKET, default ~/.cmw/pty/host.sock) and send one JSON
+request per line; every request gets one JSON reply line. Writes go
+straight to the pane's pty fd, so sending to a pane never starts a
+process. The host is started on demand by the first client that needs it
+and exits once it has had no panes for HOST_IDLE_EXIT seconds.
+
+    python lib/pty_host.py list
+    python lib/pty_host.py show PANE_ID [--lines N]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import os
+import re
+import signal
+import struct
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+from terminal import env_float
+
+
+HOST_IDLE_EXIT = 30.0
+KILL_GRACE = 2.0
+# Longest request line (a write carries the whole message).
+REQUEST_LIMIT = 16 * 1024 * 1024
+
+DEFAULT_COLS = 200
+DEFAULT_ROWS = 50
+DEFAULT_SCROLLBACK = 2000
+
+_CSI = re.compile(r"\x1b\[([?<>=]?)([0-9;:]*)[ -/]*([@-~])")
+_OSC = re.compile(r"\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)")
+_TEXT = re.compile(r"[^\x00-\x1f\x7f\x1b]+")
+
+
+def default_socket_path() -> Path:
+    override = os.environ.get("CMW_PTY_SOCKET", "").strip()
+    if override:
+        return Path(override).expanduser()
+    return Path.home() / ".cmw" / "pty" / "host.sock"
+
+
+# ----- screen -----
+
+
+class _Screen:
+    """
+    Just enough of a VT100 to render what a TUI like Claude's leaves on the
+    screen: printable text, cursor movement, erase, scrolling and the
+    alternate screen. Attributes and colors are dropped. Lines scrolled off
+    the top go to `history`, the bounded scrollback.
+    """
+
+    def __init__(self, cols: int, rows: int, scrollback: int):
+        self.cols, self.rows = cols, rows
+        self.grid = [[" "] * cols for _ in range(rows)]
+        self.x = self.y = 0
+        self.history: deque[str] = deque(maxlen=scrollback)
+        self._saved: Optional[tuple[list, int, int]] = None
+        self._pending = ""
+
+    def _blank(self) -> list[str]:
+        return [" "] * self.cols
+
+    def _linefeed(self) -> None:
+        if self.y < self.rows - 1:
+            self.y += 1
+            return
+        if self._saved is None:
+            self.history.append("".join(self.grid[0]).rstrip())
+        self.grid.pop(0)
+        self.grid.append(self._blank())
+
+    def _put(self, text: str) -> None:
+        while text:
+            if self.x >= self.cols:
+                self.x = 0
+                self._linefeed()
+            room = self.cols - self.x
+            chunk, text = text[:room], text[room:]
+            self.grid[self.y][self.x:self.x + len(chunk)] = list(chunk)
+            self.x += len(chunk)
+
+    def _erase_display(self, mode: int) -> None:
+        if mode == 0:
+            self.grid[self.y][self.x:] = [" "] * (self.cols - self.x)
+            for row in range(self.y + 1, self.rows):
+                self.grid[row] = self._blank()
+        elif mode == 1:
+            for row in range(self.y):
+                self.grid[row] = self._blank()
+            self.grid[self.y][: self.x + 1] = [" "] * min(self.cols, self.x + 1)
+        else:
+            self.grid = [self._blank() for _ in range(self.rows)]
+
+    def _erase_line(self, mode: int) -> None:
+        line = self.grid[self.y]
+        if mode == 0:
+            line[self.x:] = [" "] * (self.cols - self.x)
+        elif mode == 1:
+            line[: self.x + 1] = [" "] * min(self.cols, self.x + 1)
+        else:
+            self.grid[self.y] = self._blank()
+
+    def _alternate(self, enter: bool) -> None:
+        if enter and self._saved is None:
+            self._saved = (self.grid, self.x, self.y)
+            self.grid = [self._blank() for _ in range(self.rows)]
+            self.x = self.y = 0
+        elif not enter and self._saved is not None:
+            self.grid, self.x, self.y = self._saved
+            self._saved = None
+
+    def _csi(self, private: str, params: str, final: str) -> None:
+        values = [int(p) if p.isdigit() else 0 for p in params.replace(":", ";").split(";")]
+        n = max(1, values[0])
+        if private == "?":
+            if final in "hl" and {1049, 1047, 47} & set(values):
+                self._alternate(final == "h")
+            return
+        if private:
+            return
+        if final == "A":
+            self.y -= n
+        elif final == "B" or final == "e":
+            self.y += n
+        elif final == "C" or final == "a":
+            self.x += n
+        elif final == "D":
+            self.x -= n
+        elif final == "E":
+            self.y, self.x = self.y + n, 0
+        elif final == "F":
+            self.y, self.x = self.y - n, 0
+        elif final == "G" or final == "`":
+            self.x = n - 1
+        elif final == "d":
+            self.y = n - 1
+        elif final in "Hf":
+            self.y = n - 1
+            self.x = max(1, values[1] if len(values) > 1 else 1) - 1
+        elif final == "J":
+            self._erase_display(values[0])
+        elif final == "K":
+            self._erase_line(values[0])
+        elif final == "P":
+            line = self.grid[self.y]
+            del line[self.x:self.x + n]
+            line.extend([" "] * (self.cols - len(line)))
+        elif final == "@":
+            line = self.grid[self.y]
+            line[self.x:self.x] = [" "] * n
+            del line[self.cols:]
+        elif final == "X":
+            end = min(self.cols, self.x + n)
+            self.grid[self.y][self.x:end] = [" "] * (end - self.x)
+        elif final == "L":
+            for _ in range(min(n, self.rows - self.y)):
+                self.grid.insert(self.y, self._blank())
+                self.grid.pop()
+        elif final == "M":
+            for _ in range(min(n, self.rows - self.y)):
+                self.grid.pop(self.y)
+                self.grid.append(self._blank())
+        elif final == "S":
+            for _ in range(min(n, self.rows)):
+                self.grid.pop(0)
+                self.grid.append(self._blank())
+        elif final == "T":
+            for _ in range(min(n, self.rows)):
+                self.grid.pop()
+                self.grid.insert(0, self._blank())
+        self.x = min(max(self.x, 0), self.cols - 1)
+        self.y = min(max(self.y, 0), self.rows - 1)
+
+    def feed(self, text: str) -> None:
+        text, self._pending = self._pending + text, ""
+        i, n = 0, len(text)
+        while i < n:
+            m = _TEXT.match(text, i)
+            if m:
+                self._put(m.group())
+                i = m.end()
+                continue
+            ch = text[i]
+            if ch == "\x1b":
+                m = _CSI.match(text, i) or _OSC.match(text, i)
+                if m:
+                    if m.re is _CSI:
+                        self._csi(m.group(1), m.group(2), m.group(3))
+                    i = m.end()
+                    continue
+                rest = text[i:]
+                if len(rest) < 2 or (rest[1] in "[]" and len(rest) < 64):
+                    self._pending = rest  # sequence split across reads
+                    return
+                # Two-char escapes (ESC 7, ESC =, ...) and charset selection (ESC ( B).
+                i += 3 if rest[1] in "()*+#" else 2
+                continue
+            if ch == "\r":
+                self.x = 0
+            elif ch == "\n":
+                self._linefeed()
+            elif ch == "\b":
+                self.x = max(0, self.x - 1)
+            elif ch == "\t":
+                self.x = min(self.cols - 1, (self.x // 8 + 1) * 8)
+            i += 1
+
+    def text(self, lines: int = 0) -> str:
+        out = list(self.history) if self._saved is None else []
+        out.extend("".join(row).rstrip() for row in self.grid)
+        while out and not out[-1].strip():
+            out.pop()
+        if lines:
+            out = out[-lines:]
+        return "\n".join(out)
+
+
+# ----- host -----
+
+
+class _Pane:
+    def __init__(self, pane_id: str, proc: subprocess.Popen, fd: int, screen: _Screen, info: dict):
+        self.pane_id = pane_id
+        self.proc = proc
+        self.fd = fd
+        self.screen = screen
+        self.info = info
+        self.outbuf = bytearray()
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+
+def _set_controlling_tty() -> None:
+    # start_new_session made us a session leader; adopt the pty (our stdin).
+    import fcntl
+    import termios
+
+    try:
+        fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+    except OSError:
+        pass
+
+
+class PtyHost:
+    def __init__(self, socket_path: Path):
+        self.socket_path = socket_path
+        self.panes: dict[str, _Pane] = {}
+        self._next_id = 1
+        self._idle_since = time.monotonic()
+        self._stop: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- panes ---
+
+    def spawn(self, argv: list[str], cwd: str, env: dict, name: str, title: str, session: str) -> str:
+        import fcntl
+        import pty
+        import termios
+
+        cols = int(env_float("CMW_PTY_COLS", DEFAULT_COLS)) or DEFAULT_COLS
+        rows = int(env_float("CMW_PTY_ROWS", DEFAULT_ROWS)) or DEFAULT_ROWS
+        scrollback = int(env_float("CMW_PTY_SCROLLBACK", DEFAULT_SCROLLBACK))
+        pane_id = f"pty{self._next_id}"
+        self._next_id += 1
+
+        master, slave = pty.openpty()
+        fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+        env = {**env, "TERM": env.get("TERM") or "xterm-256color", "CMW_PTY_PANE": pane_id}
+        env.pop("TMUX", None)
+        env.pop("TMUX_PANE", None)
+        env.pop("WEZTERM_PANE", None)
+        try:
+            proc = subprocess.Popen(
+                argv,
+                cwd=cwd or None,
+                env=env,
+                stdin=slave,
+                stdout=slave,
+                stderr=slave,
+                start_new_session=True,
+                preexec_fn=_set_controlling_tty,
+            )
+        except OSError:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+        os.set_blocking(master, False)
+        info = {
+            "pane_id": pane_id,
+            "pane_pid": str(proc.pid),
+            "pane_dead": "0",
+            "pane_title": title or name,
+            "pane_name": name,
+            "session": session,
+            "cwd": cwd,
+            "created_at": time.time(),
+        }
+        pane = _Pane(pane_id, proc, master, _Screen(cols, rows, scrollback), info)
+        self.panes[pane_id] = pane
+        self._loop.add_reader(master, self._on_output, pane)
+        return pane_id
+
+    def _on_output(self, pane: _Pane) -> None:
+        try:
+            data = os.read(pane.fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""  # EIO: the last process on the pty is gone
+        if not data:
+            self._close(pane)
+            return
+        pane.screen.feed(pane.decoder.decode(data))
+
+    def write(self, pane: _Pane, data: bytes) -> None:
+        pane.outbuf.extend(data)
+        self._flush(pane)
+
+    def _flush(self, pane: _Pane) -> None:
+        while pane.outbuf:
+            try:
+                written = os.write(pane.fd, pane.outbuf)
+            except BlockingIOError:
+                break
+            except OSError:
+                pane.outbuf.clear()
+                break
+            del pane.outbuf[:written]
+        if pane.outbuf:
+            self._loop.add_writer(pane.fd, self._flush, pane)
+        else:
+            self._loop.remove_writer(pane.fd)
+
+    def _close(self, pane: _Pane) -> None:
+        if self.panes.pop(pane.pane_id, None) is None:
+            return
+        self._loop.remove_reader(pane.fd)
+        self._loop.remove_writer(pane.fd)
+        try:
+            os.close(pane.fd)
+        except OSError:
+            pass
+        if not self.panes:
+            self._idle_since = time.monotonic()
+        self._loop.call_later(KILL_GRACE, self._reap, pane.proc)
+
+    @staticmethod
+    def _reap(proc: subprocess.Popen) -> None:
+        if proc.poll() is None:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            proc.poll()
+
+    def kill(self, pane: _Pane) -> None:
+        try:
+            os.killpg(pane.proc.pid, signal.SIGHUP)
+        except OSError:
+            pass
+        self._close(pane)
+
+    # --- protocol ---
+
+    def handle(self, req: dict) -> dict:
+        op = req.get("op")
+        if op == "spawn":
+            pane_id = self.spawn(
+                [str(a) for a in req["argv"]],
+                str(req.get("cwd") or ""),
+                dict(req.get("env") or os.environ),
+                str(req.get("name") or ""),
+                str(req.get("title") or ""),
+                str(req.get("session") or ""),
+            )
+            return {"ok": True, "pane_id": pane_id}
+        if op == "list":
+            return {"ok": True, "panes": [p.info for p in self.panes.values()]}
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+
+        pane = self.panes.get(str(req.get("pane_id") or ""))
+        if op == "alive":
+            return {"ok": True, "alive": pane is not None}
+        if pane is None:
+            return {"ok": False, "error": "no such pane"}
+        if op == "write":
+            self.write(pane, str(req.get("data") or "").encode("utf-8"))
+            return {"ok": True}
+        if op == "text":
+            return {"ok": True, "text": pane.screen.text(int(req.get("lines") or 0))}
+        if op == "title":
+            pane.info["pane_title"] = str(req.get("title") or "")
+            if req.get("name"):
+                pane.info["pane_name"] = str(req["name"])
+            return {"ok": True}
+        if op == "kill":
+            self.kill(pane)
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = self.handle(json.loads(line))
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # ValueError: a request line over REQUEST_LIMIT; drop the client.
+            pass
+        finally:
+            writer.close()
+
+    async def _watch_idle(self) -> None:
+        while True:
+            await asyncio.sleep(1.0)
+            if not self.panes and time.monotonic() - self._idle_since > HOST_IDLE_EXIT:
+                self._stop.set()
+                return
+
+    async def serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        server = await asyncio.start_unix_server(
+            self._client, path=str(self.socket_path), limit=REQUEST_LIMIT
+        )
+        os.chmod(self.socket_path, 0o600)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            self._loop.add_signal_handler(sig, self._stop.set)
+        watcher = asyncio.create_task(self._watch_idle())
+        async with server:
+            await self._stop.wait()
+        watcher.cancel()
+        for pane in list(self.panes.values()):
+            self.kill(pane)
+
+
+def serve(socket_path: Optional[Path] = None) -> int:
+    """Run the host on `socket_path` unless another host already owns it"""
+    import fcntl
+
+    socket_path = Path(socket_path) if socket_path else default_socket_path()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    os.chmod(socket_path.parent, 0o700)
+    lock = open(f"{socket_path}.lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return 0  # another host is running or starting
+    try:
+        socket_path.unlink(missing_ok=True)
+        asyncio.run(PtyHost(socket_path).serve())
+    finally:
+        socket_path.unlink(missing_ok=True)
+        lock.close()
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless pane host for CMW_TERMINAL=pty")
+    parser.add_argument("--socket", type=Path, default=None)
+    sub = parser.add_subparsers(dest="cmd")
+    sub.add_parser("serve", help="run the host in the foreground")
+    sub.add_parser("list", help="list the host's panes")
+    show = sub.add_parser("show", help="print a pane's screen")
+    show.add_argument("pane_id")
+    show.add_argument("--lines", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "serve":
+        return serve(args.socket)
+
+    from terminal import PtyBackend
+
+    backend = PtyBackend(args.socket)
+    if args.cmd == "show":
+        text = backend.get_text(args.pane_id, lines=args.lines)
+        if text is None:
+            print(f"[!] No pane {args.pane_id}", file=sys.stderr)
+            return 1
+        print(text)
+        return 0
+    for pane in backend.pane_states().values():
+        print(
+            f"{pane['pane_id']}\tpid {pane['pane_pid']}\t{pane.get('session') or '-'}\t"
+            f"{pane.get('pane_title') or ''}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""
+Diff cmw.config against the running team.
+
+`plan_reconcile` compares the configured Claude instances with the tab
+mapping of the last launch and the panes that are actually alive, and says
+what `cmw apply` has to do: spawn instances that were added (or whose pane
+died), kill instances that were removed and retitle instances whose role
+changed. Everything else keeps running untouched.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class ReconcilePlan:
+    spawn: list = field(default_factory=list)  # ClaudeInstanceConfig
+    kill: dict = field(default_factory=dict)  # instance -> tab entry
+    retitle: dict = field(default_factory=dict)  # instance -> new role
+    keep: dict = field(default_factory=dict)  # instance -> tab entry
+    dead: list = field(default_factory=list)  # lowercased ids whose pane is gone
+
+    @property
+    def empty(self) -> bool:
+        return not (self.spawn or self.kill or self.retitle)
+
+    def summary(self) -> list[str]:
+        lines = []
+        for spec in self.spawn:
+            why = "pane gone" if spec.id.lower() in self.dead else "added"
+            lines.append(f"  + spawn   {spec.id} ({spec.role or spec.id}) [{why}]")
+        for inst_id, tab in self.kill.items():
+            lines.append(f"  - kill    {inst_id} (pane {tab.get('pane_id')})")
+        for inst_id, role in self.retitle.items():
+            lines.append(f"  ~ retitle {inst_id} -> {role}")
+        return lines
+
+
+def _pane_alive(tab: dict, live: dict[str, Optional[set[str]]]) -> bool:
+    terminal = tab.get("terminal") or "wezterm"
+    panes = live.get(terminal)
+    # No listing for this terminal: assume alive rather than spawn a duplicate.
+    return panes is None or str(tab.get("pane_id")) in panes
+
+
+def plan_reconcile(
+    instances: list,
+    tabs: dict[str, dict],
+    live: dict[str, Optional[set[str]]],
+    parked: set[str] = frozenset(),
+) -> ReconcilePlan:
+    """
+    `instances` are the configured ClaudeInstanceConfig entries, `tabs` the
+    tab mapping entries by instance and `live` the live pane ids per
+    terminal (None when a terminal's panes could not be listed).
+
+    Instances that are configured but not autostarted are left alone unless
+    they are already running, so lazily started instances survive an apply.
+    `parked` (lowercased ids) were stopped by the supervisor and stay
+    stopped until a message resumes them.
+    """
+    plan = ReconcilePlan()
+    configured = {spec.id.lower(): spec for spec in instances if spec.id}
+    mapped = {inst_id.lower(): (inst_id, tab) for inst_id, tab in tabs.items()}
+
+    for key, (inst_id, tab) in mapped.items():
+        spec = configured.get(key)
+        alive = _pane_alive(tab, live)
+        if spec is None:
+            if alive:
+                plan.kill[inst_id] = tab
+            continue
+        if not alive:
+            plan.dead.append(key)
+            if spec.autostart:
+                plan.spawn.append(spec)
+            continue
+        plan.keep[inst_id] = tab
+        if (tab.get("role") or "") != (spec.role or ""):
+            plan.retitle[inst_id] = spec.role or ""
+
+    for key, spec in configured.items():
+        if key not in mapped and spec.autostart and key not in parked:
+            plan.spawn.append(spec)
+    return plan
@@ -0,0 +1,279 @@
+"""
+Garbage collection for session records in ~/.cmw/run.
+
+Records whose Claude pane no longer exists are moved to `~/.cmw/run/archive/`
+(or deleted), so resolver scans and `registry:project_unfiltered` fallbacks
+stop seeing them. Liveness comes from one pane listing per terminal backend,
+not one query per record. When a backend cannot list panes (e.g. WezTerm is
+not running), its records are left alone unless they are older than the
+max age.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from registry_index import RegistryIndex, default_run_dir, record_keys
+from terminal import env_float
+
+
+ARCHIVE_DIRNAME = "archive"
+STAMP_FILENAME = ".gc-stamp"
+
+DEFAULT_MAX_AGE_DAYS = 7.0
+DEFAULT_INTERVAL_HOURS = 24.0
+
+
+@dataclass
+class GcReport:
+    total: int = 0
+    removed: list[Path] = field(default_factory=list)
+    kept: int = 0
+    unverified: int = 0
+    scan_before_ms: float = 0.0
+    scan_after_ms: float = 0.0
+    archived: bool = True
+    dry_run: bool = False
+
+    def summary(self) -> str:
+        verb = "Would remove" if self.dry_run else ("Archived" if self.archived else "Deleted")
+        lines = [
+            f"{verb} {len(self.removed)} of {self.total} session record(s); "
+            f"{self.kept} live, {self.unverified} unverified (pane listing unavailable)"
+        ]
+        if not self.dry_run:
+            saved = self.scan_before_ms - self.scan_after_ms
+            lines.append(
+                f"Full registry scan: {self.scan_before_ms:.1f}ms -> "
+                f"{self.scan_after_ms:.1f}ms ({saved:.1f}ms saved per unindexed resolve)"
+            )
+        return "\n".join(lines)
+
+
+def _record_files(run_dir: Path) -> list[Path]:
+    return sorted(run_dir.glob("cmw-session-*.json"))
+
+
+def measure_scan(run_dir: Path) -> float:
+    """Milliseconds a glob-and-parse pass over the registry takes."""
+    started = time.perf_counter()
+    for path in _record_files(run_dir):
+        try:
+            json.loads(path.read_text(encoding="utf-8-sig", errors="replace"))
+        except (OSError, ValueError):
+            continue
+    return (time.perf_counter() - started) * 1000
+
+
+def _record_terminal(record: dict) -> str:
+    terminal = str(record.get("terminal") or "").strip().lower()
+    if terminal:
+        return terminal
+    pane_id = record_keys(record)["pane_id"]
+    if pane_id.startswith("%"):
+        return "tmux"
+    return "pty" if pane_id.startswith("pty") else "wezterm"
+
+
+def live_panes(terminals: set[str]) -> dict[str, Optional[set[str]]]:
+    """
+    One pane listing per terminal backend. A backend maps to None when its
+    panes cannot be listed, so its records cannot be judged.
+    """
+    from terminal import PtyBackend, TmuxBackend, WeztermBackend
+
+    out: dict[str, Optional[set[str]]] = {}
+    for terminal in terminals:
+        if terminal == "pty":
+            # The pty host is local: when it is not running, no pty pane exists.
+            try:
+                out[terminal] = set(PtyBackend().pane_states())
+            except Exception:
+                out[terminal] = None
+            continue
+        try:
+            if terminal == "tmux":
+                states = TmuxBackend().pane_states()
+            elif terminal == "wezterm":
+                states = WeztermBackend().pane_states()
+            else:
+                states = {}
+        except Exception:
+            states = {}
+        # An empty listing is indistinguishable from a failed one.
+        out[terminal] = set(states) if states else None
+    return out
+
+
+def _record_age_days(path: Path, record: dict, now: float) -> float:
+    updated = record.get("updated_at")
+    if not isinstance(updated, (int, float)):
+        try:
+            updated = path.stat().st_mtime
+        except OSError:
+            updated = now
+    return max(0.0, now - float(updated)) / 86400
+
+
+def collect_garbage(
+    run_dir: Optional[Path] = None,
+    *,
+    delete: bool = False,
+    dry_run: bool = False,
+    max_age_days: Optional[float] = None,
+) -> GcReport:
+    """
+    Archive (or delete) records of dead panes, unreadable records, and
+    records that cannot be checked and were not updated for `max_age_days`.
+    """
+    run_dir = Path(run_dir) if run_dir else default_run_dir()
+    if max_age_days is None:
+        max_age_days = env_float("CMW_GC_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)
+    report = GcReport(archived=not delete, dry_run=dry_run)
+    if not run_dir.is_dir():
+        return report
+
+    records = []
+    for path in _record_files(run_dir):
+        try:
+            record = json.loads(path.read_text(encoding="utf-8-sig", errors="replace"))
+        except (OSError, ValueError):
+            record = None
+        records.append((path, record if isinstance(record, dict) else None))
+    report.total = len(records)
+    if not dry_run:
+        report.scan_before_ms = measure_scan(run_dir)
+
+    panes = live_panes({_record_terminal(r) for _, r in records if r})
+    now = time.time()
+    doomed: list[Path] = []
+    for path, record in records:
+        if record is None:
+            doomed.append(path)  # unreadable
+            continue
+        too_old = _record_age_days(path, record, now) > max_age_days
+        pane_id = record_keys(record)["pane_id"]
+        live = panes.get(_record_terminal(record))
+        if live is None or not pane_id:
+            if too_old:
+                doomed.append(path)
+            else:
+                report.unverified += 1
+        elif pane_id in live:
+            report.kept += 1
+        else:
+            doomed.append(path)
+
+    report.removed = doomed
+    if dry_run:
+        return report
+
+    archive = run_dir / ARCHIVE_DIRNAME
+    for path in doomed:
+        try:
+            if delete:
+                path.unlink()
+            else:
+                archive.mkdir(exist_ok=True)
+                shutil.move(str(path), str(archive / path.name))
+        except OSError:
+            continue
+    try:
+        RegistryIndex(run_dir).sync(force=True)
+    except Exception:
+        pass
+    report.scan_after_ms = measure_scan(run_dir)
+    _write_stamp(run_dir, now)
+    return report
+
+
+def _write_stamp(run_dir: Path, now: float) -> None:
+    try:
+        (run_dir / STAMP_FILENAME).write_text(str(now), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def gc_due(run_dir: Optional[Path] = None) -> bool:
+    """True if the last collection is older than CMW_GC_INTERVAL_HOURS (0 disables)."""
+    interval = env_float("CMW_GC_INTERVAL_HOURS", DEFAULT_INTERVAL_HOURS)
+    if interval <= 0:
+        return False
+    run_dir = Path(run_dir) if run_dir else default_run_dir()
+    if not run_dir.is_dir():
+        return False
+    try:
+        last = float((run_dir / STAMP_FILENAME).read_text(encoding="utf-8").strip())
+    except (OSError, ValueError):
+        last = 0.0
+    return time.time() - last >= interval * 3600
+
+
+def start_background_gc(run_dir: Optional[Path] = None) -> bool:
+    """
+    Run a collection in a detached process if one is due. Returns True if a
+    collection was started.
+    """
+    if not gc_due(run_dir):
+        return False
+    # Claim the slot first so concurrent launches don't all start one.
+    _write_stamp(Path(run_dir) if run_dir else default_run_dir(), time.time())
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--quiet"]
+    if run_dir:
+        cmd += ["--run-dir", str(run_dir)]
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = getattr(subprocess, "DETACHED_PROCESS", 0) | getattr(
+            subprocess, "CREATE_NEW_PROCESS_GROUP", 0
+        )
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **kwargs,
+        )
+    except OSError:
+        return False
+    return True
+
+
+def gc_main(argv: list[str]) -> int:
+    """`cmw gc [--dry-run] [--delete] [--max-age DAYS] [--run-dir DIR] [--quiet]`"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="cmw gc", description="Remove session records of panes that no longer exist"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    parser.add_argument("--delete", action="store_true", help="delete instead of archiving")
+    parser.add_argument("--max-age", type=float, default=None, metavar="DAYS",
+                        help="also remove records not updated for this many days")
+    parser.add_argument("--run-dir", type=Path, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--quiet", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    report = collect_garbage(
+        args.run_dir, delete=args.delete, dry_run=args.dry_run, max_age_days=args.max_age
+    )
+    if not args.quiet:
+        print(report.summary())
+        if args.dry_run:
+            for path in report.removed:
+                print(f"  {path.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(gc_main(sys.argv[1:]))
@@ -0,0 +1,334 @@
+"""
+Indexed view of the session registry in ~/.cmw/run.
+
+Every `cmw-session-*.json` record is parsed once and stored in a small SQLite
+index (`~/.cmw/run/.registry-index.db`) keyed by project id, session id and
+pane id. Records are only re-parsed when their mtime or size changes. The
+run directory is only re-listed when its own mtime changes (records are
+written by atomic rename) or every CMW_REGISTRY_RESCAN seconds, to catch
+in-place edits.
+
+The JSON files stay the source of truth: the index can be deleted at any
+time and is rebuilt (migrated) from them on next use.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from project_id import compute_cmw_project_id
+from terminal import env_float
+
+
+RECORD_GLOB_PREFIX = "cmw-session-"
+RECORD_SUFFIX = ".json"
+INDEX_FILENAME = ".registry-index.db"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    project_id TEXT,
+    session_id TEXT,
+    claude_session_id TEXT,
+    pane_id TEXT,
+    updated_at INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_project ON records (project_id, updated_at);
+CREATE INDEX IF NOT EXISTS records_session ON records (session_id);
+CREATE INDEX IF NOT EXISTS records_claude_session ON records (claude_session_id);
+CREATE INDEX IF NOT EXISTS records_pane ON records (pane_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_run_dir() -> Path:
+    return Path.home() / ".cmw" / "run"
+
+
+def _claude_provider(record: dict) -> dict:
+    providers = record.get("providers")
+    claude = providers.get("claude") if isinstance(providers, dict) else None
+    return claude if isinstance(claude, dict) else {}
+
+
+def record_keys(record: dict) -> dict:
+    """The lookup keys of one registry record."""
+    claude = _claude_provider(record)
+    return {
+        "session_id": str(
+            record.get("cmw_session_id") or record.get("session_id") or ""
+        ).strip(),
+        "claude_session_id": str(
+            claude.get("claude_session_id") or record.get("claude_session_id") or ""
+        ).strip(),
+        "pane_id": str(claude.get("pane_id") or record.get("claude_pane_id") or "").strip(),
+    }
+
+
+def record_updated_at(record: dict, mtime: float) -> int:
+    value = record.get("updated_at")
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return int(mtime)
+
+
+class RegistryIndex:
+    """
+    SQLite index over the JSON session records of one run directory.
+
+    `project_id_for` computes the project id of records that do not store
+    one (from their `work_dir`, `compute_cmw_project_id` by default); it
+    runs once per record change, not per lookup.
+    """
+
+    def __init__(
+        self,
+        run_dir: Optional[Path] = None,
+        project_id_for: Optional[Callable[[Path], str]] = None,
+    ):
+        self.run_dir = Path(run_dir) if run_dir else default_run_dir()
+        self.path = self.run_dir / INDEX_FILENAME
+        self.project_id_for = project_id_for or compute_cmw_project_id
+        self.rescan_interval = env_float("CMW_REGISTRY_RESCAN", 30.0)
+        self._local = threading.local()
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # New or outdated index: rebuild it from the JSON records.
+                conn.executescript(
+                    "DROP TABLE IF EXISTS records; DROP TABLE IF EXISTS meta;"
+                )
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db().execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _project_id(self, record: dict) -> str:
+        pid = str(record.get("cmw_project_id") or "").strip()
+        if pid:
+            return pid
+        work_dir = str(record.get("work_dir") or "").strip()
+        if not work_dir:
+            return ""
+        try:
+            return self.project_id_for(Path(work_dir)) or ""
+        except Exception:
+            return ""
+
+    def _record_files(self) -> Iterable[os.DirEntry]:
+        try:
+            with os.scandir(self.run_dir) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.startswith(RECORD_GLOB_PREFIX) and name.endswith(RECORD_SUFFIX):
+                        yield entry
+        except OSError:
+            return
+
+    def sync(self, force: bool = False) -> int:
+        """
+        Bring the index up to date with the run directory.
+
+        Returns the number of records (re-)parsed; 0 when nothing changed.
+        """
+        try:
+            dir_mtime = str(self.run_dir.stat().st_mtime_ns)
+        except OSError:
+            return 0
+        db = self._db()
+        now = time.time()
+        last_scan = float(self._meta("scanned_at") or 0)
+        if (
+            not force
+            and self._meta("dir_mtime_ns") == dir_mtime
+            and now - last_scan < self.rescan_interval
+        ):
+            return 0
+
+        known = {
+            row["path"]: (row["mtime_ns"], row["size"])
+            for row in db.execute("SELECT path, mtime_ns, size FROM records")
+        }
+        seen: set[str] = set()
+        parsed = 0
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for entry in self._record_files():
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                seen.add(entry.path)
+                if known.get(entry.path) == (st.st_mtime_ns, st.st_size):
+                    continue
+                try:
+                    with open(entry.path, "r", encoding="utf-8-sig", errors="replace") as f:
+                        record = json.load(f)
+                except (OSError, ValueError):
+                    record = None
+                if not isinstance(record, dict) or not record:
+                    db.execute("DELETE FROM records WHERE path = ?", (entry.path,))
+                    continue
+                keys = record_keys(record)
+                db.execute(
+                    "INSERT OR REPLACE INTO records (path, mtime_ns, size, project_id,"
+                    " session_id, claude_session_id, pane_id, updated_at, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry.path,
+                        st.st_mtime_ns,
+                        st.st_size,
+                        self._project_id(record),
+                        keys["session_id"],
+                        keys["claude_session_id"],
+                        keys["pane_id"],
+                        record_updated_at(record, st.st_mtime),
+                        json.dumps(record, ensure_ascii=False),
+                    ),
+                )
+                parsed += 1
+            for path in set(known) - seen:
+                db.execute("DELETE FROM records WHERE path = ?", (path,))
+            self._set_meta("dir_mtime_ns", dir_mtime)
+            self._set_meta("scanned_at", str(now))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return parsed
+
+    def rebuild(self) -> int:
+        """Drop the index and re-import every JSON record (the migration)."""
+        self._db().execute("DELETE FROM records")
+        return self.sync(force=True)
+
+    def _select(self, column: str, value: str, limit: int = -1) -> list[dict]:
+        value = str(value or "").strip()
+        if not value:
+            return []
+        self.sync()
+        rows = self._db().execute(
+            f"SELECT data FROM records WHERE {column} = ?"
+            " ORDER BY updated_at DESC, mtime_ns DESC LIMIT ?",
+            (value, limit),
+        )
+        out = []
+        for row in rows:
+            try:
+                data = json.loads(row["data"])
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                out.append(data)
+        return out
+
+    def _best(self, column: str, value: str) -> Optional[dict]:
+        found = self._select(column, value, limit=1)
+        return found[0] if found else None
+
+    def best_many(
+        self, column: str, values: Iterable[str], project_id: Optional[str] = None
+    ) -> dict[str, dict]:
+        """
+        Most recently updated record for each of `values` in one query,
+        optionally restricted to one project. Values without a record are
+        left out.
+        """
+        values = sorted({str(v or "").strip() for v in values} - {""})
+        if not values:
+            return {}
+        self.sync()
+        placeholders = ", ".join("?" * len(values))
+        sql = f"SELECT {column} AS key, data FROM records WHERE {column} IN ({placeholders})"
+        params: list = list(values)
+        if project_id is not None:
+            sql += " AND project_id = ?"
+            params.append(project_id)
+        sql += " ORDER BY updated_at DESC, mtime_ns DESC"
+        out: dict[str, dict] = {}
+        for row in self._db().execute(sql, params):
+            if row["key"] in out:
+                continue
+            try:
+                data = json.loads(row["data"])
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                out[row["key"]] = data
+        return out
+
+    def by_project_id(self, project_id: str) -> Optional[dict]:
+        """Most recently updated record of a project."""
+        return self._best("project_id", project_id)
+
+    def project_records(self, project_id: str) -> list[dict]:
+        """Every record of a project, most recently updated first."""
+        return self._select("project_id", project_id)
+
+    def by_session_id(self, session_id: str) -> Optional[dict]:
+        return self._best("session_id", session_id) or self._best(
+            "claude_session_id", session_id
+        )
+
+    def by_pane_id(self, pane_id: str) -> Optional[dict]:
+        return self._best("pane_id", pane_id)
+
+    def records(self) -> list[tuple[Path, dict]]:
+        """Every indexed record as (path, data)."""
+        self.sync()
+        out = []
+        for row in self._db().execute("SELECT path, data FROM records"):
+            try:
+                data = json.loads(row["data"])
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                out.append((Path(row["path"]), data))
+        return out
+
+
+if __name__ == "__main__":
+    # Migrate / rebuild: python lib/registry_index.py [--rebuild] [run_dir]
+    import sys
+
+    args = [a for a in sys.argv[1:] if a != "--rebuild"]
+    index = RegistryIndex(Path(args[0]) if args else None)
+    started = time.perf_counter()
+    if "--rebuild" in sys.argv[1:]:
+        count = index.rebuild()
+    else:
+        count = index.sync(force=True)
+    elapsed = time.perf_counter() - started
+    total = len(index.records())
+    print(f"Indexed {count} changed record(s), {total} total, in {elapsed * 1000:.1f}ms -> {index.path}")
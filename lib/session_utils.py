@@ -0,0 +1,32 @@
+"""
+Where a project keeps its per-instance session files.
+
+Each instance's session file (`.claude-session`, `.claude-<id>-session`)
+lives in the project's `.cmw_config` dir; older setups kept it in the work
+dir itself, which is still read.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+
+PROJECT_CONFIG_DIRNAME = ".cmw_config"
+
+
+def project_config_dir(work_dir: Path) -> Path:
+    return Path(work_dir) / PROJECT_CONFIG_DIRNAME
+
+
+def find_project_session_file(
+    work_dir: Path, session_filename: str = ".claude-session"
+) -> Optional[Path]:
+    """The existing session file of an instance, or None"""
+    for path in (
+        project_config_dir(work_dir) / session_filename,
+        Path(work_dir) / session_filename,
+    ):
+        if path.is_file():
+            return path
+    return None
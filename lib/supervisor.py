@@ -0,0 +1,305 @@
+"""
+`cmw supervise`: a long-running supervisor for one project's team.
+
+Every CMW_SUPERVISE_INTERVAL seconds it looks at the instances in
+`.cmw_config/tab_mapping.json`:
+
+- Instances whose pane is gone, or whose pane no longer runs a Claude
+  process (e.g. a bare shell left after a crash), are restarted with
+  `claude --resume <session>` so they keep their context. Liveness comes
+  from one pane listing per terminal and one process table per pass.
+  Restarts of an instance that keeps dying back off exponentially
+  (CMW_RESTART_BACKOFF_S, doubling up to CMW_RESTART_BACKOFF_MAX_S).
+- Instances idle for longer than their idle timeout are stopped
+  (`ClaudeInstanceSpec.idle_timeout_env`, i.e. `CMW_CLAUDE_<ID>_IDLE_TIMEOUT_S`;
+  `CMW_CLAUDE_IDLE_TIMEOUT_S` covers the default instance and every
+  instance without its own value; 0 never stops). Activity is the last
+  write to the instance's session transcript (every prompt, reply and tool
+  call lands there), its launch, and any pane state other than idle seen by
+  a previous pass. A stopped instance keeps its session id in its state
+  file and is resumed with `claude --resume` by the next message sent to it.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from claude_session_resolver import team_session_ids
+from terminal import env_float
+
+
+DEFAULT_INTERVAL = 10.0
+DEFAULT_RESTART_BACKOFF = 2.0
+DEFAULT_RESTART_BACKOFF_MAX = 300.0
+
+# An instance that stays up this long after a restart starts over at no backoff.
+RESTART_STABLE_SECONDS = 60.0
+
+
+def _log(message: str) -> None:
+    print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+class Supervisor:
+    """Watches one project's instances; `tick` does one pass"""
+
+    def __init__(self, work_dir: Path, interval: Optional[float] = None):
+        self.work_dir = Path(work_dir)
+        self.interval = interval or env_float("CMW_SUPERVISE_INTERVAL", DEFAULT_INTERVAL)
+        self.own_pane = (
+            os.environ.get("WEZTERM_PANE")
+            or os.environ.get("TMUX_PANE")
+            or os.environ.get("CMW_PTY_PANE")
+            or ""
+        ).strip()
+        # Last pass that found an instance busy or waiting on the user.
+        self._busy_at: dict[str, float] = {}
+        # Consecutive restarts, the last restart and the earliest next one.
+        self._restarts: dict[str, int] = {}
+        self._restarted_at: dict[str, float] = {}
+        self._retry_at: dict[str, float] = {}
+
+    # ----- crashes -----
+
+    def backoff(self, restarts: int) -> float:
+        """Seconds to wait before restarting an instance restarted `restarts` times in a row"""
+        if restarts <= 0:
+            return 0.0
+        base = env_float("CMW_RESTART_BACKOFF_S", DEFAULT_RESTART_BACKOFF)
+        cap = env_float("CMW_RESTART_BACKOFF_MAX_S", DEFAULT_RESTART_BACKOFF_MAX)
+        return min(cap, base * 2 ** (restarts - 1))
+
+    def find_crashed(self, tabs: dict[str, dict]) -> dict[str, str]:
+        """Instances whose pane is gone or no longer runs Claude, with the reason"""
+        from instance_lifecycle import _process_table, backend_for, claude_running
+
+        by_terminal: dict[str, list[str]] = {}
+        for inst_id, tab in tabs.items():
+            if str(tab.get("pane_id")) != self.own_pane:
+                by_terminal.setdefault(tab.get("terminal") or "wezterm", []).append(inst_id)
+
+        crashed: dict[str, str] = {}
+        rows = None
+        for terminal, ids in by_terminal.items():
+            try:
+                listing = backend_for(tabs[ids[0]]).pane_states()
+            except Exception:
+                listing = {}
+            authoritative = terminal == "pty" or terminal == "tmux" and shutil.which("tmux")
+            if not listing and not authoritative:
+                # WezTerm not reachable: an empty listing says nothing about the panes.
+                # No tmux server or pty host, on the other hand, means no panes.
+                continue
+            for inst_id in ids:
+                pane = listing.get(str(tabs[inst_id]["pane_id"]))
+                if pane is None:
+                    crashed[inst_id] = "pane gone"
+                    continue
+                if str(pane.get("pane_dead") or "0") == "1":
+                    crashed[inst_id] = "claude exited"
+                    continue
+                if rows is None:
+                    rows = _process_table()
+                if claude_running(pane, rows) is False:
+                    crashed[inst_id] = "claude exited"
+        return crashed
+
+    def _session_ids(self, instance_ids: list[str], tabs: dict[str, dict]) -> dict[str, str]:
+        """Session to resume per instance: the resolver's, else the tab mapping's"""
+        try:
+            resolved = team_session_ids(self.work_dir, instance_ids)
+        except OSError as e:
+            _log(f"Session registry unreadable, resuming the tab mapping's sessions: {e}")
+            resolved = {}
+        return {
+            inst_id: resolved.get(inst_id) or str(tabs[inst_id].get("claude_session_id") or "")
+            for inst_id in instance_ids
+        }
+
+    def restart_crashed(self, tabs: dict[str, dict]) -> dict[str, str]:
+        """Restart crashed instances that are out of backoff; returns all crashed ones"""
+        from instance_lifecycle import restart_instance
+
+        now = time.time()
+        crashed = self.find_crashed(tabs)
+        for inst_id in tabs:
+            stable = now - self._restarted_at.get(inst_id, now) > RESTART_STABLE_SECONDS
+            if stable and inst_id not in crashed:
+                self._restarts.pop(inst_id, None)
+                self._restarted_at.pop(inst_id, None)
+                self._retry_at.pop(inst_id, None)
+        due = [i for i in crashed if self._retry_at.get(i, 0.0) <= now]
+        if not due:
+            return crashed
+        sessions = self._session_ids(due, tabs)
+
+        def _restart(inst_id: str):
+            pane_id = str(tabs[inst_id]["pane_id"])
+            try:
+                return restart_instance(
+                    self.work_dir, inst_id, pane_id, sessions[inst_id], crashed[inst_id]
+                ), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=len(due)) as pool:
+            results = list(pool.map(_restart, due))
+        for inst_id, (tab, error) in zip(due, results):
+            if tab is None and error is None:
+                continue  # stopped, removed or restarted by someone else
+            restarts = self._restarts.get(inst_id, 0) + 1
+            self._restarts[inst_id] = restarts
+            self._restarted_at[inst_id] = time.time()
+            self._retry_at[inst_id] = time.time() + self.backoff(restarts)
+            old = tabs[inst_id]["pane_id"]
+            if error is not None:
+                _log(f"{inst_id}: restart failed ({crashed[inst_id]}, pane {old}): {error}")
+                continue
+            sid = tab.get("claude_session_id") or ""
+            how = f"resumed {sid}" if sid == sessions[inst_id] and sid else "new session"
+            _log(f"{inst_id}: {crashed[inst_id]}, restarted in pane {tab['pane_id']} ({how})")
+        return crashed
+
+    # ----- idle instances -----
+
+    def idle_timeout(self, instance_id: str) -> float:
+        from instance_lifecycle import instance_spec
+
+        spec = instance_spec(self.work_dir, instance_id)
+        team_default = env_float("CMW_CLAUDE_IDLE_TIMEOUT_S", 0.0)
+        return max(0.0, env_float(spec.idle_timeout_env, team_default))
+
+    def last_activity(self, instance_id: str, tab: dict) -> float:
+        from claude_transcript import _session_path_from_id
+
+        times = [self._busy_at.get(instance_id, 0.0)]
+        ready_at = tab.get("ready_at")
+        if isinstance(ready_at, (int, float)):
+            times.append(float(ready_at))
+        else:
+            try:
+                times.append((self.work_dir / ".cmw_config" / "tab_mapping.json").stat().st_mtime)
+            except OSError:
+                times.append(time.time())
+        path = _session_path_from_id(tab.get("claude_session_id") or "", self.work_dir)
+        if path is not None:
+            try:
+                times.append(path.stat().st_mtime)
+            except OSError:
+                pass
+        return max(times)
+
+    def _pending(self) -> set[str]:
+        """Instances with messages still queued in the outbox"""
+        if not (self.work_dir / ".cmw_config" / "outbox.db").exists():
+            return set()
+        try:
+            from outbox import Outbox
+
+            return set(Outbox(self.work_dir).pending_instances())
+        except Exception:
+            return set()
+
+    def reap_idle(self, tabs: dict[str, dict]) -> list[dict]:
+        """Stop instances idle past their timeout; returns their stop records"""
+        from instance_lifecycle import backend_for, stop_instance
+        from instance_state import STATE_DEAD, STATE_IDLE, instance_state
+
+        now = time.time()
+        pending = None
+        stopped = []
+        for inst_id, tab in tabs.items():
+            timeout = self.idle_timeout(inst_id)
+            if timeout <= 0 or str(tab.get("pane_id")) == self.own_pane:
+                continue
+            idle_for = now - self.last_activity(inst_id, tab)
+            if idle_for < timeout:
+                continue
+            if pending is None:
+                pending = self._pending()
+            if inst_id.lower() in pending:
+                continue
+            state = instance_state(backend_for(tab), str(tab["pane_id"]))
+            if state == STATE_DEAD:
+                continue
+            if state != STATE_IDLE:
+                # Busy or waiting on the user without touching the transcript.
+                self._busy_at[inst_id] = now
+                continue
+            try:
+                record = stop_instance(self.work_dir, inst_id, reason="idle")
+            except Exception as e:
+                _log(f"{inst_id}: could not stop: {e}")
+                continue
+            if record is None:
+                continue
+            rss_kb = record.get("rss_kb")
+            freed = f"{rss_kb / 1024:.1f} MB" if rss_kb is not None else "unknown memory"
+            _log(
+                f"{inst_id}: idle for {idle_for / 60:.1f} min (timeout {timeout:g}s), "
+                f"stopped pane {record['pane_id']}, reclaimed {freed}"
+            )
+            self._busy_at.pop(inst_id, None)
+            stopped.append(record)
+        return stopped
+
+    def tick(self) -> None:
+        import run
+
+        tabs = run.read_tab_mapping(self.work_dir)
+        for seen in (self._busy_at, self._restarts, self._restarted_at, self._retry_at):
+            for inst_id in list(seen):
+                if inst_id not in tabs:
+                    seen.pop(inst_id)
+        crashed = self.restart_crashed(tabs)
+        stopped = self.reap_idle({k: v for k, v in tabs.items() if k not in crashed})
+        if len(stopped) > 1:
+            total = sum(r.get("rss_kb") or 0 for r in stopped)
+            _log(f"Reclaimed {total / 1024:.1f} MB from {len(stopped)} idle instance(s)")
+
+    def run(self) -> None:
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                _log(f"Supervisor pass failed: {e}")
+            time.sleep(self.interval)
+
+
+def supervise_main(argv: list[str]) -> int:
+    """`cmw supervise [--once] [--interval SECONDS]`"""
+    import argparse
+
+    from instance_lifecycle import file_lock
+
+    parser = argparse.ArgumentParser(
+        prog="cmw supervise",
+        description="Restart crashed instances and stop idle ones in this project's team",
+    )
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=float, default=None, metavar="SECONDS",
+                        help="seconds between passes (default: CMW_SUPERVISE_INTERVAL or 10)")
+    args = parser.parse_args(argv)
+
+    work_dir = Path.cwd()
+    supervisor = Supervisor(work_dir, args.interval)
+    lock = work_dir / ".cmw_config" / "supervisor.lock"
+    try:
+        with file_lock(lock, timeout=0):
+            if args.once:
+                supervisor.tick()
+                return 0
+            _log(f"Supervising {work_dir} every {supervisor.interval:g}s (Ctrl+C to stop)")
+            supervisor.run()
+    except TimeoutError:
+        print("[!] A supervisor is already running for this project", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+    return 0
@@ -6,14 +6,18 @@ import re
 import shlex
 import shutil
 import subprocess
+import sys
+import threading
 import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
+from queue import Empty, Queue
 from typing import Optional
 
 
-def _env_float(name: str, default: float) -> float:
+def env_float(name: str, default: float) -> float:
+    """A non-negative float from the environment; `default` if unset or invalid"""
     raw = os.environ.get(name)
     if raw is None:
         return default
@@ -232,14 +236,421 @@ class TerminalBackend(ABC):
         parent_pane: Optional[str] = None,
     ) -> str: ...
 
+    @abstractmethod
+    def send_literal(self, pane_id: str, text: str) -> None:
+        """Type text into a pane as-is: no paste mode, no Enter."""
+
+    @abstractmethod
+    def send_enter(self, pane_id: str) -> None:
+        """Submit the pane's current input."""
+
+    def is_alive_many(self, pane_ids: list[str]) -> dict[str, bool]:
+        """Liveness for several panes; backends override this with one listing."""
+        return {str(p): self.is_alive(str(p)) for p in pane_ids}
+
+
+_TMUX_SAFE_ARG = re.compile(r"[A-Za-z0-9_./:%@=,+-]+")
+
+
+def _tmux_quote(arg: str) -> str:
+    """Quote one argument for the tmux command parser (control-mode input)."""
+    arg = str(arg)
+    if _TMUX_SAFE_ARG.fullmatch(arg):
+        return arg
+    out = ['"']
+    for ch in arg:
+        if ch in '\\"$':
+            out.append("\\" + ch)
+        elif ch == "\n":
+            out.append("\\n")
+        elif ch == "\r":
+            out.append("\\r")
+        elif ch == "\t" or ord(ch) >= 0x20 and ch != "\x7f":
+            out.append(ch)
+        else:
+            out.append("\\%03o" % ord(ch))
+    out.append('"')
+    return "".join(out)
+
+
+def _tmux_socket_args() -> list[str]:
+    """`-S <socket>` for the tmux server we are running inside, if any."""
+    raw = (os.environ.get("TMUX") or "").strip()
+    socket_path = raw.split(",", 1)[0] if raw else ""
+    return ["-S", socket_path] if socket_path else []
+
+
+class _TmuxControlClient:
+    """
+    A persistent `tmux -C` control-mode client.
+
+    Commands are written to its stdin one per line and answered, in order, by
+    `%begin ... %end|%error` blocks on stdout, so several commands can be
+    pipelined in one write without spawning a tmux process per operation.
+    """
+
+    def __init__(self, target: Optional[str] = None, timeout: float = 5.0):
+        args = ["tmux", *_tmux_socket_args(), "-C", "attach-session"]
+        if target:
+            args.extend(["-t", target])
+        env = os.environ.copy()
+        # The socket is passed explicitly; without TMUX tmux won't refuse to nest.
+        env.pop("TMUX", None)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._results: Queue = Queue()
+        self._proc = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            **_subprocess_kwargs(),
+        )
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        try:
+            # Don't stream pane output to us; we only want command replies.
+            ok, _ = self.run([["refresh-client", "-f", "no-output"]])[0]
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def _read_loop(self) -> None:
+        block: Optional[list[str]] = None
+        guard = ""
+        from_client = False
+        for raw in self._proc.stdout:
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if block is None:
+                if line.startswith("%begin "):
+                    block = []
+                    guard = line.split(" ", 1)[1]
+                    from_client = guard.rsplit(" ", 1)[-1] == "1"
+                elif line.startswith("%exit"):
+                    break
+                continue
+            if line in (f"%end {guard}", f"%error {guard}"):
+                # Blocks with flags 0 (attach itself, hooks) are not ours.
+                if from_client:
+                    self._results.put((line.startswith("%end"), block))
+                block = None
+                continue
+            block.append(line)
+        self._results.put(None)
+
+    def run(self, commands: list[list[str]]) -> list[tuple[bool, list[str]]]:
+        if not commands:
+            return []
+        payload = "".join(
+            " ".join(_tmux_quote(a) for a in cmd) + "\n" for cmd in commands
+        )
+        with self._lock:
+            if not self.alive:
+                raise RuntimeError("tmux control client exited")
+            try:
+                self._proc.stdin.write(payload.encode("utf-8"))
+                self._proc.stdin.flush()
+            except OSError as e:
+                self.close()
+                raise RuntimeError(f"tmux control client write failed: {e}") from e
+            results = []
+            for _ in commands:
+                try:
+                    item = self._results.get(timeout=self.timeout)
+                except Empty:
+                    item = None
+                if item is None:
+                    self.close()
+                    raise RuntimeError("tmux control client stopped responding")
+                results.append(item)
+            return results
+
+    def close(self) -> None:
+        try:
+            if self._proc.stdin:
+                self._proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            self._proc.terminate()
+            self._proc.wait(timeout=1.0)
+        except Exception:
+            pass
+
+
+class TmuxBackend(TerminalBackend):
+    """
+    tmux backend driven over one shared `tmux -C` control connection.
+
+    Falls back to one `tmux` process per command when control mode is
+    unavailable (no server/session yet, or CMW_TMUX_CONTROL=0).
+    """
+
+    _control: Optional[_TmuxControlClient] = None
+    _control_lock = threading.Lock()
+    _control_retry_at = 0.0
+
+    @classmethod
+    def _control_client(cls) -> Optional[_TmuxControlClient]:
+        if os.environ.get("CMW_TMUX_CONTROL", "1").lower() in {"0", "false", "no", "off"}:
+            return None
+        with cls._control_lock:
+            if cls._control is not None and cls._control.alive:
+                return cls._control
+            cls._control = None
+            if time.monotonic() < cls._control_retry_at:
+                return None
+            target = (os.environ.get("TMUX_PANE") or "").strip() or None
+            try:
+                cls._control = _TmuxControlClient(target)
+            except Exception:
+                # Typically "no sessions"; retry soon or after we create one.
+                cls._control_retry_at = time.monotonic() + 5.0
+                return None
+            return cls._control
+
+    @classmethod
+    def _reset_control_retry(cls) -> None:
+        cls._control_retry_at = 0.0
+
+    def _tmux_run_many(
+        self, commands: list[list[str]], *, check: bool = False
+    ) -> list[subprocess.CompletedProcess]:
+        """Run several tmux commands, pipelined over the control connection."""
+        results: list[subprocess.CompletedProcess] = []
+        client = self._control_client()
+        replies = None
+        if client is not None:
+            try:
+                replies = client.run(commands)
+            except RuntimeError:
+                replies = None
+        if replies is not None:
+            for cmd, (ok, lines) in zip(commands, replies):
+                out = "\n".join(lines) + ("\n" if lines else "")
+                results.append(
+                    subprocess.CompletedProcess(
+                        ["tmux", *cmd],
+                        0 if ok else 1,
+                        stdout=out if ok else "",
+                        stderr="" if ok else out,
+                    )
+                )
+        else:
+            for cmd in commands:
+                results.append(
+                    _run(
+                        ["tmux", *cmd],
+                        capture_output=True,
+                        text=True,
+                        encoding="utf-8",
+                        errors="replace",
+                    )
+                )
+        if any(cmd and cmd[0] == "new-session" for cmd in commands):
+            self._reset_control_retry()
+        if check:
+            for cp in results:
+                if cp.returncode != 0:
+                    raise subprocess.CalledProcessError(
+                        cp.returncode, cp.args, cp.stdout, cp.stderr
+                    )
+        return results
+
+    def _tmux_run(self, args: list[str], *, check: bool = False) -> subprocess.CompletedProcess:
+        """Run one tmux command. Output is always captured."""
+        return self._tmux_run_many([list(args)], check=check)[0]
+
+    def get_current_pane_id(self) -> str:
+        pane = (os.environ.get("TMUX_PANE") or "").strip()
+        if pane.startswith("%") and _inside_tmux():
+            return pane
+        raise RuntimeError("not running inside tmux")
+
+    def send_text(self, pane_id: str, text: str) -> None:
+        sanitized = text.replace("\r", "").strip()
+        if not sanitized:
+            return
+        enter_delay = env_float("CMW_TMUX_ENTER_DELAY", 0.01)
+        if "\n" in sanitized:
+            buffer_name = f"cmw-{os.getpid()}-{threading.get_ident()}"
+            self._tmux_run_many(
+                [
+                    ["set-buffer", "-b", buffer_name, "--", sanitized],
+                    ["paste-buffer", "-p", "-d", "-b", buffer_name, "-t", pane_id],
+                ],
+                check=True,
+            )
+            enter_delay = max(enter_delay, env_float("CMW_TMUX_PASTE_DELAY", 0.1))
+        elif not enter_delay:
+            # Text and Enter pipelined in a single write.
+            self._tmux_run_many(
+                [
+                    ["send-keys", "-t", pane_id, "-l", "--", sanitized],
+                    ["send-keys", "-t", pane_id, "Enter"],
+                ],
+                check=True,
+            )
+            return
+        else:
+            self._tmux_run(["send-keys", "-t", pane_id, "-l", "--", sanitized], check=True)
+        time.sleep(enter_delay)
+        self._tmux_run(["send-keys", "-t", pane_id, "Enter"], check=True)
+
+    def send_literal(self, pane_id: str, text: str) -> None:
+        self._tmux_run(["send-keys", "-t", pane_id, "-l", "--", text], check=True)
+
+    def send_enter(self, pane_id: str) -> None:
+        self._tmux_run(["send-keys", "-t", pane_id, "Enter"], check=True)
+
+    def send_key(self, pane_id: str, key: str) -> bool:
+        key = (key or "").strip()
+        if not key:
+            return False
+        if key.lower() in {"esc", "escape"}:
+            key = "Escape"
+        return self._tmux_run(["send-keys", "-t", pane_id, key]).returncode == 0
+
+    def is_alive(self, pane_id: str) -> bool:
+        pane_id = str(pane_id or "").strip()
+        if not pane_id:
+            return False
+        if not pane_id.startswith("%"):
+            # Legacy callers pass a session name.
+            return self._tmux_run(["has-session", "-t", pane_id]).returncode == 0
+        cp = self._tmux_run(["display-message", "-p", "-t", pane_id, "#{pane_id}"])
+        return cp.returncode == 0 and cp.stdout.strip() == pane_id
+
+    def pane_states(self) -> dict[str, dict]:
+        """All panes of the tmux server from one `list-panes -a`, keyed by pane id."""
+        fields = ("pane_id", "pane_pid", "pane_dead", "pane_current_command", "pane_title")
+        fmt = "\t".join(f"#{{{f}}}" for f in fields)
+        cp = self._tmux_run(["list-panes", "-a", "-F", fmt])
+        if cp.returncode != 0:
+            return {}
+        states: dict[str, dict] = {}
+        for line in cp.stdout.splitlines():
+            values = line.split("\t", len(fields) - 1)
+            if len(values) == len(fields) and values[0].startswith("%"):
+                states[values[0]] = dict(zip(fields, values))
+        return states
+
+    def is_alive_many(self, pane_ids: list[str]) -> dict[str, bool]:
+        states = self.pane_states()
+        return {str(p): str(p) in states for p in pane_ids}
+
+    def get_text(self, pane_id: str, lines: int = 20) -> Optional[str]:
+        cp = self._tmux_run(["capture-pane", "-p", "-J", "-t", pane_id])
+        if cp.returncode != 0:
+            return None
+        text_lines = cp.stdout.rstrip("\n").splitlines()
+        while text_lines and not text_lines[-1].strip():
+            text_lines.pop()
+        if lines:
+            text_lines = text_lines[-lines:]
+        return "\n".join(text_lines)
+
+    def kill_pane(self, pane_id: str) -> None:
+        self._tmux_run(["kill-pane", "-t", pane_id])
+
+    def activate(self, pane_id: str) -> None:
+        self._tmux_run_many(
+            [["select-window", "-t", pane_id], ["select-pane", "-t", pane_id]]
+        )
+
+    def set_pane_title(self, pane_id: str, title: str) -> None:
+        self._tmux_run(["select-pane", "-t", pane_id, "-T", title])
+
+    def split_pane(self, parent_pane: str, direction: str, percent: int) -> str:
+        return self.create_pane(
+            "", "", direction=direction, percent=percent, parent_pane=parent_pane
+        )
+
+    def create_pane(
+        self,
+        cmd: str,
+        cwd: str,
+        direction: str = "right",
+        percent: int = 50,
+        parent_pane: Optional[str] = None,
+    ) -> str:
+        args = ["split-window", "-h" if direction == "right" else "-v"]
+        args.extend(["-l", f"{max(1, min(99, int(percent)))}%"])
+        target = parent_pane or (os.environ.get("TMUX_PANE") or "").strip()
+        if target:
+            args.extend(["-t", target])
+        args.extend(["-c", cwd or "#{pane_current_path}"])
+        args.extend(["-P", "-F", "#{pane_id}"])
+        if cmd:
+            args.append(cmd)
+        cp = self._tmux_run(args)
+        pane_id = cp.stdout.strip()
+        if cp.returncode != 0 or not pane_id.startswith("%"):
+            raise RuntimeError(
+                f"tmux split-window failed:\nCommand: tmux {' '.join(args)}\nStderr: {cp.stderr}"
+            )
+        return pane_id
+
+    def create_window(
+        self, argv: list[str], cwd: str, session: str, name: str = ""
+    ) -> str:
+        """
+        Open `argv` in a new window of `session` (created detached if missing).
+
+        Returns the new pane id. `argv` is exec'd directly, without a shell.
+        """
+        if self._tmux_run(["has-session", "-t", session]).returncode != 0:
+            args = ["new-session", "-d", "-s", session]
+        else:
+            args = ["new-window", "-d", "-t", f"{session}:"]
+        if name:
+            args.extend(["-n", name])
+        args.extend(["-c", cwd, "-P", "-F", "#{pane_id}", *argv])
+        cp = self._tmux_run(args)
+        pane_id = cp.stdout.strip()
+        if cp.returncode != 0 or not pane_id.startswith("%"):
+            raise RuntimeError(
+                f"tmux {args[0]} failed:\nCommand: tmux {' '.join(args)}\nStderr: {cp.stderr}"
+            )
+        return pane_id
+
+
+# Process-wide `wezterm cli list` snapshots, shared by the CLI and mux
+# backends and keyed by the CLI target: {key: (monotonic start, panes)}.
+# The lock guards the dicts only; listings run outside it, and a key's
+# running listing is marked in `_pane_listings`: {key: done event}.
+_pane_snapshots: dict[tuple, tuple[float, list[dict]]] = {}
+_pane_listings: dict[tuple, threading.Event] = {}
+_pane_snapshots_lock = threading.Lock()
+# Bumped by every invalidation, so a listing started before a spawn or kill
+# is not stored as the snapshot once it finishes.
+_pane_generation = 0
+
+
+def invalidate_pane_cache() -> None:
+    """Drop every cached WezTerm pane listing (after a spawn or kill)."""
+    global _pane_generation
+    with _pane_snapshots_lock:
+        _pane_snapshots.clear()
+        _pane_generation += 1
+
 
 class WeztermBackend(TerminalBackend):
     _wezterm_bin: Optional[str] = None
     CMW_TITLE_MARKER = "CMW"
 
-    @classmethod
-    def _cli_base_args(cls) -> list[str]:
-        args = [cls._bin(), "cli"]
+    def __init__(self, wezterm_bin: Optional[str] = None):
+        # A caller that already resolved the binary pins it for this backend.
+        if wezterm_bin:
+            self._wezterm_bin = wezterm_bin
+
+    def _cli_base_args(self) -> list[str]:
+        args = [self._bin(), "cli"]
         wezterm_class = os.environ.get("CODEX_WEZTERM_CLASS") or os.environ.get(
             "WEZTERM_CLASS"
         )
@@ -261,13 +672,41 @@ class WeztermBackend(TerminalBackend):
             args.append("--no-auto-start")
         return args
 
-    @classmethod
-    def _bin(cls) -> str:
-        if cls._wezterm_bin:
-            return cls._wezterm_bin
+    def _bin(self) -> str:
+        if self._wezterm_bin:
+            return self._wezterm_bin
         found = _get_wezterm_bin()
-        cls._wezterm_bin = found or "wezterm"
-        return cls._wezterm_bin
+        WeztermBackend._wezterm_bin = found or "wezterm"
+        return WeztermBackend._wezterm_bin
+
+    def _write_pane(
+        self,
+        pane_id: str,
+        data: bytes,
+        *,
+        paste: bool = False,
+        check: bool = False,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Write raw bytes to a pane via `wezterm cli send-text`.
+
+        `paste=False` adds `--no-paste`. Short single-line text goes in argv;
+        anything else is piped through stdin to avoid length/escaping issues.
+        With `check=True` a failing command raises CalledProcessError.
+        """
+        args = [*self._cli_base_args(), "send-text", "--pane-id", pane_id]
+        if not paste:
+            args.append("--no-paste")
+        kwargs: dict = {"check": check, "timeout": timeout}
+        if not check:
+            kwargs["capture_output"] = True
+        text = data.decode("utf-8", errors="replace")
+        if not paste and len(text) <= 200 and text.isprintable():
+            args.append(text)
+        else:
+            kwargs["input"] = data
+        return _run(args, **kwargs).returncode == 0
 
     def _send_key_cli(self, pane_id: str, key: str) -> bool:
         """
@@ -322,7 +761,7 @@ class WeztermBackend(TerminalBackend):
         """
         # Windows needs longer delay
         default_delay = 0.05 if os.name == "nt" else 0.01
-        enter_delay = _env_float("CMW_WEZTERM_ENTER_DELAY", default_delay)
+        enter_delay = env_float("CMW_WEZTERM_ENTER_DELAY", default_delay)
         if enter_delay:
             time.sleep(enter_delay)
 
@@ -345,23 +784,18 @@ class WeztermBackend(TerminalBackend):
 
             # Fallback: send CR byte; works for shells/readline, but not for all raw-mode TUIs.
             if method in {"auto", "text", "key"}:
-                result = _run(
-                    [
-                        *self._cli_base_args(),
-                        "send-text",
-                        "--pane-id",
-                        pane_id,
-                        "--no-paste",
-                    ],
-                    input=b"\r",
-                    capture_output=True,
-                )
-                if result.returncode == 0:
+                if self._write_pane(pane_id, b"\r"):
                     return
 
             if attempt < max_retries - 1:
                 time.sleep(0.05)
 
+    def send_literal(self, pane_id: str, text: str) -> None:
+        self._write_pane(pane_id, text.encode("utf-8"), check=True)
+
+    def send_enter(self, pane_id: str) -> None:
+        self._write_pane(pane_id, b"\r", check=True)
+
     def send_text(self, pane_id: str, text: str) -> None:
         sanitized = text.replace("\r", "").strip()
         if not sanitized:
@@ -372,48 +806,63 @@ class WeztermBackend(TerminalBackend):
         # Single-line: always avoid paste mode (prevents Codex showing "[Pasted Content ...]").
         # Use argv for short text; stdin for long text to avoid command-line length/escaping issues.
         if not has_newlines:
-            if len(sanitized) <= 200:
-                _run(
-                    [
-                        *self._cli_base_args(),
-                        "send-text",
-                        "--pane-id",
-                        pane_id,
-                        "--no-paste",
-                        sanitized,
-                    ],
-                    check=True,
-                )
-            else:
-                _run(
-                    [
-                        *self._cli_base_args(),
-                        "send-text",
-                        "--pane-id",
-                        pane_id,
-                        "--no-paste",
-                    ],
-                    input=sanitized.encode("utf-8"),
-                    check=True,
-                )
+            self._write_pane(pane_id, sanitized.encode("utf-8"), check=True)
             self._send_enter(pane_id)
             return
 
         # Slow path: multiline or long text -> use paste mode (bracketed paste)
-        _run(
-            [*self._cli_base_args(), "send-text", "--pane-id", pane_id],
-            input=sanitized.encode("utf-8"),
-            check=True,
-        )
+        self._write_pane(pane_id, sanitized.encode("utf-8"), paste=True, check=True)
 
         # Wait for TUI to process bracketed paste content
-        paste_delay = _env_float("CMW_WEZTERM_PASTE_DELAY", 0.1)
+        paste_delay = env_float("CMW_WEZTERM_PASTE_DELAY", 0.1)
         if paste_delay:
             time.sleep(paste_delay)
 
         self._send_enter(pane_id)
 
-    def _list_panes(self) -> list[dict]:
+    def invalidate_pane_cache(self) -> None:
+        global _pane_generation
+        with _pane_snapshots_lock:
+            _pane_snapshots.pop(tuple(self._cli_base_args()), None)
+            _pane_generation += 1
+
+    def _list_panes(self, fresh: bool = False) -> list[dict]:
+        """
+        Pane listing, served from a snapshot younger than CMW_PANE_LIST_TTL.
+
+        Concurrent callers share a single `wezterm cli list` while it runs;
+        a `fresh` caller only shares one started after it asked.
+        """
+        ttl = env_float("CMW_PANE_LIST_TTL", 0.5)
+        key = tuple(self._cli_base_args())
+        asked = time.monotonic()
+        while True:
+            with _pane_snapshots_lock:
+                snap = _pane_snapshots.get(key)
+                if snap and (snap[0] >= asked or (not fresh and asked - snap[0] < ttl)):
+                    return snap[1]
+                running = _pane_listings.get(key)
+                if running is None:
+                    done = threading.Event()
+                    started = time.monotonic()
+                    _pane_listings[key] = done
+                    generation = _pane_generation
+                    break
+            # Wait for the running listing, then re-check its snapshot.
+            running.wait()
+
+        panes = None
+        try:
+            panes = self._list_panes_uncached()
+            return panes
+        finally:
+            with _pane_snapshots_lock:
+                if panes is not None and generation == _pane_generation:
+                    _pane_snapshots[key] = (started, panes)
+                del _pane_listings[key]
+            done.set()
+
+    def _list_panes_uncached(self) -> list[dict]:
         try:
             result = _run(
                 [*self._cli_base_args(), "list", "--format", "json"],
@@ -445,12 +894,27 @@ class WeztermBackend(TerminalBackend):
         return self._pane_id_by_title_marker(panes, marker)
 
     def is_alive(self, pane_id: str) -> bool:
+        return self.is_alive_many([pane_id])[str(pane_id)]
+
+    def pane_states(self) -> dict[str, dict]:
+        """All panes from one (cached) listing, keyed by pane id."""
+        return {
+            str(p.get("pane_id")): p
+            for p in self._list_panes()
+            if p.get("pane_id") is not None
+        }
+
+    def is_alive_many(self, pane_ids: list[str]) -> dict[str, bool]:
         panes = self._list_panes()
-        if not panes:
-            return False
-        if any(str(p.get("pane_id")) == str(pane_id) for p in panes):
-            return True
-        return self._pane_id_by_title_marker(panes, pane_id) is not None
+        known = {str(p.get("pane_id")) for p in panes}
+        return {
+            str(pid): bool(panes)
+            and (
+                str(pid) in known
+                or self._pane_id_by_title_marker(panes, str(pid)) is not None
+            )
+            for pid in pane_ids
+        }
 
     def get_text(self, pane_id: str, lines: int = 20) -> Optional[str]:
         """Get text content from pane (last N lines)."""
@@ -478,19 +942,7 @@ class WeztermBackend(TerminalBackend):
         try:
             if self._send_key_cli(pane_id, key):
                 return True
-            result = _run(
-                [
-                    *self._cli_base_args(),
-                    "send-text",
-                    "--pane-id",
-                    pane_id,
-                    "--no-paste",
-                ],
-                input=key.encode("utf-8"),
-                capture_output=True,
-                timeout=2.0,
-            )
-            return result.returncode == 0
+            return self._write_pane(pane_id, key.encode("utf-8"), timeout=2.0)
         except Exception:
             return False
 
@@ -499,6 +951,7 @@ class WeztermBackend(TerminalBackend):
             [*self._cli_base_args(), "kill-pane", "--pane-id", pane_id],
             stderr=subprocess.DEVNULL,
         )
+        self.invalidate_pane_cache()
 
     def activate(self, pane_id: str) -> None:
         _run([*self._cli_base_args(), "activate-pane", "--pane-id", pane_id])
@@ -588,6 +1041,312 @@ class WeztermBackend(TerminalBackend):
             raise RuntimeError(
                 f"WezTerm split-pane failed:\nCommand: {' '.join(args)}\nStderr: {e.stderr}"
             ) from e
+        finally:
+            self.invalidate_pane_cache()
+
+
+class WeztermMuxBackend(WeztermBackend):
+    """
+    WezTerm backend that keeps one connection to the mux server socket.
+
+    Pane writes, focus and kill go over the persistent connection instead of
+    forking `wezterm cli` each time; list, get-text and spawn/split still use
+    the CLI (see `wezterm_mux`). Anything the mux client cannot do, or
+    any protocol failure, falls back to the CLI implementation; after a
+    failure the connection is dropped and re-established on the next call;
+    after `MAX_MUX_FAILURES` consecutive failures the mux path is disabled.
+    """
+
+    MAX_MUX_FAILURES = 3
+
+    def __init__(self, socket_path: Optional[str] = None):
+        super().__init__()
+        self._mux = _shared_mux_client(socket_path)
+        self._mux_failures = 0
+
+    def _mux_call(self, op: str, pane_id: str, *args) -> bool:
+        if self._mux_failures >= self.MAX_MUX_FAILURES:
+            return False
+        try:
+            pid = int(str(pane_id).strip())
+        except ValueError:
+            return False
+        try:
+            getattr(self._mux, op)(pid, *args)
+        except Exception:
+            self._mux_failures += 1
+            return False
+        self._mux_failures = 0
+        return True
+
+    def _write_pane(
+        self,
+        pane_id: str,
+        data: bytes,
+        *,
+        paste: bool = False,
+        check: bool = False,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        if paste:
+            text = data.decode("utf-8", errors="replace")
+            if self._mux_call("send_paste", pane_id, text):
+                return True
+        elif self._mux_call("write_to_pane", pane_id, data):
+            return True
+        return super()._write_pane(
+            pane_id, data, paste=paste, check=check, timeout=timeout
+        )
+
+    def kill_pane(self, pane_id: str) -> None:
+        if self._mux_call("kill_pane", pane_id):
+            self.invalidate_pane_cache()
+        else:
+            super().kill_pane(pane_id)
+
+    def activate(self, pane_id: str) -> None:
+        if not self._mux_call("set_focused_pane", pane_id):
+            super().activate(pane_id)
+
+
+def _wezterm_transport() -> str:
+    """`CMW_WEZTERM_TRANSPORT`: auto (default), mux or cli."""
+    value = (os.environ.get("CMW_WEZTERM_TRANSPORT") or "auto").strip().lower()
+    return value if value in {"auto", "mux", "cli"} else "auto"
+
+
+# One mux connection per socket path for the whole process, so backends made
+# per message (get_backend_for_session) reuse it instead of reconnecting.
+_mux_clients: dict = {}
+_mux_retry_at: dict[str, float] = {}
+_mux_clients_lock = threading.Lock()
+
+# After a failed connect, `auto` stays on the CLI this long before retrying.
+MUX_RETRY_SECONDS = 5.0
+
+
+def _shared_mux_client(socket_path: Optional[str] = None):
+    from wezterm_mux import MuxClient, default_socket_path
+
+    key = socket_path or default_socket_path() or ""
+    with _mux_clients_lock:
+        client = _mux_clients.get(key)
+        if client is None:
+            client = _mux_clients[key] = MuxClient(key or None)
+        return client
+
+
+def make_wezterm_backend() -> WeztermBackend:
+    """Prefer the persistent mux connection when a mux socket is reachable."""
+    transport = _wezterm_transport()
+    if transport == "cli":
+        return WeztermBackend()
+    from wezterm_mux import MuxError
+
+    backend = WeztermMuxBackend()
+    if backend._mux.connected:
+        return backend
+    key = backend._mux.socket_path or ""
+    if transport == "auto" and time.monotonic() < _mux_retry_at.get(key, 0.0):
+        return WeztermBackend()
+    try:
+        backend._mux.ensure_connected()
+    except MuxError:
+        _mux_retry_at[key] = time.monotonic() + MUX_RETRY_SECONDS
+        if transport == "mux":
+            # Explicitly requested: keep the mux backend, it retries per call.
+            return backend
+        return WeztermBackend()
+    _mux_retry_at.pop(key, None)
+    return backend
+
+
+class _PtyHostClient:
+    """One connection to the pty host; one JSON request and reply per line."""
+
+    def __init__(self, socket_path: Path, timeout: float = 5.0):
+        import socket
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(str(socket_path))
+        except OSError:
+            self._sock.close()
+            raise
+        self._file = self._sock.makefile("rb")
+        self._lock = threading.Lock()
+
+    def call(self, request: dict) -> dict:
+        with self._lock:
+            self._sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError("pty host closed the connection")
+        return json.loads(line)
+
+    def close(self) -> None:
+        try:
+            self._file.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class PtyBackend(TerminalBackend):
+    """
+    Headless backend: panes are processes on pseudo-terminals owned by the
+    pty host (lib/pty_host.py), which is started on demand. Needs no
+    terminal emulator, so teams can run on CI and servers. Every operation
+    is one request over a persistent unix socket connection; no process is
+    started per send.
+    """
+
+    _clients: dict[str, _PtyHostClient] = {}
+    _clients_lock = threading.Lock()
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        from pty_host import default_socket_path
+
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+
+    def _client(self, start: bool) -> Optional[_PtyHostClient]:
+        key = str(self.socket_path)
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is not None:
+                return client
+            try:
+                client = _PtyHostClient(self.socket_path)
+            except OSError:
+                if not start:
+                    return None
+                client = self._start_host()
+            self._clients[key] = client
+            return client
+
+    def _start_host(self) -> _PtyHostClient:
+        host = Path(__file__).resolve().with_name("pty_host.py")
+        subprocess.Popen(
+            [sys.executable, str(host), "--socket", str(self.socket_path), "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + 5.0
+        while True:
+            try:
+                return _PtyHostClient(self.socket_path)
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"pty host did not start on {self.socket_path}")
+                time.sleep(0.05)
+
+    def _call(self, op: str, *, start: bool = False, **fields) -> Optional[dict]:
+        """Reply to `op`, or None when the host is not running (and not started)."""
+        for _ in range(2):
+            client = self._client(start)
+            if client is None:
+                return None
+            try:
+                return client.call({"op": op, **fields})
+            except (OSError, ValueError):
+                # Host restarted or gone: drop the connection and retry once.
+                with self._clients_lock:
+                    self._clients.pop(str(self.socket_path), None)
+                client.close()
+        return None
+
+    def _write(self, pane_id: str, data: str) -> None:
+        reply = self._call("write", pane_id=str(pane_id), data=data)
+        if not reply or not reply.get("ok"):
+            raise RuntimeError(f"pty pane {pane_id} is not available")
+
+    def send_text(self, pane_id: str, text: str) -> None:
+        sanitized = text.replace("\r", "").strip()
+        if not sanitized:
+            return
+        enter_delay = env_float("CMW_PTY_ENTER_DELAY", 0.01)
+        if "\n" in sanitized:
+            sanitized = f"\x1b[200~{sanitized}\x1b[201~"
+            enter_delay = max(enter_delay, env_float("CMW_PTY_PASTE_DELAY", 0.1))
+        self._write(pane_id, sanitized)
+        time.sleep(enter_delay)
+        self._write(pane_id, "\r")
+
+    def send_literal(self, pane_id: str, text: str) -> None:
+        self._write(pane_id, text)
+
+    def send_enter(self, pane_id: str) -> None:
+        self._write(pane_id, "\r")
+
+    _KEYS = {"escape": "\x1b", "esc": "\x1b", "enter": "\r", "tab": "\t",
+             "up": "\x1b[A", "down": "\x1b[B", "right": "\x1b[C", "left": "\x1b[D",
+             "c-c": "\x03", "bspace": "\x7f"}
+
+    def send_key(self, pane_id: str, key: str) -> bool:
+        data = self._KEYS.get((key or "").strip().lower())
+        if data is None:
+            return False
+        reply = self._call("write", pane_id=str(pane_id), data=data)
+        return bool(reply and reply.get("ok"))
+
+    def is_alive(self, pane_id: str) -> bool:
+        reply = self._call("alive", pane_id=str(pane_id))
+        return bool(reply and reply.get("alive"))
+
+    def pane_states(self) -> dict[str, dict]:
+        """All panes of the host from one request, keyed by pane id."""
+        reply = self._call("list")
+        if not reply or not reply.get("ok"):
+            return {}
+        return {str(p["pane_id"]): p for p in reply.get("panes", [])}
+
+    def is_alive_many(self, pane_ids: list[str]) -> dict[str, bool]:
+        states = self.pane_states()
+        return {str(p): str(p) in states for p in pane_ids}
+
+    def get_text(self, pane_id: str, lines: int = 20) -> Optional[str]:
+        reply = self._call("text", pane_id=str(pane_id), lines=lines)
+        if not reply or not reply.get("ok"):
+            return None
+        return reply.get("text", "")
+
+    def kill_pane(self, pane_id: str) -> None:
+        self._call("kill", pane_id=str(pane_id))
+
+    def activate(self, pane_id: str) -> None:
+        pass  # headless: nothing to focus
+
+    def set_pane_title(self, pane_id: str, title: str, name: str = "") -> None:
+        self._call("title", pane_id=str(pane_id), title=title, name=name)
+
+    def create_window(self, argv: list[str], cwd: str, session: str, name: str = "") -> str:
+        """Start `argv` on a new pty. Returns the pane id; raises RuntimeError."""
+        reply = self._call(
+            "spawn",
+            start=True,
+            argv=list(argv),
+            cwd=cwd,
+            env=dict(os.environ),
+            name=name,
+            session=session,
+        )
+        if not reply or not reply.get("ok"):
+            raise RuntimeError(f"pty spawn failed: {(reply or {}).get('error', 'host unavailable')}")
+        return str(reply["pane_id"])
+
+    def create_pane(
+        self,
+        cmd: str,
+        cwd: str,
+        direction: str = "right",
+        percent: int = 50,
+        parent_pane: Optional[str] = None,
+    ) -> str:
+        shell, flag = _default_shell()
+        return self.create_window([shell, flag, cmd], cwd, "")
 
 
 _backend_cache: Optional[TerminalBackend] = None
@@ -668,6 +1427,9 @@ def _inside_wezterm() -> bool:
 
 def detect_terminal() -> Optional[str]:
     # Priority 1: detect *current* terminal session from env vars.
+    # Headless panes set CMW_PTY_PANE and never run inside tmux or WezTerm.
+    if (os.environ.get("CMW_PTY_PANE") or "").strip():
+        return "pty"
     # Check tmux first - it's the "inner" environment when running WezTerm with tmux.
     if _inside_tmux():
         return "tmux"
@@ -706,16 +1468,20 @@ def get_backend(terminal_type: Optional[str] = None) -> Optional[TerminalBackend
         return _backend_cache
     t = terminal_type or detect_terminal()
     if t == "wezterm":
-        _backend_cache = WeztermBackend()
+        _backend_cache = make_wezterm_backend()
     elif t == "tmux":
         _backend_cache = TmuxBackend()
+    elif t == "pty":
+        _backend_cache = PtyBackend()
     return _backend_cache
 
 
 def get_backend_for_session(session_data: dict) -> Optional[TerminalBackend]:
     terminal = session_data.get("terminal", "tmux")
     if terminal == "wezterm":
-        return WeztermBackend()
+        return make_wezterm_backend()
+    if terminal == "pty":
+        return PtyBackend()
     return TmuxBackend()
 
 
@@ -792,7 +1558,6 @@ def create_auto_layout(
                     )
                 cp = backend._tmux_run(
                     ["list-panes", "-t", session_name, "-F", "#{pane_id}"],
-                    capture=True,
                     check=True,
                 )
                 root = (
@@ -0,0 +1,278 @@
+"""
+Warm pool of pre-started Claude panes.
+
+Starting an instance takes seconds: the pane spawn, Claude's boot and the
+MCP server handshake. With `CMW_WARM_POOL=N`, cmw keeps N Claude panes
+started in the project, next to the team and with the team's Claude args,
+but with no instance assigned. Starting an instance (lazy start, a crash
+restart without a session to resume, an instance added by `cmw apply`)
+claims one instead: the pane is retitled and recorded in the tab mapping,
+and the session id it was started with becomes the instance's. The pool is
+then refilled in a detached process.
+
+Warm panes are listed in `.cmw_config/warm_pool.json`. Panes started with
+other Claude args (cmw.config changed) or in another terminal or session
+than the team are never claimed, and are replaced on the next refill.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from instance_lifecycle import _quiet, backend_for, file_lock, spawn_pane, spawn_target
+from terminal import env_float
+
+
+POOL_FILENAME = "warm_pool.json"
+LOCK_FILENAME = "warm_pool.lock"
+REFILL_LOCK_FILENAME = "warm_pool.refill.lock"
+
+WARM_NAME = "warm"
+WARM_TITLE = "cmw warm"
+
+
+def pool_size() -> int:
+    """Warm panes to keep (CMW_WARM_POOL, 0 disables)"""
+    return max(0, int(env_float("CMW_WARM_POOL", 0)))
+
+
+def _args_key(claude_args_list) -> str:
+    return json.dumps(list(claude_args_list))
+
+
+def _config_dir(work_dir: Path) -> Path:
+    return Path(work_dir) / ".cmw_config"
+
+
+def read_pool(work_dir: Path) -> list[dict]:
+    try:
+        with open(_config_dir(work_dir) / POOL_FILENAME, "r", encoding="utf-8") as f:
+            panes = json.load(f).get("panes", [])
+    except (OSError, ValueError, AttributeError):
+        return []
+    return [p for p in panes if isinstance(p, dict) and p.get("pane_id")]
+
+
+def _write_pool(work_dir: Path, panes: list[dict]) -> None:
+    path = _config_dir(work_dir) / POOL_FILENAME
+    path.parent.mkdir(exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"panes": panes}, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _pool_lock(work_dir: Path, timeout: float = 5.0):
+    return file_lock(_config_dir(work_dir) / LOCK_FILENAME, timeout)
+
+
+def _matches(entry: dict, key: str, terminal: str, session: Optional[str]) -> bool:
+    if entry.get("args_key") != key or (entry.get("terminal") or "wezterm") != terminal:
+        return False
+    return terminal != "tmux" or entry.get("tmux_session") == session
+
+
+def _live_panes(entries: list[dict]) -> dict[str, Optional[set[str]]]:
+    """Live pane ids per terminal of `entries`; None when a listing failed"""
+    live: dict[str, Optional[set[str]]] = {}
+    for entry in entries:
+        terminal = entry.get("terminal") or "wezterm"
+        if terminal in live:
+            continue
+        try:
+            states = backend_for(entry).pane_states()
+        except Exception:
+            states = {}
+        live[terminal] = set(states) if states else None
+    return live
+
+
+def _alive(entry: dict, live: dict[str, Optional[set[str]]]) -> bool:
+    panes = live.get(entry.get("terminal") or "wezterm")
+    return panes is not None and str(entry["pane_id"]) in panes
+
+
+def claim(work_dir: Path, spec, claude_args_list) -> Optional[dict]:
+    """
+    Take a warm pane for `spec` (a ClaudeInstanceConfig) if one was started
+    with `claude_args_list`; retitle it and return its tab entry. The
+    caller records it in the tab mapping. None when the pool has no match.
+    """
+    work_dir = Path(work_dir)
+    if pool_size() <= 0 or not (_config_dir(work_dir) / POOL_FILENAME).exists():
+        return None
+    terminal, session, _wezterm_bin = spawn_target(work_dir)
+    key = _args_key(claude_args_list)
+    try:
+        with _pool_lock(work_dir):
+            panes = read_pool(work_dir)
+            candidates = [p for p in panes if _matches(p, key, terminal, session)]
+            if not candidates:
+                return None
+            live = _live_panes(candidates)
+            entry = next((p for p in candidates if _alive(p, live)), None)
+            dead = [p for p in candidates if p is not entry and not _alive(p, live)]
+            _write_pool(work_dir, [p for p in panes if p is not entry and p not in dead])
+    except TimeoutError:
+        return None
+    if entry is None:
+        return None
+
+    import run
+
+    pane_id = str(entry["pane_id"])
+    title = f"{spec.id} - {spec.role}"
+    backend = backend_for(entry)
+    if terminal == "tmux":
+        backend.set_pane_title(pane_id, title)
+        backend._tmux_run(["rename-window", "-t", pane_id, spec.id])
+    elif terminal == "pty":
+        backend.set_pane_title(pane_id, title, spec.id)
+    else:
+        with _quiet():
+            run.set_tab_title(run._find_wezterm_bin(), pane_id, title)
+    tab = {"pane_id": pane_id, "role": spec.role, "terminal": terminal}
+    if terminal == "tmux":
+        tab["tmux_session"] = session
+    tab["claude_session_id"] = entry.get("claude_session_id")
+    tab["ready_at"] = entry.get("ready_at")
+    return tab
+
+
+def _kill(entries: list[dict]) -> None:
+    for entry in entries:
+        try:
+            backend_for(entry).kill_pane(str(entry["pane_id"]))
+        except Exception:
+            continue
+
+
+def refill(work_dir: Path) -> int:
+    """
+    Bring the pool to `pool_size()` matching, live panes: drop dead ones,
+    kill stale or surplus ones and spawn the rest. Returns the number of
+    panes spawned. A refill already running for the project wins.
+    """
+    import run
+    from cmw_start_config import load_start_config
+
+    work_dir = Path(work_dir)
+    try:
+        with file_lock(_config_dir(work_dir) / REFILL_LOCK_FILENAME, timeout=0):
+            claude_args_list = run.claude_args_from_config(load_start_config(work_dir), work_dir)
+            key = _args_key(claude_args_list)
+            terminal, session, _wezterm_bin = spawn_target(work_dir)
+            size = pool_size()
+
+            with _pool_lock(work_dir):
+                panes = read_pool(work_dir)
+                live = _live_panes(panes)
+                good = [p for p in panes if _matches(p, key, terminal, session) and _alive(p, live)]
+                stale = [p for p in panes if p not in good and _alive(p, live)]
+                stale += good[size:]
+                good = good[:size]
+                _write_pool(work_dir, good)
+            _kill(stale)
+
+            missing = size - len(good)
+            if missing <= 0:
+                return 0
+
+            def _spawn(_):
+                try:
+                    entry = spawn_pane(work_dir, WARM_NAME, WARM_TITLE, claude_args_list)
+                except Exception:
+                    return None
+                if entry.get("ready_at") is None:
+                    _kill([entry])
+                    return None
+                entry["args_key"] = key
+                entry["created_at"] = time.time()
+                return entry
+
+            with ThreadPoolExecutor(max_workers=run._launch_workers(missing)) as pool:
+                spawned = [e for e in pool.map(_spawn, range(missing)) if e]
+            with _pool_lock(work_dir):
+                _write_pool(work_dir, read_pool(work_dir) + spawned)
+            return len(spawned)
+    except TimeoutError:
+        return 0
+
+
+def drain(work_dir: Path) -> int:
+    """Kill every warm pane of the project; returns how many were listed"""
+    with _pool_lock(Path(work_dir)):
+        panes = read_pool(work_dir)
+        _write_pool(work_dir, [])
+    _kill(panes)
+    return len(panes)
+
+
+def refill_in_background(work_dir: Path) -> bool:
+    """Refill the pool in a detached process; returns True if one was started"""
+    if pool_size() <= 0:
+        return False
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--fill", "--quiet"]
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = getattr(subprocess, "DETACHED_PROCESS", 0) | getattr(
+            subprocess, "CREATE_NEW_PROCESS_GROUP", 0
+        )
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen(
+            cmd,
+            cwd=str(work_dir),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **kwargs,
+        )
+    except OSError:
+        return False
+    return True
+
+
+def pool_main(argv: list[str]) -> int:
+    """`cmw pool [--fill] [--drain]`"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="cmw pool", description="Show, fill or drain the warm pool of pre-started Claude panes"
+    )
+    parser.add_argument("--fill", action="store_true", help="start panes up to CMW_WARM_POOL")
+    parser.add_argument("--drain", action="store_true", help="kill every warm pane")
+    parser.add_argument("--quiet", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    work_dir = Path.cwd()
+    if args.drain:
+        killed = drain(work_dir)
+        if not args.quiet:
+            print(f"[+] Killed {killed} warm pane(s)")
+        return 0
+    if args.fill:
+        started = time.perf_counter()
+        spawned = refill(work_dir)
+        if not args.quiet:
+            print(f"[+] Started {spawned} warm pane(s) in {time.perf_counter() - started:.1f}s")
+    if not args.quiet:
+        panes = read_pool(work_dir)
+        live = _live_panes(panes)
+        print(f"Warm pool: {len(panes)}/{pool_size()} pane(s) (CMW_WARM_POOL)")
+        for entry in panes:
+            state = "ready" if _alive(entry, live) else "gone"
+            print(f"  {entry.get('terminal', 'wezterm')} pane {entry['pane_id']} [{state}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(pool_main(sys.argv[1:]))
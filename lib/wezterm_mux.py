@@ -0,0 +1,236 @@
+"""
+Minimal client for the WezTerm mux server protocol.
+
+Speaks just enough of the WezTerm codec (leb128-framed, varbincode-encoded
+PDUs) to write to, focus and kill panes over a single long-lived unix socket
+connection. Those requests are answered with a bare UnitResponse.
+
+Listing panes, reading their text and splitting keep going through
+`wezterm cli`: ListPanesResponse, GetLinesResponse and SpawnResponse carry
+serde-encoded pane trees and terminal lines whose layout follows WezTerm's
+internal structs, and frames over the codec's size threshold are
+zstd-compressed, which the standard library cannot decode.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+from typing import Optional
+
+
+PDU_ERROR_RESPONSE = 0
+PDU_WRITE_TO_PANE = 9
+PDU_UNIT_RESPONSE = 10
+PDU_SEND_PASTE = 13
+PDU_GET_CODEC_VERSION = 26
+PDU_GET_CODEC_VERSION_RESPONSE = 27
+PDU_KILL_PANE = 35
+PDU_SET_FOCUSED_PANE = 45
+
+_COMPRESSED_MASK = 1 << 63
+
+
+class MuxError(RuntimeError):
+    pass
+
+
+def encode_uvarint(value: int) -> bytes:
+    out = bytearray()
+    value = int(value)
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def encode_bytes(data: bytes) -> bytes:
+    return encode_uvarint(len(data)) + data
+
+
+def encode_str(text: str) -> bytes:
+    return encode_bytes(text.encode("utf-8"))
+
+
+def decode_uvarint(buf: bytes, offset: int = 0) -> tuple[int, int]:
+    """Decode an unsigned leb128 value; returns (value, new_offset)."""
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(buf):
+            raise MuxError("truncated varint")
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def decode_str(buf: bytes, offset: int = 0) -> tuple[str, int]:
+    length, offset = decode_uvarint(buf, offset)
+    end = offset + length
+    if end > len(buf):
+        raise MuxError("truncated string")
+    return buf[offset:end].decode("utf-8", errors="replace"), end
+
+
+def encode_frame(ident: int, serial: int, payload: bytes) -> bytes:
+    header = encode_uvarint(serial) + encode_uvarint(ident)
+    return encode_uvarint(len(header) + len(payload)) + header + payload
+
+
+def default_socket_path() -> Optional[str]:
+    path = (
+        os.environ.get("CMW_WEZTERM_SOCKET") or os.environ.get("WEZTERM_UNIX_SOCKET")
+    ) or ""
+    path = path.strip()
+    return path or None
+
+
+class MuxClient:
+    """
+    One persistent connection to the WezTerm mux server.
+
+    Calls are serialized with a lock and matched to their response by serial,
+    so a single client can be shared by every thread in the process.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 2.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self.server_version: Optional[str] = None
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._serial = 0
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self) -> None:
+        if self._sock is not None:
+            return
+        family = getattr(socket, "AF_UNIX", None)
+        if family is None or not self.socket_path:
+            raise MuxError("unix socket transport not available")
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise MuxError(f"cannot connect to {self.socket_path}: {e}") from e
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        try:
+            ident, payload, compressed = self._call_locked(PDU_GET_CODEC_VERSION, b"")
+        except Exception:
+            self.close()
+            raise
+        if ident != PDU_GET_CODEC_VERSION_RESPONSE:
+            self.close()
+            raise MuxError(f"unexpected handshake response pdu {ident}")
+        if not compressed:
+            try:
+                _codec, offset = decode_uvarint(payload)
+                self.server_version, _ = decode_str(payload, offset)
+            except MuxError:
+                pass
+
+    def ensure_connected(self) -> None:
+        """Connect unless connected; safe to call from several threads."""
+        with self._lock:
+            self.connect()
+
+    def close(self) -> None:
+        for handle in (self._reader, self._sock):
+            try:
+                if handle is not None:
+                    handle.close()
+            except Exception:
+                pass
+        self._reader = None
+        self._sock = None
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self._reader.read(size)
+        if data is None or len(data) != size:
+            raise MuxError("connection closed by mux server")
+        return data
+
+    def _read_uvarint(self) -> int:
+        value = 0
+        shift = 0
+        while True:
+            byte = self._read_exact(1)[0]
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def _read_frame(self) -> tuple[int, int, bytes, bool]:
+        length = self._read_uvarint()
+        compressed = bool(length & _COMPRESSED_MASK)
+        length &= ~_COMPRESSED_MASK
+        body = self._read_exact(length)
+        serial, offset = decode_uvarint(body)
+        ident, offset = decode_uvarint(body, offset)
+        return serial, ident, body[offset:], compressed
+
+    def _call_locked(self, ident: int, payload: bytes) -> tuple[int, bytes, bool]:
+        if self._sock is None:
+            raise MuxError("not connected")
+        self._serial += 1
+        serial = self._serial
+        try:
+            self._sock.sendall(encode_frame(ident, serial, payload))
+            while True:
+                resp_serial, resp_ident, body, compressed = self._read_frame()
+                # Serial 0 is used for unsolicited notifications; skip them.
+                if resp_serial == serial:
+                    break
+        except (OSError, MuxError):
+            self.close()
+            raise
+        if resp_ident == PDU_ERROR_RESPONSE:
+            reason = "compressed error response"
+            if not compressed:
+                try:
+                    reason, _ = decode_str(body)
+                except MuxError:
+                    reason = "malformed error response"
+            raise MuxError(reason)
+        return resp_ident, body, compressed
+
+    def call(self, ident: int, payload: bytes) -> tuple[int, bytes]:
+        with self._lock:
+            if self._sock is None:
+                self.connect()
+            resp_ident, body, _compressed = self._call_locked(ident, payload)
+            return resp_ident, body
+
+    def _unit_call(self, ident: int, payload: bytes) -> None:
+        resp_ident, _ = self.call(ident, payload)
+        if resp_ident != PDU_UNIT_RESPONSE:
+            raise MuxError(f"unexpected response pdu {resp_ident}")
+
+    def write_to_pane(self, pane_id: int, data: bytes) -> None:
+        """Equivalent of `wezterm cli send-text --no-paste`."""
+        self._unit_call(PDU_WRITE_TO_PANE, encode_uvarint(pane_id) + encode_bytes(data))
+
+    def send_paste(self, pane_id: int, text: str) -> None:
+        """Equivalent of `wezterm cli send-text` (bracketed paste)."""
+        self._unit_call(PDU_SEND_PASTE, encode_uvarint(pane_id) + encode_str(text))
+
+    def kill_pane(self, pane_id: int) -> None:
+        self._unit_call(PDU_KILL_PANE, encode_uvarint(pane_id))
+
+    def set_focused_pane(self, pane_id: int) -> None:
+        self._unit_call(PDU_SET_FOCUSED_PANE, encode_uvarint(pane_id))
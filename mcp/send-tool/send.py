@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-send - Send message directly to Claude instance pane via WezTerm
+send - Send message directly to Claude instance pane via WezTerm (or tmux)
 
 Usage:
     send <instance> <message>
@@ -15,59 +15,682 @@ import sys
 import json
 import subprocess
 import os
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from queue import Empty, Queue
 
 script_dir = Path(__file__).resolve().parent
 project_root = script_dir.parent
+sys.path.insert(0, str(project_root.parent / "lib"))
 
 
-def load_config():
-    """Read tab mapping from .cmw_config/tab_mapping.json"""
-    # Read config from current working directory
-    work_dir = Path.cwd()
+def load_tab_mapping(work_dir=None):
+    """Tab entries from .cmw_config/tab_mapping.json, keyed by instance"""
+    from cmw_start_config import load_routing
 
-    # Read tab mapping file
-    tab_mapping_file = work_dir / ".cmw_config" / "tab_mapping.json"
-    if tab_mapping_file.exists():
+    return load_routing(Path(work_dir or Path.cwd())).tabs
+
+
+def backend_for_tab(tab_data):
+    """Terminal backend for a tab entry (entries without `terminal` are WezTerm)"""
+    from terminal import get_backend_for_session
+
+    session_data = dict(tab_data) if isinstance(tab_data, dict) else {}
+    session_data.setdefault("terminal", "wezterm")
+    return get_backend_for_session(session_data)
+
+
+def wait_for_instance_ready(tab_data, pane_id):
+    """
+    Block until the target Claude instance shows its prompt.
+
+    run.py records `ready_at` once an instance is ready; a null value means
+    the launch-time probe timed out, or was skipped (the pane run.py ran in
+    starts Claude only after run.py exits), so probe the pane before sending.
+    """
+    if not isinstance(tab_data, dict) or tab_data.get("ready_at") is not None:
+        return True
+    if "ready_at" not in tab_data:
+        # Mapping written by an older run.py: nothing to wait on.
+        return True
+    try:
+        from instance_state import wait_for_ready
+        from terminal import env_float
+
+        timeout = env_float("CMW_SEND_READY_TIMEOUT", 10.0)
+        backend = backend_for_tab(tab_data)
+        return wait_for_ready(backend, pane_id, timeout=timeout) is not None
+    except Exception:
+        return True
+
+
+def load_config(work_dir=None):
+    """
+    Instance -> pane id: the tab mapping, or the cmw.config instances in
+    order before the first launch. Parsed once per file change and shared
+    through .cmw_config/config.cache.json.
+    """
+    from cmw_start_config import load_routing
+
+    return load_routing(Path(work_dir or Path.cwd())).panes
+
+
+class SendError(Exception):
+    """Delivery failed; the message is meant for the user"""
+
+    def __init__(self, message, hint=""):
+        super().__init__(message)
+        self.hint = hint
+
+
+class NoReplyError(SendError):
+    """The prompt was delivered but no reply arrived in time"""
+
+
+def wait_for_instance_idle(backend, instance, pane_id, watcher=None):
+    """
+    Hold a delivery until the target instance is idle (bounded by
+    CMW_SEND_IDLE_TIMEOUT; 0 disables the check).
+
+    An instance whose transcript `watcher` follows and shows no open turn is
+    idle without looking at the screen; otherwise the pane text decides.
+
+    Returns (state, seconds waited). Raises SendError if the pane is dead or
+    still showing a permission dialog, since typed text would answer it.
+    """
+    from instance_state import (
+        STATE_AWAITING_PERMISSION,
+        STATE_DEAD,
+        STATE_GENERATING,
+        STATE_IDLE,
+        wait_for_idle,
+    )
+    from terminal import env_float
+
+    timeout = env_float("CMW_SEND_IDLE_TIMEOUT", 30.0)
+    if timeout <= 0:
+        return None, 0.0
+    if watcher is not None:
+        watcher.poll()
+        if watcher.is_busy(instance) is False:
+            return STATE_IDLE, 0.0
+    state, waited = wait_for_idle(backend, pane_id, timeout=timeout)
+    if state == STATE_DEAD:
+        raise SendError(
+            f"{instance} (pane {pane_id}) is not running",
+            hint="Please run 'python run.py' to start instances first",
+        )
+    if state == STATE_AWAITING_PERMISSION:
+        raise SendError(f"{instance} (pane {pane_id}) is waiting for a permission answer")
+    if state == STATE_GENERATING:
+        print(
+            f"Warning: {instance} (pane {pane_id}) still busy after {waited:.0f}s, sending anyway",
+            file=sys.stderr,
+        )
+    return state, waited
+
+
+# Messages longer than this are confirmed on screen before Enter (TUI paste
+# detection can swallow an Enter that arrives while the paste is still landing)
+LONG_MESSAGE_THRESHOLD = 100
+# Fixed delay used when the pane text cannot be captured
+LONG_MESSAGE_DELAY = 2.0
+
+SUBMIT_INPUT_LINES = 6
+
+
+def _submit_settings():
+    from terminal import env_float
+
+    return {
+        "land_timeout": env_float("CMW_SUBMIT_LAND_TIMEOUT", LONG_MESSAGE_DELAY),
+        "clear_timeout": env_float("CMW_SUBMIT_CLEAR_TIMEOUT", 1.0),
+        "retries": max(0, int(env_float("CMW_SUBMIT_RETRIES", 2))),
+        "poll": env_float("CMW_SUBMIT_POLL", 0.03) or 0.03,
+    }
+
+
+def _wait_for(predicate, timeout, poll):
+    """Poll with backoff; returns seconds waited, or None on timeout"""
+    start = time.monotonic()
+    deadline = start + max(0.0, timeout)
+    delay = poll
+    while True:
+        if predicate():
+            return time.monotonic() - start
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 1.5, 0.25)
+
+
+def _submit_confirmed(backend, pane_id, message, timing):
+    """
+    Press Enter once the pasted message shows in the input box, then check
+    the input cleared, re-sending Enter with growing timeouts if it did not.
+    """
+    from instance_state import input_box, input_shows, looks_generating
+
+    settings = _submit_settings()
+
+    def capture():
+        return backend.get_text(pane_id, lines=40)
+
+    def pending(text):
+        # Only the input box counts: the submitted message stays visible in
+        # the transcript above it. Without a recognizable box, the bottom lines.
+        region = input_box(text)
+        if region is None:
+            region = "\n".join((text or "").rstrip().splitlines()[-SUBMIT_INPUT_LINES:])
+        return input_shows(region, message)
+
+    if capture() is None:
+        # No screen access: fall back to the fixed delay.
+        timing["fallback"] = True
+        time.sleep(LONG_MESSAGE_DELAY)
+        backend.send_enter(pane_id)
+        timing["enter_attempts"] = 1
+        return
+
+    timing["landed_s"] = _wait_for(
+        lambda: pending(capture()),
+        settings["land_timeout"],
+        settings["poll"],
+    )
+
+    def cleared():
+        text = capture()
+        return looks_generating(text) or not pending(text)
+
+    clear_timeout = settings["clear_timeout"]
+    for attempt in range(1, settings["retries"] + 2):
+        backend.send_enter(pane_id)
+        timing["enter_attempts"] = attempt
+        waited = _wait_for(cleared, clear_timeout, settings["poll"])
+        if waited is not None:
+            timing["cleared_s"] = waited
+            timing["confirmed"] = True
+            return
+        clear_timeout *= 2
+
+
+def deliver_message(backend, pane_id, message):
+    """
+    Type the message into the pane and submit it.
+
+    Returns a dict of timing data for the submit (see `log_send_timing`).
+    """
+    start = time.monotonic()
+    timing = {"chars": len(message), "enter_attempts": 1}
+    backend.send_literal(pane_id, message)
+    timing["typed_s"] = time.monotonic() - start
+
+    if len(message) > LONG_MESSAGE_THRESHOLD:
+        timing["confirmed"] = False
+        _submit_confirmed(backend, pane_id, message, timing)
+    else:
+        backend.send_enter(pane_id)
+
+    timing["total_s"] = time.monotonic() - start
+    return timing
+
+
+def log_send_timing(work_dir, instance, pane_id, timing):
+    """
+    Append one JSON line per delivery to .cmw_config/send_timing.jsonl so the
+    CMW_SUBMIT_* thresholds can be tuned from real data.
+
+    Disabled with CMW_SEND_TIMING_LOG=0.
+    """
+    if os.environ.get("CMW_SEND_TIMING_LOG", "1").strip().lower() in ("0", "false", "no", "off"):
+        return
+    record = {"ts": round(time.time(), 3), "instance": instance, "pane_id": str(pane_id)}
+    for key, value in timing.items():
+        record[key] = round(value, 4) if isinstance(value, float) else value
+    try:
+        log_dir = Path(work_dir) / ".cmw_config"
+        if not log_dir.is_dir():
+            return
+        with open(log_dir / "send_timing.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+class Router:
+    """
+    Routes instance names to panes and delivers messages.
+
+    The routing table is re-read only when the tab mapping or cmw.config
+    changes and terminal backends are created once, so a long-lived process (the MCP server)
+    keeps both warm between messages. Safe to share between threads.
+    """
+
+    def __init__(self, work_dir=None):
+        self.work_dir = Path(work_dir) if work_dir else Path.cwd()
+        self._tabs = {}
+        self._role_map = {}
+        self._backends = {}
+        self._outbox = None
+        self._watcher = None
+        # (instance, pane_id) -> session id found in the session registry
+        self._registry_sessions = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        from cmw_start_config import load_routing
+
+        # Cached by the loader; only re-parsed when a source file changes.
+        routing = load_routing(self.work_dir)
+        self._tabs = routing.tabs
+        self._role_map = routing.panes
+
+    def resolve(self, instance, start=True):
+        """
+        Return (pane_id, tab_data) for an instance name.
+
+        A configured instance that is not running yet is started when
+        `start` is true; otherwise its pane_id is None.
+        """
+        with self._lock:
+            self._refresh()
+        if not self._role_map:
+            raise SendError("Could not load instance configuration")
+
+        instance = instance.lower()
+        if instance in self._tabs:
+            return self._role_map[instance], self._tabs[instance]
+        if self._startable(instance):
+            if not start:
+                return None, {}
+            tab_data = self.start(instance)
+            return str(tab_data["pane_id"]), tab_data
+        if instance in self._role_map:
+            return self._role_map[instance], {}
+
+        # If instance not in mapping, but c1-c12 format, auto-infer pane_id
+        if instance.startswith("c") and instance[1:].isdigit():
+            instance_num = int(instance[1:])
+            if 1 <= instance_num <= 12:
+                return str(instance_num - 1), {}  # c1 -> pane 0, c2 -> pane 1
+        raise SendError(f"Instance '{instance}' not found")
+
+    def _startable(self, instance):
+        """Configured but not in the mapping of the running team"""
+        from instance_lifecycle import configured_instance, lazy_start_enabled, parked_instances
+
+        if instance in self._tabs or not lazy_start_enabled():
+            return False
+        if configured_instance(self.work_dir, instance) is None:
+            return False
+        # Without a mapping panes are numbered in config order (no launch yet),
+        # unless the whole team was stopped by the supervisor.
+        return bool(self._tabs) or instance in parked_instances(self.work_dir, [instance])
+
+    def start(self, instance):
+        """Start a stopped instance on demand; returns its tab entry"""
+        from instance_lifecycle import start_instance
+
+        print(f"Starting {instance} on demand...", file=sys.stderr)
+        try:
+            tab_data = start_instance(self.work_dir, instance)
+        except Exception as e:
+            raise SendError(
+                f"Could not start {instance}: {e}",
+                hint="Please run 'python run.py' to start instances first",
+            )
+        with self._lock:
+            self._refresh()
+        return tab_data
+
+    def backend(self, tab_data):
+        terminal = (tab_data or {}).get("terminal") or "wezterm"
+        with self._lock:
+            if terminal not in self._backends:
+                self._backends[terminal] = backend_for_tab({"terminal": terminal})
+            return self._backends[terminal]
+
+    def send(self, instance, message):
+        """Deliver a message; returns the confirmation text or raises SendError"""
+        pane_id, tab_data = self.resolve(instance)
+        instance = instance.lower()
+
+        if not wait_for_instance_ready(tab_data, pane_id):
+            print(
+                f"Warning: {instance} (pane {pane_id}) did not report ready, sending anyway",
+                file=sys.stderr,
+            )
+
+        backend = self.backend(tab_data)
+        watcher = self.watcher() if self.session_ids({instance: tab_data}) else None
+        state, idle_wait = wait_for_instance_idle(backend, instance, pane_id, watcher)
+
+        try:
+            timing = deliver_message(backend, pane_id, message)
+        except (subprocess.CalledProcessError, RuntimeError):
+            raise SendError(
+                f"Failed to send to pane {pane_id}",
+                hint="Please run 'python run.py' to start instances first",
+            )
+        except FileNotFoundError:
+            raise SendError(
+                "wezterm command not found, please ensure WezTerm is installed"
+            )
+        timing["state"] = state
+        timing["idle_wait_s"] = idle_wait
+        log_send_timing(self.work_dir, instance, pane_id, timing)
+        return f"Sent to {instance} (pane {pane_id})"
+
+    def outbox(self):
+        from outbox import Outbox
+
+        with self._lock:
+            if self._outbox is None:
+                self._outbox = Outbox(self.work_dir)
+            return self._outbox
+
+    def submit(self, instance, message, msg_id=None, wait=None):
+        """
+        Queue a message in the instance's durable outbox and have it delivered
+        by that instance's single writer.
+
+        With `wait=None` this returns as soon as the message is queued;
+        otherwise it waits up to `wait` seconds for the delivery result.
+        Falls back to a direct `send` when CMW_OUTBOX=0.
+        """
+        from outbox import STATUS_DELIVERED, STATUS_FAILED, outbox_enabled
+
+        if not outbox_enabled():
+            return self.send(instance, message)
+
+        # Unknown instances fail now, not in the queue; stopped ones are
+        # started by the writer, before it delivers.
+        self.resolve(instance, start=False)
+        instance = instance.lower()
+        outbox = self.outbox()
+        try:
+            msg_id, created = outbox.enqueue(instance, message, msg_id)
+        except Exception as e:
+            raise SendError(f"Could not queue message for {instance}: {e}")
+        outbox.kick(instance, self.send)
+        if wait is None:
+            note = "" if created else " (already queued)"
+            return f"Queued for {instance} (id {msg_id}){note}"
+
+        row = outbox.wait(msg_id, wait)
+        if row and row["status"] == STATUS_DELIVERED:
+            return row["result"] or f"Sent to {instance}"
+        if row and row["status"] == STATUS_FAILED:
+            raise SendError(
+                f"Delivery to {instance} failed after {row['attempts']} attempts: {row['last_error']}",
+                hint="Please run 'python run.py' to start instances first",
+            )
+        return f"Queued for {instance} (id {msg_id}), not delivered yet"
+
+    def resume_outbox(self):
+        """Start writers for messages left pending by an earlier process"""
+        from outbox import outbox_enabled
+
+        if not outbox_enabled() or not (self.work_dir / ".cmw_config" / "outbox.db").exists():
+            return
+        outbox = self.outbox()
+        for instance in outbox.pending_instances():
+            outbox.kick(instance, self.send)
+
+    def expand_targets(self, targets, configured=False):
+        """
+        Turn a target spec into a list of instance names.
+
+        `targets` is a list or a comma-separated string whose items are
+        instance ids, role names (every instance with that role) or `*`.
+        With `configured`, instances in cmw.config that are not running
+        (see `stopped_instances`) are included as well.
+        """
+        if isinstance(targets, str):
+            targets = targets.split(",")
+        with self._lock:
+            self._refresh()
+            instances = list(self._role_map)
+            roles = {}
+            for inst_id, tab_data in self._tabs.items():
+                role = str(tab_data.get("role") or "").strip().lower()
+                if role:
+                    roles.setdefault(role, []).append(inst_id)
+        if configured:
+            for inst_id, role in self.stopped_instances().items():
+                instances.append(inst_id)
+                if role:
+                    roles.setdefault(role, []).append(inst_id)
+
+        expanded = []
+        for item in targets:
+            item = str(item).strip().lower()
+            if not item:
+                continue
+            if item == "*":
+                names = instances
+            elif item not in instances and item in roles:
+                names = roles[item]
+            else:
+                names = [item]
+            for name in names:
+                if name not in expanded:
+                    expanded.append(name)
+        return expanded
+
+    def session_ids(self, tabs):
+        """
+        Claude session id per instance of `tabs` (instance -> mapping entry),
+        for the instances that have one.
+
+        The mapping entry's `claude_session_id` wins. Instances started
+        without a pinned id (e.g. with --resume) are resolved together with
+        `team_session_ids`, which finds them by pane in the session registry
+        index; a pane's id is cached once found.
+        """
+        from claude_session_resolver import team_session_ids
+
+        out = {}
+        missing = []
+        for inst_id, tab_data in tabs.items():
+            key = (inst_id, str(tab_data.get("pane_id") or ""))
+            session_id = tab_data.get("claude_session_id") or self._registry_sessions.get(key)
+            if session_id:
+                out[inst_id] = session_id
+            elif tab_data.get("pane_id"):
+                missing.append(inst_id)
+        if missing:
+            try:
+                found = team_session_ids(self.work_dir, missing)
+            except OSError as e:
+                print(f"Warning: session registry unreadable: {e}", file=sys.stderr)
+                found = {}
+            for inst_id, session_id in found.items():
+                self._registry_sessions[(inst_id, str(tabs[inst_id]["pane_id"]))] = session_id
+            out.update(found)
+        return out
+
+    def watcher(self):
+        """
+        Transcript watcher for the project, started on first use; instances
+        with a known session id (see `session_ids`) are registered.
+        """
+        from claude_transcript import TranscriptWatcher
+
+        with self._lock:
+            self._refresh()
+            if self._watcher is None:
+                self._watcher = TranscriptWatcher(self.work_dir, idle_check=self._pane_idle)
+            watcher = self._watcher
+            tabs = dict(self._tabs)
+        # Outside our lock: the watcher calls back into resolve() under its own.
+        unwatched = {i: t for i, t in tabs.items() if watcher.is_busy(i) is None}
+        for inst_id, session_id in self.session_ids(unwatched).items():
+            watcher.watch(inst_id, session_id)
+        watcher.start()
+        return watcher
+
+    def _pane_idle(self, instance, path):
+        """Confirms an inferred turn end from the pane (watcher idle_check)"""
+        from instance_state import STATE_IDLE, instance_state
+
+        if not instance:
+            return False
         try:
-            with open(tab_mapping_file, "r", encoding="utf-8") as f:
-                mapping_data = json.load(f)
-            tabs = mapping_data.get("tabs", {})
-            # Extract pane_id from tabs
-            result = {}
-            for inst_id, tab_data in tabs.items():
-                if isinstance(tab_data, dict) and "pane_id" in tab_data:
-                    result[inst_id.lower()] = tab_data["pane_id"]
-            if result:
-                return result
+            pane_id, tab_data = self.resolve(instance, start=False)
+            if pane_id is None:
+                return False
+            return instance_state(self.backend(tab_data), pane_id) == STATE_IDLE
         except Exception:
-            pass
+            return False
+
+    def ask(self, instance, prompt, timeout=None):
+        """
+        Send `prompt` and block until the instance's reply turn finishes.
+
+        The prompt is tagged with a correlation marker; the transcript watcher
+        reports the turn that starts with it, which also identifies the
+        instance's transcript when its session id is not known. Raises
+        NoReplyError on timeout.
+        """
+        from claude_transcript import TURN_FINISHED, TURN_STARTED
+        from terminal import env_float
+
+        if timeout is None:
+            timeout = env_float("CMW_ASK_TIMEOUT", 300.0)
+        self.resolve(instance, start=False)
+        instance = instance.lower()
+        marker = f"[cmw-ask:{uuid.uuid4().hex[:10]}]"
+        deadline = time.monotonic() + timeout
+
+        watcher = self.watcher()
+        events = Queue()
+        unsubscribe = watcher.subscribe(events.put)
+        try:
+            self.submit(instance, f"{prompt}\n\n{marker}", wait=timeout)
+            path = None
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    event = events.get(timeout=max(0.0, remaining))
+                except Empty:
+                    where = "turn not finished" if path else "no transcript received the prompt"
+                    raise NoReplyError(
+                        f"No reply from {instance} within {timeout:g}s ({where})"
+                    )
+                if path is None:
+                    if event.kind == TURN_STARTED and marker in event.prompt:
+                        path = event.path
+                        watcher.assign(path, instance)
+                elif event.path == path and event.kind == TURN_FINISHED:
+                    return event.text
+        finally:
+            unsubscribe()
 
-    # Fallback: read sequential mapping from cmw.config
-    config_paths = [
-        work_dir / "cmw.config",
-        work_dir / ".cmw_config" / "cmw.config",
-        Path.home() / ".cmw" / "cmw.config",
-    ]
+    def stopped_instances(self):
+        """
+        Instances of cmw.config that are not in the routing table, i.e. not
+        running: never started (`autostart: false`) or stopped when idle.
+        Returns {instance: role}, in config order.
+        """
+        from cmw_start_config import load_start_config
 
-    for config_file in config_paths:
-        if config_file.exists():
+        with self._lock:
+            self._refresh()
+            known = set(self._role_map)
+        stopped = {}
+        for spec in load_start_config(self.work_dir).claude_config.instances or []:
+            inst_id = (spec.id or "").strip().lower()
+            if inst_id and inst_id not in known:
+                stopped[inst_id] = (spec.role or "").strip().lower()
+        return stopped
+
+    def states(self, targets="*"):
+        """
+        Classify each target instance (idle, generating, ...) in parallel.
+        Configured instances that are not running are reported as stopped.
+        """
+        from instance_state import STATE_STOPPED, STATE_UNKNOWN, instance_state
+
+        names = self.expand_targets(targets, configured=True)
+        stopped = self.stopped_instances()
+
+        def probe(name):
+            if name in stopped:
+                return STATE_STOPPED
             try:
-                with open(config_file, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                instances = config.get("claude", {}).get("instances", [])
-                role_map = {}
-                for idx, inst in enumerate(instances):
-                    role_id = inst.get("id", "")
-                    if role_id:
-                        role_map[role_id.lower()] = str(idx)
-                if role_map:
-                    return role_map
+                pane_id, tab_data = self.resolve(name, start=False)
+                if pane_id is None:
+                    return STATE_STOPPED
+                return instance_state(self.backend(tab_data), pane_id)
             except Exception:
-                continue
+                return STATE_UNKNOWN
+
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(names), 32)) as pool:
+            return dict(zip(names, pool.map(probe, names)))
+
+    def broadcast(self, targets, message):
+        """
+        Deliver one message to several instances concurrently.
+
+        Returns one dict per target: instance, ok, detail and latency_ms.
+        """
+        names = self.expand_targets(targets)
+        if not names:
+            raise SendError(f"No instances match '{targets}'")
+
+        from terminal import env_float
+
+        wait = env_float("CMW_SEND_QUEUE_WAIT", 30.0)
+
+        def deliver(name):
+            start = time.monotonic()
+            try:
+                detail, ok = self.submit(name, message, wait=wait), True
+            except SendError as e:
+                detail, ok = str(e), False
+            except Exception as e:
+                detail, ok = f"Error: {e}", False
+            return {
+                "instance": name,
+                "ok": ok,
+                "detail": detail,
+                "latency_ms": round((time.monotonic() - start) * 1000, 1),
+            }
+
+        workers = int(env_float("CMW_BROADCAST_WORKERS", 0)) or len(names)
+        workers = max(1, min(workers, len(names), 32))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cmw-send") as pool:
+            return list(pool.map(deliver, names))
+
+
+def format_state_table(states):
+    """Render {instance: state} as a plain-text table"""
+    width = max([len("instance")] + [len(name) for name in states])
+    lines = [f"{'instance'.ljust(width)}  state"]
+    for name, state in states.items():
+        lines.append(f"{name.ljust(width)}  {state}")
+    return "\n".join(lines)
+
 
-    return {}
+def format_broadcast_table(results):
+    """Render broadcast results as a plain-text status table"""
+    width = max([len("instance")] + [len(r["instance"]) for r in results])
+    lines = [f"{'instance'.ljust(width)}  status  latency_ms  detail"]
+    for r in results:
+        status = "ok" if r["ok"] else "FAILED"
+        lines.append(
+            f"{r['instance'].ljust(width)}  {status.ljust(6)}  {r['latency_ms']:>10.1f}  {r['detail']}"
+        )
+    sent = sum(1 for r in results if r["ok"])
+    lines.append(f"{sent}/{len(results)} delivered")
+    return "\n".join(lines)
 
 
 def main():
@@ -75,12 +698,29 @@ def main():
     if len(sys.argv) < 2:
         print("Usage: send <instance> [message]", file=sys.stderr)
         print("       send <instance> --file <path>", file=sys.stderr)
+        print("       send --broadcast <targets> [message]", file=sys.stderr)
+        print("       send --ask <instance> [--timeout <sec>] [message]", file=sys.stderr)
+        print("       send --state [targets]", file=sys.stderr)
         print("Examples:", file=sys.stderr)
         print("  send c1 'continue'", file=sys.stderr)
         print("  send c2 'Implement this feature'", file=sys.stderr)
         print("  send c1 --file message.txt", file=sys.stderr)
+        print("  send --broadcast ui,coder 'Sync on the API'", file=sys.stderr)
+        print("  send --broadcast '*' 'Stop and commit your work'", file=sys.stderr)
         return 1
 
+    if sys.argv[1] in ("--broadcast", "-b"):
+        return broadcast_main(sys.argv[2:])
+    if sys.argv[1] == "--ask":
+        return ask_main(sys.argv[2:])
+    if sys.argv[1] == "--state":
+        states = Router().states(sys.argv[2] if len(sys.argv) > 2 else "*")
+        if not states:
+            print("Error: No instances found", file=sys.stderr)
+            return 1
+        print(format_state_table(states))
+        return 0
+
     instance = sys.argv[1].lower()
 
     # Check for base64-encoded message (from MCP server)
@@ -113,86 +753,92 @@ def main():
             print("Error: No message provided", file=sys.stderr)
             return 1
 
-    role_map = load_config()
+    try:
+        from terminal import env_float
 
-    if not role_map:
-        print("Error: Could not load instance configuration", file=sys.stderr)
+        wait = env_float("CMW_SEND_QUEUE_WAIT", 30.0)
+        router = Router()
+        print(router.submit(instance, message, wait=wait))
+        # Let this process's writer finish anything else it picked up, rather
+        # than dying mid-message when the interpreter exits.
+        router.outbox().join(wait)
+        return 0
+    except SendError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if e.hint:
+            print(f"Hint: {e.hint}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
         return 1
 
-    # If instance not in mapping, but c1-c12 format, auto-infer pane_id
-    if instance not in role_map:
-        # Check if it's c1, c2, c3... format
-        if instance.startswith("c") and instance[1:].isdigit():
-            instance_num = int(instance[1:])
-            if 1 <= instance_num <= 12:
-                pane_id = str(instance_num - 1)  # c1 -> pane 0, c2 -> pane 1
-            else:
-                print(f"Error: Instance '{instance}' not found", file=sys.stderr)
-                return 1
-        else:
-            print(f"Error: Instance '{instance}' not found", file=sys.stderr)
+
+def broadcast_main(args):
+    """`send --broadcast <targets> [message | --file <path>]`"""
+    if not args:
+        print("Error: No targets provided", file=sys.stderr)
+        return 1
+    targets = args[0]
+    if len(args) >= 3 and args[1] == "--file":
+        try:
+            with open(args[2], "rb") as f:
+                message = f.read().decode("utf-8", errors="replace").strip()
+        except Exception as e:
+            print(f"Error: Could not read file {args[2]}: {e}", file=sys.stderr)
             return 1
+    elif len(args) >= 2:
+        message = " ".join(args[1:])
     else:
-        pane_id = role_map[instance]
+        message = sys.stdin.read().strip()
+    if not message:
+        print("Error: No message provided", file=sys.stderr)
+        return 1
 
+    router = Router()
     try:
-        # Send message to WezTerm pane
-        subprocess.run(
-            [
-                "wezterm",
-                "cli",
-                "send-text",
-                "--pane-id",
-                pane_id,
-                "--no-paste",
-                message,
-            ],
-            check=True,
-            capture_output=True,
-        )
+        results = router.broadcast(targets, message)
+    except SendError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    router.outbox().join(30.0)
+    print(format_broadcast_table(results))
+    return 0 if all(r["ok"] for r in results) else 1
 
-        # For long messages, wait and send empty string to trigger submission
-        if len(message) > 100:
-            time.sleep(2.0)
-            subprocess.run(
-                [
-                    "wezterm",
-                    "cli",
-                    "send-text",
-                    "--pane-id",
-                    pane_id,
-                    "--no-paste",
-                    "",
-                ],
-                check=True,
-                capture_output=True,
-            )
 
-        # Send enter
-        subprocess.run(
-            ["wezterm", "cli", "send-text", "--pane-id", pane_id, "--no-paste"],
-            input=b"\r",
-            check=True,
-            capture_output=True,
-        )
-        print(f"Sent to {instance} (pane {pane_id})")
-        return 0
-    except subprocess.CalledProcessError:
-        print(f"Error: Failed to send to pane {pane_id}", file=sys.stderr)
-        print(
-            f"Hint: Please run 'python run.py' to start instances first",
-            file=sys.stderr,
-        )
-        return 1
-    except FileNotFoundError:
-        print(
-            f"Error: wezterm command not found, please ensure WezTerm is installed",
-            file=sys.stderr,
-        )
-        return 1
-    except Exception as e:
+def ask_main(args):
+    """`send --ask <instance> [--timeout <sec>] [message]`; prints the reply"""
+    from cli_output import EXIT_ERROR, EXIT_NO_REPLY, EXIT_OK
+
+    timeout = None
+    if len(args) >= 3 and args[1] == "--timeout":
+        try:
+            timeout = float(args[2])
+        except ValueError:
+            print(f"Error: Invalid timeout: {args[2]}", file=sys.stderr)
+            return EXIT_ERROR
+        args = [args[0]] + args[3:]
+    if not args:
+        print("Error: No instance provided", file=sys.stderr)
+        return EXIT_ERROR
+    message = " ".join(args[1:]).strip() or sys.stdin.read().strip()
+    if not message:
+        print("Error: No message provided", file=sys.stderr)
+        return EXIT_ERROR
+
+    router = Router()
+    try:
+        print(router.ask(args[0], message, timeout=timeout))
+        return EXIT_OK
+    except NoReplyError as e:
         print(f"Error: {e}", file=sys.stderr)
-        return 1
+        return EXIT_NO_REPLY
+    except SendError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if e.hint:
+            print(f"Hint: {e.hint}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        router.outbox().join(5.0)
 
 
 if __name__ == "__main__":
@@ -1,18 +1,68 @@
 ﻿#!/usr/bin/env python3
 """
 MCP Server for Claude instance communication
-Provides send_message tool to send messages between Claude instances
+Provides send_message and broadcast_message tools to send messages between
+Claude instances, ask_instance to wait for an instance's reply, and
+instance_status to see which of them are busy
 """
 
+import os
 import sys
 import json
 import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional
 
 # Get the send script from the same directory as this server
 server_dir = Path(__file__).resolve().parent
 send_script = server_dir / "send.py"
+sys.path.insert(0, str(server_dir))
+
+# Deliver through a `python send.py` subprocess instead of in-process
+SUBPROCESS_SEND = os.environ.get("CMW_MCP_SUBPROCESS_SEND", "0").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+
+# Router (mapping + terminal backends) kept warm for the life of the server
+_router = None
+# Tool calls run on dispatcher threads; only one of them builds the router
+_router_lock = threading.Lock()
+
+
+def _get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                from send import Router
+
+                router = Router()
+                try:
+                    router.resume_outbox()
+                except Exception:
+                    pass
+                _router = router
+    return _router
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, "") or default))
+    except ValueError:
+        return default
+
+
+# Max tool calls queued or running at once; 1 restores strictly serial handling
+MAX_INFLIGHT = _env_int("CMW_MCP_MAX_INFLIGHT", 8)
+
+# Seconds to keep delivering queued messages after stdin closes
+OUTBOX_EXIT_WAIT = _env_int("CMW_MCP_OUTBOX_EXIT_WAIT", 10)
 
 PROTOCOL_VERSION = "2024-11-05"
 SERVER_INFO = {"name": "send-tool", "version": "1.0.2"}
@@ -20,7 +70,7 @@ SERVER_INFO = {"name": "send-tool", "version": "1.0.2"}
 TOOL_DEFS = [
     {
         "name": "send_message",
-        "description": "Send a message to another Claude instance and automatically execute it (press Enter). Simply provide the message parameter with any text (ASCII or non-ASCII, Chinese, emoji, etc. are all supported). The server will handle encoding automatically.",
+        "description": "Send a message to another Claude instance and automatically execute it (press Enter). Simply provide the message parameter with any text (ASCII or non-ASCII, Chinese, emoji, etc. are all supported). The server will handle encoding automatically. The message is queued durably and delivered in order; the call returns once it is queued.",
         "inputSchema": {
             "type": "object",
             "properties": {
@@ -32,17 +82,85 @@ TOOL_DEFS = [
                     "type": "string",
                     "description": "Message content to send. Supports any characters including Chinese, emoji, etc.",
                 },
+                "message_id": {
+                    "type": "string",
+                    "description": "Optional id for this message. Retrying with the same id does not send it twice.",
+                },
+            },
+            "required": ["instance", "message"],
+        },
+    },
+    {
+        "name": "broadcast_message",
+        "description": "Send the same message to several Claude instances at once and press Enter in each. Targets are delivered concurrently; the result lists the status and latency for every target.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "targets": {
+                    "oneOf": [
+                        {"type": "array", "items": {"type": "string"}},
+                        {"type": "string"},
+                    ],
+                    "description": "Instance IDs, role names (every instance with that role) or '*' for all instances. A comma-separated string is also accepted.",
+                },
+                "message": {
+                    "type": "string",
+                    "description": "Message content to send. Supports any characters including Chinese, emoji, etc.",
+                },
+            },
+            "required": ["targets", "message"],
+        },
+    },
+    {
+        "name": "ask_instance",
+        "description": "Send a prompt to another Claude instance and wait for its answer. Returns the text of the instance's reply turn, so no separate send back is needed. Fails if no reply arrives within the timeout.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "instance": {
+                    "type": "string",
+                    "description": "Target instance ID (e.g., 'ui', 'coder', 'test', 'default')",
+                },
+                "message": {
+                    "type": "string",
+                    "description": "Prompt to send. Supports any characters including Chinese, emoji, etc.",
+                },
+                "timeout": {
+                    "type": "number",
+                    "description": "Seconds to wait for the reply (default 300)",
+                },
             },
             "required": ["instance", "message"],
         },
-    }
+    },
+    {
+        "name": "instance_status",
+        "description": "Report whether Claude instances are idle, generating, awaiting a permission answer, or dead. Messages to busy instances are held until they are idle.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "targets": {
+                    "type": "string",
+                    "description": "Instance IDs or role names, comma-separated; defaults to '*' (all instances)",
+                },
+            },
+        },
+    },
 ]
 
 
+_stdout_lock = threading.Lock()
+# Bound once: library code may redirect sys.stdout (e.g. while spawning an
+# instance on demand) and must never write into the JSON-RPC stream.
+_rpc_out = sys.stdout
+
+
 def _send(obj: dict[str, Any]) -> None:
     """Send JSON-RPC response to stdout"""
-    sys.stdout.write(json.dumps(obj, ensure_ascii=True) + "\n")
-    sys.stdout.flush()
+    line = json.dumps(obj, ensure_ascii=True) + "\n"
+    with _stdout_lock:
+        _rpc_out.write(line)
+        _rpc_out.flush()
 
 
 def _rpc_result(req_id: Any, result: dict[str, Any]) -> None:
@@ -83,6 +201,21 @@ def _fix_encoding(text: str) -> str:
         return text
 
 
+def _send_in_process(
+    instance: str, message: str, msg_id: Optional[str] = None
+) -> dict[str, Any]:
+    """Queue through the warm router, without spawning any interpreter"""
+    from send import SendError
+
+    try:
+        result = _get_router().submit(instance, message, msg_id=msg_id)
+    except SendError as e:
+        return _tool_error(f"Error: {e}")
+    except Exception as e:
+        return _tool_error(f"Error: {str(e)}")
+    return _tool_ok(f"Message to {instance}: {result}")
+
+
 def _handle_send_message(args: dict[str, Any]) -> dict[str, Any]:
     """Handle send_message tool call"""
     instance = str(args.get("instance", "")).strip()
@@ -96,14 +229,16 @@ def _handle_send_message(args: dict[str, Any]) -> dict[str, Any]:
         fixed_message = _fix_encoding(message)
 
         # Debug: write what we received to a log file
-        import os
-
         debug_log = Path(__file__).parent / "debug.log"
         with open(debug_log, "a", encoding="utf-8") as f:
             f.write(f"\n=== New Message ===\n")
             f.write(f"Original message repr: {repr(message)}\n")
             f.write(f"Fixed message: {repr(fixed_message)}\n")
 
+        if not SUBPROCESS_SEND:
+            msg_id = str(args.get("message_id", "") or "").strip() or None
+            return _send_in_process(instance, fixed_message, msg_id)
+
         # Use base64 encoding to safely pass message as command-line argument
         import base64
 
@@ -139,10 +274,81 @@ def _handle_send_message(args: dict[str, Any]) -> dict[str, Any]:
         return _tool_error(f"Error: {str(e)}")
 
 
+def _handle_broadcast_message(args: dict[str, Any]) -> dict[str, Any]:
+    """Handle broadcast_message tool call (always delivered in-process)"""
+    from send import SendError, format_broadcast_table
+
+    targets = args.get("targets")
+    message = str(args.get("message", "")).strip()
+    if isinstance(targets, list):
+        targets = [str(t) for t in targets]
+    elif targets is not None:
+        targets = str(targets)
+    if not targets or not message:
+        return _tool_error("Error: Both 'targets' and 'message' are required")
+
+    try:
+        results = _get_router().broadcast(targets, _fix_encoding(message))
+    except SendError as e:
+        return _tool_error(f"Error: {e}")
+    except Exception as e:
+        return _tool_error(f"Error: {str(e)}")
+
+    table = format_broadcast_table(results)
+    if not any(r["ok"] for r in results):
+        return _tool_error(table)
+    return _tool_ok(table)
+
+
+def _handle_ask_instance(args: dict[str, Any]) -> dict[str, Any]:
+    """Handle ask_instance tool call"""
+    from send import NoReplyError, SendError
+
+    instance = str(args.get("instance", "")).strip()
+    message = str(args.get("message", "")).strip()
+    if not instance or not message:
+        return _tool_error("Error: Both 'instance' and 'message' are required")
+    timeout = args.get("timeout")
+    try:
+        timeout = float(timeout) if timeout is not None else None
+    except (TypeError, ValueError):
+        return _tool_error(f"Error: Invalid timeout: {timeout}")
+
+    try:
+        reply = _get_router().ask(instance, _fix_encoding(message), timeout=timeout)
+    except NoReplyError as e:
+        return _tool_error(f"No reply: {e}")
+    except SendError as e:
+        return _tool_error(f"Error: {e}")
+    except Exception as e:
+        return _tool_error(f"Error: {str(e)}")
+    return _tool_ok(reply)
+
+
+def _handle_instance_status(args: dict[str, Any]) -> dict[str, Any]:
+    """Handle instance_status tool call"""
+    from send import format_state_table
+
+    targets = str(args.get("targets", "") or "").strip() or "*"
+    try:
+        states = _get_router().states(targets)
+    except Exception as e:
+        return _tool_error(f"Error: {str(e)}")
+    if not states:
+        return _tool_error("Error: No instances found")
+    return _tool_ok(format_state_table(states))
+
+
 def _handle_tool_call(name: str, args: dict[str, Any]) -> dict[str, Any]:
     """Handle tool call based on tool name"""
     if name == "send_message":
         return _handle_send_message(args)
+    if name == "broadcast_message":
+        return _handle_broadcast_message(args)
+    if name == "ask_instance":
+        return _handle_ask_instance(args)
+    if name == "instance_status":
+        return _handle_instance_status(args)
     return _tool_error(f"Unknown tool: {name}")
 
 
@@ -188,8 +394,96 @@ def _handle_request(msg: dict[str, Any]) -> None:
         _rpc_error(req_id, -32601, f"unknown method: {method}")
 
 
+class _Dispatcher:
+    """
+    Runs tool calls on a worker pool.
+
+    Calls that share a key (e.g. the same target instance) run one at a time
+    in arrival order; calls with different keys run concurrently. At most
+    `max_inflight` calls are queued or running; beyond that `submit` blocks,
+    which stops the reader from pulling more requests off stdin.
+    """
+
+    def __init__(self, max_inflight: int):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_inflight, thread_name_prefix="mcp-call"
+        )
+        self._max_inflight = max_inflight
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._lock = threading.Lock()
+        self._pending: dict[str, deque] = {}
+
+    def submit(self, key: Optional[str], fn: Callable[[], None]) -> None:
+        self._slots.acquire()
+        with self._lock:
+            if key is not None:
+                if key in self._pending:
+                    self._pending[key].append(fn)
+                    return
+                self._pending[key] = deque()
+        self._pool.submit(self._run, key, fn)
+
+    def _run(self, key: Optional[str], fn: Callable[[], None]) -> None:
+        try:
+            fn()
+        finally:
+            self._slots.release()
+            nxt = None
+            if key is not None:
+                with self._lock:
+                    queue = self._pending[key]
+                    if queue:
+                        nxt = queue.popleft()
+                    else:
+                        del self._pending[key]
+            if nxt is not None:
+                self._pool.submit(self._run, key, nxt)
+
+    def drain(self) -> None:
+        """Block until every submitted call has finished."""
+        for _ in range(self._max_inflight):
+            self._slots.acquire()
+        for _ in range(self._max_inflight):
+            self._slots.release()
+
+
+def _request_key(msg: dict[str, Any]) -> Optional[str]:
+    """
+    Ordering key for a tools/call: calls to the same instance stay ordered.
+    Asks to an instance are ordered among themselves only, so sends do not
+    wait behind an ask blocked on a reply (the outbox still types messages
+    in order). Broadcasts have no single instance and are not ordered
+    against sends.
+    """
+    params = msg.get("params") or {}
+    args = params.get("arguments") or {}
+    instance = str(args.get("instance", "") if isinstance(args, dict) else "")
+    instance = instance.strip().lower()
+    if not instance:
+        return None
+    if params.get("name") == "ask_instance":
+        return f"ask:{instance}"
+    return f"instance:{instance}"
+
+
+def _handle_request_safely(msg: dict[str, Any]) -> None:
+    try:
+        _handle_request(msg)
+    except Exception:
+        req_id = msg.get("id")
+        if req_id is not None:
+            _rpc_error(req_id, -32603, "internal error")
+
+
+def _finish_outbox() -> None:
+    """Give queued messages a chance to go out before the server exits"""
+    if _router is not None:
+        _router.outbox().join(OUTBOX_EXIT_WAIT)
+
+
 def main() -> int:
     """Main server loop - read JSON-RPC from stdin, write to stdout"""
+    dispatcher = _Dispatcher(MAX_INFLIGHT)
     for line in sys.stdin:
         raw = line.strip()
         if not raw:
@@ -200,6 +494,16 @@ def main() -> int:
             continue
         if not isinstance(msg, dict):
             continue
+        method = msg.get("method")
+        if method == "tools/call":
+            # Slow path: deliveries run concurrently, off the reader thread
+            dispatcher.submit(
+                _request_key(msg), lambda m=msg: _handle_request_safely(m)
+            )
+            continue
+        if method in ("shutdown", "exit"):
+            dispatcher.drain()
+            _finish_outbox()
         try:
             _handle_request(msg)
         except SystemExit:
@@ -208,6 +512,8 @@ def main() -> int:
             req_id = msg.get("id")
             if req_id is not None:
                 _rpc_error(req_id, -32603, "internal error")
+    dispatcher.drain()
+    _finish_outbox()
     return 0
 
 
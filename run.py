@@ -5,6 +5,10 @@ Create multiple tabs in a WezTerm window, each running a Claude instance
 
 Usage:
     python run.py
+    python run.py apply [--dry-run]
+    python run.py supervise [--once] [--interval SECONDS]
+    python run.py pool [--fill] [--drain]
+    python run.py gc [--dry-run] [--delete]
 
 Description:
     Read configuration from cmw.config and launch all instances with autostart: true
@@ -15,6 +19,9 @@ import os
 import subprocess
 import time
 import json
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add lib to path
@@ -24,6 +31,21 @@ sys.path.insert(0, str(script_dir / "lib"))
 # Verbose mode for debugging (set via environment variable)
 VERBOSE = os.environ.get("CMW_VERBOSE", "0") == "1"
 
+# Launch mode: "parallel" (default) spawns all tabs at once, "serial" keeps the
+# old one-tab-at-a-time behavior.
+LAUNCH_MODE = os.environ.get("CMW_LAUNCH_MODE", "parallel").strip().lower()
+if LAUNCH_MODE not in {"parallel", "serial"}:
+    LAUNCH_MODE = "parallel"
+
+# Spawn mode: "direct" runs Claude as the tab's program, "shell" starts an
+# interactive shell and types the claude command into it.
+SPAWN_MODE = os.environ.get("CMW_SPAWN_MODE", "direct").strip().lower()
+if SPAWN_MODE not in {"direct", "shell"}:
+    SPAWN_MODE = "direct"
+
+# Keep the tab open with a shell after Claude exits (direct mode only).
+KEEP_OPEN = os.environ.get("CMW_KEEP_OPEN", "0").lower() in {"1", "true", "yes", "on"}
+
 
 def debug_print(msg: str) -> None:
     """Print debug message if verbose mode is enabled"""
@@ -60,8 +82,6 @@ def configure_mcp_server(project_root: Path) -> bool:
 
 def _find_wezterm_bin():
     """Find WezTerm binary"""
-    import shutil
-
     override = os.environ.get("CODEX_WEZTERM_BIN") or os.environ.get("WEZTERM_BIN")
     if override and Path(override).exists():
         return override
@@ -86,8 +106,81 @@ def check_wezterm():
     return False, "WezTerm not working"
 
 
-def spawn_new_tab(wezterm_bin, cwd, instance_id, claude_args=""):
-    """Create a new tab in current window and start Claude"""
+def _pane_backend(wezterm_bin):
+    """WezTerm backend bound to the same binary run.py resolved."""
+    from terminal import WeztermBackend
+
+    return WeztermBackend(wezterm_bin)
+
+
+def wait_until_ready(wezterm_bin, pane_id, instance_id):
+    """Wait for Claude's prompt in a pane; returns the ready timestamp or None."""
+    from instance_state import wait_for_ready
+
+    ready_at = wait_for_ready(_pane_backend(wezterm_bin), pane_id)
+    if ready_at is None:
+        print(f"[!] {instance_id} (pane {pane_id}) not ready before timeout")
+    else:
+        debug_print(f"{instance_id} ready at {ready_at}")
+    return ready_at
+
+
+def format_claude_args(claude_args_list):
+    """Join Claude args into a command-line string for typing into a shell"""
+    return " ".join(f'"{arg}"' if " " in arg else arg for arg in claude_args_list)
+
+
+# Claude args that pick an existing session; an explicit --session-id would clash.
+_SESSION_SELECT_ARGS = {"--resume", "-r", "--continue", "-c", "--session-id"}
+
+
+def pin_session_id(claude_args_list):
+    """
+    Start Claude with a fresh `--session-id` so the instance's transcript
+    (~/.claude/projects/<project>/<id>.jsonl) is known up front.
+
+    Returns (session_id, args); session_id is None when the args already
+    select a session.
+    """
+    args = list(claude_args_list)
+    if any(arg.split("=", 1)[0] in _SESSION_SELECT_ARGS for arg in args):
+        return None, args
+    session_id = str(uuid.uuid4())
+    return session_id, [*args, "--session-id", session_id]
+
+
+def build_claude_argv(claude_args_list, keep_open=False):
+    """
+    Build the argv that runs Claude directly as a tab's program.
+
+    The claude binary is resolved against our own PATH, and on POSIX the PATH
+    is passed through `env` so Claude's interpreter (e.g. node) is found even
+    though the mux server's environment never ran the user's shell rc files.
+    """
+    claude = shutil.which("claude") or "claude"
+    if os.name == "nt":
+        if keep_open:
+            return ["cmd.exe", "/k", claude, *claude_args_list]
+        if claude.lower().endswith((".cmd", ".bat")):
+            return ["cmd.exe", "/c", claude, *claude_args_list]
+        return [claude, *claude_args_list]
+
+    argv = ["env", f"PATH={os.environ.get('PATH', '')}"]
+    if keep_open:
+        # `sh -c` without -i skips rc files; drop into the user's shell afterwards.
+        script = '"$@"; exec "${SHELL:-sh}"'
+        return [*argv, "sh", "-c", script, "sh", claude, *claude_args_list]
+    return [*argv, claude, *claude_args_list]
+
+
+def spawn_new_tab(wezterm_bin, cwd, instance_id, claude_args_list=(), mode=None):
+    """
+    Create a new tab in current window and start Claude.
+
+    mode "direct" spawns Claude as the tab's program; "shell" spawns the
+    default shell and types the claude command into it once it has started.
+    """
+    mode = mode or SPAWN_MODE
     try:
         # Use spawn to create new tab (not using --new-window)
         cmd = [
@@ -97,9 +190,12 @@ def spawn_new_tab(wezterm_bin, cwd, instance_id, claude_args=""):
             "--cwd",
             str(cwd),
         ]
+        if mode == "direct":
+            cmd.extend(["--", *build_claude_argv(claude_args_list, KEEP_OPEN)])
 
         debug_print(f"Running: {' '.join(cmd)}")
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        _pane_backend(wezterm_bin).invalidate_pane_cache()
 
         debug_print(f"Return code: {result.returncode}")
         debug_print(f"Stdout: {result.stdout}")
@@ -110,9 +206,12 @@ def spawn_new_tab(wezterm_bin, cwd, instance_id, claude_args=""):
             pane_id = result.stdout.strip()
             debug_print(f"Created tab with pane: {pane_id}")
 
-            if pane_id:
-                # Start Claude in new tab
-                time.sleep(0.5)
+            if pane_id and mode == "shell":
+                # Start Claude once the shell has drawn its prompt
+                from instance_state import wait_for_output
+
+                wait_for_output(_pane_backend(wezterm_bin), pane_id)
+                claude_args = format_claude_args(claude_args_list)
                 send_cmd = f"claude{' ' + claude_args if claude_args else ''}"
                 debug_print(f"Sending to pane {pane_id}: {send_cmd}")
 
@@ -132,8 +231,7 @@ def spawn_new_tab(wezterm_bin, cwd, instance_id, claude_args=""):
                 debug_print(f"Send-text return code: {result2.returncode}")
                 debug_print(f"Send-text stderr: {result2.stderr}")
 
-                return pane_id
-            return None
+            return pane_id or None
         else:
             print(f"[!] Failed to create tab: {result.stderr}")
             return None
@@ -166,6 +264,186 @@ def set_tab_title(wezterm_bin, pane_id, title):
         return False
 
 
+def launch_instance(wezterm_bin, cwd, instance_id, role, claude_args_list=()):
+    """Spawn a tab, start Claude and set its title. Returns the tab entry."""
+    session_id, claude_args_list = pin_session_id(claude_args_list)
+    pane_id = spawn_new_tab(wezterm_bin, cwd, instance_id, claude_args_list)
+    if not pane_id:
+        return None
+    set_tab_title(wezterm_bin, pane_id, f"{instance_id} - {role}")
+    ready_at = wait_until_ready(wezterm_bin, pane_id, instance_id)
+    return {
+        "pane_id": pane_id,
+        "role": role,
+        "terminal": "wezterm",
+        "ready_at": ready_at,
+        "claude_session_id": session_id,
+    }
+
+
+def _launch_workers(count):
+    raw = os.environ.get("CMW_LAUNCH_WORKERS", "").strip()
+    try:
+        workers = int(raw) if raw else count
+    except ValueError:
+        workers = count
+    return max(1, min(workers, count, 32))
+
+
+def launch_instances_parallel(wezterm_bin, cwd, specs, claude_args_list=()):
+    """
+    Launch all instances concurrently.
+
+    Each worker spawns, starts and titles one tab, then waits for Claude to
+    become ready. Results are returned in the order of `specs` only after
+    every worker has finished.
+    """
+    if not specs:
+        return {}
+
+    def _worker(spec):
+        try:
+            return launch_instance(
+                wezterm_bin, cwd, spec.id, spec.role, claude_args_list
+            )
+        except Exception as e:
+            print(f"[!] Exception launching {spec.id}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=_launch_workers(len(specs))) as pool:
+        results = list(pool.map(_worker, specs))
+
+    instance_tabs = {}
+    for spec, tab in zip(specs, results):
+        if tab:
+            print(f"[+] Created tab: {spec.id} (pane {tab['pane_id']})")
+            instance_tabs[spec.id] = tab
+        else:
+            print(f"[!] Failed to create tab for {spec.id}")
+    return instance_tabs
+
+
+def _tmux_session_name(work_dir):
+    """Session for the team: current session inside tmux, else cmw-<dir>"""
+    override = os.environ.get("CMW_TMUX_SESSION", "").strip()
+    if override:
+        return override
+    return "cmw-" + "".join(
+        c if c.isalnum() or c in "-_" else "-" for c in work_dir.name
+    )
+
+
+def launch_instances_tmux(work_dir, specs, claude_args_list=(), session=None):
+    """
+    Launch instances as windows of a tmux session (headless-friendly).
+
+    Windows are created over the shared tmux control connection, then every
+    instance is probed for readiness concurrently. `session` adds the windows
+    to an existing team session instead of picking one.
+    """
+    from terminal import TmuxBackend
+
+    backend = TmuxBackend()
+    current_pane = os.environ.get("TMUX_PANE", "").strip()
+    if session:
+        current_pane = ""
+    else:
+        session = _tmux_session_name(work_dir)
+    if current_pane and not os.environ.get("CMW_TMUX_SESSION"):
+        cp = backend._tmux_run(
+            ["display-message", "-p", "-t", current_pane, "#{session_name}"]
+        )
+        if cp.returncode == 0 and cp.stdout.strip():
+            session = cp.stdout.strip()
+
+    instance_tabs = {}
+    for spec in specs:
+        session_id, args = pin_session_id(claude_args_list)
+        argv = build_claude_argv(args, KEEP_OPEN)
+        try:
+            pane_id = backend.create_window(argv, str(work_dir), session, spec.id)
+        except RuntimeError as e:
+            print(f"[!] Failed to create window for {spec.id}: {e}")
+            continue
+        backend.set_pane_title(pane_id, f"{spec.id} - {spec.role}")
+        print(f"[+] Created window: {spec.id} (pane {pane_id})")
+        instance_tabs[spec.id] = {
+            "pane_id": pane_id,
+            "role": spec.role,
+            "terminal": "tmux",
+            "tmux_session": session,
+            "claude_session_id": session_id,
+        }
+
+    _wait_all_ready(backend, instance_tabs)
+    return instance_tabs, session
+
+
+def _wait_all_ready(backend, instance_tabs):
+    """Probe every new pane for readiness concurrently; sets `ready_at`"""
+    from instance_state import wait_for_ready
+
+    def _ready(item):
+        inst_id, tab = item
+        ready_at = wait_for_ready(backend, tab["pane_id"])
+        if ready_at is None:
+            print(f"[!] {inst_id} (pane {tab['pane_id']}) not ready before timeout")
+        return ready_at
+
+    if instance_tabs:
+        items = list(instance_tabs.items())
+        with ThreadPoolExecutor(max_workers=_launch_workers(len(items))) as pool:
+            for (inst_id, tab), ready_at in zip(items, pool.map(_ready, items)):
+                tab["ready_at"] = ready_at
+
+
+def launch_instances_pty(work_dir, specs, claude_args_list=()):
+    """
+    Launch instances on headless pseudo-terminals (CMW_TERMINAL=pty).
+
+    The panes belong to the pty host (lib/pty_host.py), which is started on
+    demand, so no terminal emulator or multiplexer is needed.
+    """
+    from terminal import PtyBackend
+
+    backend = PtyBackend()
+    session = _tmux_session_name(work_dir)
+    instance_tabs = {}
+    for spec in specs:
+        session_id, args = pin_session_id(claude_args_list)
+        argv = build_claude_argv(args, KEEP_OPEN)
+        try:
+            pane_id = backend.create_window(argv, str(work_dir), session, spec.id)
+        except RuntimeError as e:
+            print(f"[!] Failed to start {spec.id}: {e}")
+            continue
+        backend.set_pane_title(pane_id, f"{spec.id} - {spec.role}")
+        print(f"[+] Started headless pane: {spec.id} (pane {pane_id})")
+        instance_tabs[spec.id] = {
+            "pane_id": pane_id,
+            "role": spec.role,
+            "terminal": "pty",
+            "claude_session_id": session_id,
+        }
+    _wait_all_ready(backend, instance_tabs)
+    return instance_tabs
+
+
+def choose_terminal(wezterm_bin):
+    """Pick the terminal to launch into: CMW_TERMINAL, then the current one"""
+    forced = os.environ.get("CMW_TERMINAL", "").strip().lower()
+    if forced in {"wezterm", "tmux", "pty"}:
+        return forced
+    if is_in_wezterm():
+        return "wezterm"
+    if os.environ.get("TMUX") or (not wezterm_bin and shutil.which("tmux")):
+        return "tmux"
+    if not wezterm_bin and os.name != "nt":
+        # No terminal at all (CI, servers): run the team headless.
+        return "pty"
+    return "wezterm"
+
+
 def create_tab_mapping(work_dir, instance_tabs):
     """Create tab mapping file"""
     config_dir = work_dir / ".cmw_config"
@@ -186,6 +464,215 @@ def create_tab_mapping(work_dir, instance_tabs):
     return mapping_file
 
 
+def claude_args_from_config(config, work_dir):
+    """Claude args from cmw.config flags plus the project's MCP config"""
+    flags = config.data.get("flags", {})
+    # Copy: the loaded config is cached and shared.
+    claude_args_list = list(flags.get("claudeArgs", []))
+    mcp_config_path = work_dir / ".claude" / "config.json"
+    if mcp_config_path.exists():
+        claude_args_list.append("--mcp-config")
+        claude_args_list.append(str(mcp_config_path))
+    return claude_args_list
+
+
+def read_tab_mapping(work_dir):
+    """Tab entries of the last launch, keyed by instance id as configured"""
+    mapping_file = work_dir / ".cmw_config" / "tab_mapping.json"
+    try:
+        with open(mapping_file, "r", encoding="utf-8") as f:
+            tabs = json.load(f).get("tabs", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+    if not isinstance(tabs, dict):
+        return {}
+    return {
+        inst_id: dict(tab)
+        for inst_id, tab in tabs.items()
+        if isinstance(tab, dict) and tab.get("pane_id")
+    }
+
+
+def _tab_backend(wezterm_bin, tab):
+    if tab.get("terminal") == "tmux":
+        from terminal import TmuxBackend
+
+        return TmuxBackend()
+    if tab.get("terminal") == "pty":
+        from terminal import PtyBackend
+
+        return PtyBackend()
+    return _pane_backend(wezterm_bin)
+
+
+def _kill_tab(wezterm_bin, inst_id, tab):
+    try:
+        _tab_backend(wezterm_bin, tab).kill_pane(str(tab["pane_id"]))
+        return True
+    except Exception as e:
+        print(f"[!] Failed to kill {inst_id} (pane {tab['pane_id']}): {e}")
+        return False
+
+
+def _retitle_tab(wezterm_bin, inst_id, tab, role):
+    title = f"{inst_id} - {role}"
+    if tab.get("terminal") in ("tmux", "pty"):
+        try:
+            _tab_backend(wezterm_bin, tab).set_pane_title(str(tab["pane_id"]), title)
+            return True
+        except Exception as e:
+            print(f"[!] Failed to retitle {inst_id}: {e}")
+            return False
+    return set_tab_title(wezterm_bin, str(tab["pane_id"]), title)
+
+
+def claim_warm_panes(work_dir, specs, claude_args_list):
+    """Tab entries of warm panes claimed for `specs`, by instance id"""
+    if not specs:
+        return {}
+    from warm_pool import claim
+
+    claimed = {}
+    for spec in specs:
+        tab = claim(work_dir, spec, claude_args_list)
+        if tab is None:
+            break
+        print(f"[+] Claimed warm pane for {spec.id} (pane {tab['pane_id']})")
+        claimed[spec.id] = tab
+    return claimed
+
+
+def _spawn_specs(wezterm_bin, work_dir, specs, claude_args_list, kept):
+    """Spawn `specs` next to the instances in `kept` (same terminal/session)"""
+    terminals = [tab.get("terminal") or "wezterm" for tab in kept.values()]
+    terminal = terminals[0] if terminals else choose_terminal(wezterm_bin)
+    if terminal == "tmux":
+        sessions = [tab.get("tmux_session") for tab in kept.values() if tab.get("tmux_session")]
+        instance_tabs, _session = launch_instances_tmux(
+            work_dir, specs, claude_args_list, session=sessions[0] if sessions else None
+        )
+        return instance_tabs
+    if terminal == "pty":
+        return launch_instances_pty(work_dir, specs, claude_args_list)
+    if not wezterm_bin:
+        print("[!] WezTerm not found, cannot spawn new instances")
+        return {}
+    return launch_instances_parallel(wezterm_bin, work_dir, specs, claude_args_list)
+
+
+def apply_main(argv):
+    """`cmw apply [--dry-run]`: reconcile the running team with cmw.config"""
+    import argparse
+
+    from cmw_start_config import load_start_config
+    from instance_lifecycle import parked_instances
+    from reconcile import plan_reconcile
+    from registry_gc import live_panes
+
+    parser = argparse.ArgumentParser(
+        prog="cmw apply",
+        description="Spawn added, kill removed and retitle changed instances to match cmw.config",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only show the plan")
+    args = parser.parse_args(argv)
+
+    work_dir = Path.cwd()
+    config = load_start_config(work_dir)
+    tabs = read_tab_mapping(work_dir)
+    wezterm_bin = _find_wezterm_bin()
+    if wezterm_bin:
+        _pane_backend(wezterm_bin)  # bind the listing below to the same binary
+    live = live_panes({tab.get("terminal") or "wezterm" for tab in tabs.values()})
+    instances = config.claude_config.instances
+    parked = parked_instances(work_dir, [inst.id for inst in instances])
+    plan = plan_reconcile(instances, tabs, live, parked)
+
+    own_pane = (
+        os.environ.get("WEZTERM_PANE")
+        or os.environ.get("TMUX_PANE")
+        or os.environ.get("CMW_PTY_PANE")
+        or ""
+    ).strip()
+    for inst_id, tab in list(plan.kill.items()):
+        if own_pane and str(tab.get("pane_id")) == own_pane:
+            print(f"[!] Not killing {inst_id}: it is the pane running cmw apply")
+            plan.keep[inst_id] = plan.kill.pop(inst_id)
+
+    if plan.empty:
+        print("[+] Running instances already match cmw.config")
+        return 0
+    print("[*] Reconcile plan:")
+    for line in plan.summary():
+        print(line)
+    if args.dry_run:
+        return 0
+    print()
+
+    started = time.perf_counter()
+    claude_args_list = claude_args_from_config(config, work_dir)
+    claimed = claim_warm_panes(work_dir, plan.spawn, claude_args_list)
+    to_spawn = [spec for spec in plan.spawn if spec.id not in claimed]
+    jobs = len(plan.kill) + len(plan.retitle) + 1
+    with ThreadPoolExecutor(max_workers=_launch_workers(jobs)) as pool:
+        spawn_job = pool.submit(
+            _spawn_specs, wezterm_bin, work_dir, to_spawn, claude_args_list, plan.keep
+        ) if to_spawn else None
+        kill_jobs = {
+            inst_id: pool.submit(_kill_tab, wezterm_bin, inst_id, tab)
+            for inst_id, tab in plan.kill.items()
+        }
+        retitle_jobs = {
+            inst_id: pool.submit(_retitle_tab, wezterm_bin, inst_id, tabs[inst_id], role)
+            for inst_id, role in plan.retitle.items()
+        }
+        spawned = {**claimed, **(spawn_job.result() if spawn_job else {})}
+        killed = {inst_id for inst_id, job in kill_jobs.items() if job.result()}
+        retitled = {inst_id for inst_id, job in retitle_jobs.items() if job.result()}
+
+    new_tabs = {}
+    for inst_id, tab in tabs.items():
+        if inst_id in killed or inst_id.lower() in plan.dead:
+            continue
+        if inst_id in retitled:
+            tab["role"] = plan.retitle[inst_id]
+        new_tabs[inst_id] = tab
+    new_tabs.update(spawned)
+    create_tab_mapping(work_dir, new_tabs)
+    if spawned:
+        refill_warm_pool_in_background(work_dir)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"[+] Applied in {elapsed:.2f}s: {len(spawned)}/{len(plan.spawn)} spawned, "
+        f"{len(killed)}/{len(plan.kill)} killed, {len(retitled)}/{len(plan.retitle)} retitled, "
+        f"{len(plan.keep) - len(retitled)} untouched"
+    )
+    failed = len(plan.spawn) - len(spawned) + len(plan.kill) - len(killed)
+    return 1 if failed else 0
+
+
+def compact_registry_in_background():
+    """Kick off a detached `cmw gc` when the last one is older than a day"""
+    try:
+        from registry_gc import start_background_gc
+
+        if start_background_gc():
+            debug_print("Started background registry compaction")
+    except Exception as e:
+        debug_print(f"Background registry compaction not started: {e}")
+
+
+def refill_warm_pool_in_background(work_dir):
+    """Start the panes of the warm pool (CMW_WARM_POOL) in a detached process"""
+    try:
+        from warm_pool import refill_in_background
+
+        if refill_in_background(work_dir):
+            debug_print("Started background warm pool refill")
+    except Exception as e:
+        debug_print(f"Background warm pool refill not started: {e}")
+
+
 def is_in_wezterm():
     """Check if running in WezTerm"""
     # 检查 WezTerm 环境变量
@@ -208,6 +695,21 @@ def is_in_wezterm():
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "gc":
+        from registry_gc import gc_main
+
+        return gc_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "apply":
+        return apply_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "supervise":
+        from supervisor import supervise_main
+
+        return supervise_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "pool":
+        from warm_pool import pool_main
+
+        return pool_main(sys.argv[2:])
+
     # Load configuration
     from cmw_start_config import load_start_config
 
@@ -237,18 +739,9 @@ def main():
     print()
 
     # Read Claude parameters from config
-    flags = config.data.get("flags", {})
-    claude_args_list = flags.get("claudeArgs", [])
-
-    # Add MCP config path
-    mcp_config_path = work_dir / ".claude" / "config.json"
-    if mcp_config_path.exists():
-        claude_args_list.append(f"--mcp-config")
-        claude_args_list.append(str(mcp_config_path))
+    claude_args_list = claude_args_from_config(config, work_dir)
 
-    claude_args = " ".join(
-        f'"{arg}"' if " " in arg else arg for arg in claude_args_list
-    )
+    claude_args = format_claude_args(claude_args_list)
 
     if claude_args:
         print(f"[*] Claude args: {claude_args}")
@@ -261,6 +754,46 @@ def main():
     all_instances = {inst.id: inst for inst in autostart_instances}
 
     wezterm_bin = _find_wezterm_bin()
+    if choose_terminal(wezterm_bin) == "pty":
+        print("[*] Startup mode: headless (one pseudo-terminal per instance)")
+        print()
+        launch_started = time.perf_counter()
+        instance_tabs = launch_instances_pty(work_dir, autostart_instances, claude_args_list)
+        if not instance_tabs:
+            print("[!] No instances were successfully started")
+            return 1
+        create_tab_mapping(work_dir, instance_tabs)
+        compact_registry_in_background()
+        refill_warm_pool_in_background(work_dir)
+        launch_elapsed = time.perf_counter() - launch_started
+        print(
+            f"[+] Launched {len(instance_tabs)}/{len(instance_ids)} instance(s) "
+            f"in {launch_elapsed:.2f}s (pty)"
+        )
+        print("[*] Inspect with: python lib/pty_host.py list | show <pane_id>")
+        return 0
+    if choose_terminal(wezterm_bin) == "tmux":
+        print("[*] Startup mode: tmux session (one window per instance)")
+        print()
+        launch_started = time.perf_counter()
+        instance_tabs, session = launch_instances_tmux(
+            work_dir, autostart_instances, claude_args_list
+        )
+        if not instance_tabs:
+            print("[!] No windows were successfully created")
+            return 1
+        create_tab_mapping(work_dir, instance_tabs)
+        compact_registry_in_background()
+        refill_warm_pool_in_background(work_dir)
+        launch_elapsed = time.perf_counter() - launch_started
+        print(
+            f"[+] Launched {len(instance_tabs)}/{len(instance_ids)} instance(s) "
+            f"in {launch_elapsed:.2f}s (tmux)"
+        )
+        if not os.environ.get("TMUX"):
+            print(f"[*] Attach with: tmux attach -t {session}")
+        return 0
+
     if not wezterm_bin:
         print("[!] WezTerm not found")
         return 1
@@ -310,11 +843,11 @@ def main():
 
             print(f"[+] WezTerm window started")
             print("[*] Waiting for WezTerm to initialize...")
-            time.sleep(3)  # Wait for WezTerm to fully start and prepare CLI
 
-            # Verify if CLI is available
+            # Verify if CLI is available (poll with backoff instead of a fixed wait)
             max_retries = 10
             cli_ready = False
+            retry_delay = 0.2
             for retry in range(max_retries):
                 try:
                     test_result = subprocess.run(
@@ -332,7 +865,8 @@ def main():
                     print(
                         f"[*] Waiting for CLI to be ready... ({retry+1}/{max_retries})"
                     )
-                    time.sleep(1)
+                    time.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, 2.0)
 
             if not cli_ready:
                 print("[!] WezTerm CLI not ready, cannot continue")
@@ -384,11 +918,14 @@ def main():
                 instance_tabs[first_instance] = {
                     "pane_id": first_pane_id,
                     "role": spec.role,
+                    "terminal": "wezterm",
+                    "ready_at": wait_until_ready(
+                        wezterm_bin, first_pane_id, first_instance
+                    ),
                 }
                 print(
                     f"[+] First tab configured: {first_instance} (pane {first_pane_id})"
                 )
-                time.sleep(1)
 
             # Create tabs for remaining instances
             for i, inst_id in enumerate(instance_ids[1:], 1):
@@ -397,14 +934,11 @@ def main():
                     f"[*] Creating tab {i+1}/{len(instance_ids)}: {inst_id} - {spec.role}"
                 )
 
-                pane_id = spawn_new_tab(wezterm_bin, work_dir, inst_id, claude_args)
-                if pane_id:
-                    set_tab_title(wezterm_bin, pane_id, f"{inst_id} - {spec.role}")
-                    instance_tabs[inst_id] = {
-                        "pane_id": pane_id,
-                        "role": spec.role,
-                    }
-                    time.sleep(1)
+                tab = launch_instance(
+                    wezterm_bin, work_dir, inst_id, spec.role, claude_args_list
+                )
+                if tab:
+                    instance_tabs[inst_id] = tab
                 else:
                     print(f"[!] Failed to create tab for {inst_id}")
 
@@ -452,6 +986,7 @@ def main():
         print()
         print("[*] Starting setup...")
         print()
+        launch_started = time.perf_counter()
 
         # Get current pane ID
         current_pane_id = os.environ.get("WEZTERM_PANE")
@@ -486,7 +1021,8 @@ def main():
 
         # Start Claude in current pane
         print(f"[*] Starting Claude in current pane...")
-        claude_cmd = f"claude{' ' + claude_args if claude_args else ''}"
+        first_session_id, first_args = pin_session_id(claude_args_list)
+        claude_cmd = f"claude {format_claude_args(first_args)}".rstrip()
         if current_pane_id:
             subprocess.run(
                 [
@@ -500,8 +1036,6 @@ def main():
                 capture_output=True,
                 timeout=5,
             )
-            time.sleep(1)  # Wait for Claude to start
-
             set_tab_title(
                 wezterm_bin, current_pane_id, f"{first_instance} - {spec.role}"
             )
@@ -513,29 +1047,51 @@ def main():
             instance_tabs[first_instance] = {
                 "pane_id": current_pane_id,
                 "role": spec.role,
+                "terminal": "wezterm",
+                # Its shell only reads the claude command once run.py exits,
+                # so it cannot be ready yet; send.py probes it before the
+                # first message.
+                "ready_at": None,
+                "claude_session_id": first_session_id,
             }
 
         print()
 
         # Create new panes for other instances
-        for i, inst_id in enumerate(instance_ids[1:], 1):
-            spec = all_instances[inst_id]
-            print(f"[*] Creating tab {i+1} for {inst_id} ({spec.role})...")
+        remaining = [all_instances[inst_id] for inst_id in instance_ids[1:]]
+        if LAUNCH_MODE == "serial":
+            for i, spec in enumerate(remaining, 1):
+                print(f"[*] Creating tab {i+1} for {spec.id} ({spec.role})...")
 
-            pane_id = spawn_new_tab(wezterm_bin, work_dir, inst_id, claude_args)
+                tab = launch_instance(
+                    wezterm_bin, work_dir, spec.id, spec.role, claude_args_list
+                )
 
-            if pane_id:
-                print(f"[+] Created tab {i+1}: {inst_id}")
-                set_tab_title(wezterm_bin, pane_id, f"{inst_id} - {spec.role}")
-                instance_tabs[inst_id] = {"pane_id": pane_id, "role": spec.role}
-                time.sleep(0.5)
-            else:
-                print(f"[!] Failed to create tab {i+1}")
+                if tab:
+                    print(f"[+] Created tab {i+1}: {spec.id}")
+                    instance_tabs[spec.id] = tab
+                else:
+                    print(f"[!] Failed to create tab {i+1}")
+        else:
+            print(f"[*] Creating {len(remaining)} tab(s) in parallel...")
+            instance_tabs.update(
+                launch_instances_parallel(
+                    wezterm_bin, work_dir, remaining, claude_args_list
+                )
+            )
 
         print()
 
-        # Save mapping
+        # Save mapping (only after every worker has finished)
         create_tab_mapping(work_dir, instance_tabs)
+        compact_registry_in_background()
+        refill_warm_pool_in_background(work_dir)
+
+        launch_elapsed = time.perf_counter() - launch_started
+        print(
+            f"[+] Launched {len(instance_tabs)}/{len(instance_ids)} instance(s) "
+            f"in {launch_elapsed:.2f}s ({LAUNCH_MODE})"
+        )
 
         print()
         print("=" * 60)
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+for path in (repo_root, repo_root / "lib", repo_root / "mcp" / "send-tool"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
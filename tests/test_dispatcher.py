@@ -0,0 +1,68 @@
+import random
+import threading
+import time
+
+import server
+
+
+def test_calls_with_one_key_run_in_arrival_order():
+    dispatcher = server._Dispatcher(4)
+    ran = {"a": [], "b": []}
+    running = {"a": 0, "b": 0}
+    overlap = []
+    lock = threading.Lock()
+
+    def call(key, n):
+        def fn():
+            with lock:
+                running[key] += 1
+                overlap.append(running[key])
+            time.sleep(random.uniform(0, 0.005))
+            with lock:
+                ran[key].append(n)
+                running[key] -= 1
+
+        return fn
+
+    for n in range(20):
+        dispatcher.submit("instance:a", call("a", n))
+        dispatcher.submit("instance:b", call("b", n))
+    dispatcher.drain()
+
+    assert ran == {"a": list(range(20)), "b": list(range(20))}
+    assert max(overlap) == 1
+
+
+def test_different_keys_run_concurrently():
+    dispatcher = server._Dispatcher(4)
+    both = threading.Barrier(2, timeout=5)
+    results = []
+
+    def fn():
+        both.wait()
+        results.append(True)
+
+    dispatcher.submit("instance:a", fn)
+    dispatcher.submit("instance:b", fn)
+    dispatcher.drain()
+    assert results == [True, True]
+
+
+def test_unkeyed_calls_are_not_serialized():
+    dispatcher = server._Dispatcher(3)
+    all_three = threading.Barrier(3, timeout=5)
+    dispatcher.submit(None, all_three.wait)
+    dispatcher.submit(None, all_three.wait)
+    dispatcher.submit(None, all_three.wait)
+    dispatcher.drain()
+    assert not all_three.broken
+
+
+def _call(name, **arguments):
+    return {"method": "tools/call", "params": {"name": name, "arguments": arguments}}
+
+
+def test_request_keys():
+    assert server._request_key(_call("send_message", instance="Coder")) == "instance:coder"
+    assert server._request_key(_call("ask_instance", instance="coder")) == "ask:coder"
+    assert server._request_key(_call("broadcast_message", targets="*")) is None
@@ -0,0 +1,97 @@
+from instance_state import (
+    STATE_AWAITING_PERMISSION,
+    STATE_DEAD,
+    STATE_GENERATING,
+    STATE_IDLE,
+    STATE_UNKNOWN,
+    classify,
+    input_box,
+    input_shows,
+)
+
+BAR = "─" * 78
+
+IDLE = f"""\
+> summarize the open review comments
+● There are three open comments, all on lib/terminal.py.
+╭{BAR}╮
+│ >                                                                            │
+╰{BAR}╯
+  ⏵⏵ bypass permissions on (shift+tab to cycle)
+"""
+
+GENERATING = f"""\
+> run the test suite
+● Bash(python -m pytest -q)
+  ⎿  Running…
+✻ Compacting… (12s · ↑ 1.2k tokens · esc to interrupt)
+╭{BAR}╮
+│ >                                                                            │
+╰{BAR}╯
+  ? for shortcuts
+"""
+
+PERMISSION = f"""\
+╭{BAR}╮
+│ Bash command                                                                 │
+│                                                                              │
+│   rm -rf build/                                                              │
+│                                                                              │
+│ Do you want to proceed?                                                      │
+│ ❯ 1. Yes                                                                     │
+│   2. No, and tell Claude what to do differently (esc)                        │
+╰{BAR}╯
+"""
+
+STARTING = """\
+$ claude --dangerously-skip-permissions
+"""
+
+PENDING = f"""\
+> earlier message
+● Done.
+╭{BAR}╮
+│ > please check the retry logic in lib/outbox.py and make sure a writer that  │
+│   loses its lease never types a message twice                                │
+╰{BAR}╯
+  ? for shortcuts
+"""
+
+PASTED = f"""\
+╭{BAR}╮
+│ > [Pasted text #1 +42 lines]                                                 │
+╰{BAR}╯
+  ? for shortcuts
+"""
+
+
+def test_classify_captured_screens():
+    assert classify(IDLE) == STATE_IDLE
+    assert classify(GENERATING) == STATE_GENERATING
+    assert classify(PERMISSION) == STATE_AWAITING_PERMISSION
+    assert classify(STARTING) == STATE_UNKNOWN
+    assert classify(None) == STATE_DEAD
+
+
+def test_input_shows_wrapped_message():
+    message = (
+        "please check the retry logic in lib/outbox.py and make sure a writer "
+        "that loses its lease never types a message twice"
+    )
+    assert input_shows(PENDING, message)
+    assert not input_shows(IDLE, message)
+    assert not input_shows(None, message)
+
+
+def test_input_shows_paste_placeholder():
+    assert input_shows(PASTED, "anything at all\n" * 42)
+
+
+def test_input_box_is_the_region_between_the_last_borders():
+    assert input_box(IDLE).strip().strip("│").strip() == ">"
+    assert "earlier message" not in input_box(PENDING)
+    assert input_box(STARTING) is None
+    # The submitted message echoed above an empty box is not pending input.
+    echoed = IDLE.replace("summarize the open review comments", "x" * 40)
+    assert input_shows(echoed, "x" * 40)
+    assert not input_shows(input_box(echoed), "x" * 40)
@@ -0,0 +1,43 @@
+import json
+
+import send
+from instance_state import STATE_STOPPED
+
+
+def _project(tmp_path):
+    config = {
+        "providers": ["claude"],
+        "claude": {
+            "instances": [
+                {"id": "coder", "role": "developer"},
+                {"id": "test", "role": "QA engineer"},
+                {"id": "docs", "role": "developer", "autostart": False},
+            ]
+        },
+    }
+    (tmp_path / "cmw.config").write_text(json.dumps(config), encoding="utf-8")
+    cfg = tmp_path / ".cmw_config"
+    cfg.mkdir()
+    tabs = {"coder": {"pane_id": "4", "role": "developer", "terminal": "wezterm"}}
+    (cfg / "tab_mapping.json").write_text(
+        json.dumps({"work_dir": str(tmp_path), "tabs": tabs}), encoding="utf-8"
+    )
+    return tmp_path
+
+
+def test_states_list_configured_instances_that_are_not_running(tmp_path, monkeypatch):
+    monkeypatch.setenv("CMW_CONFIG_CACHE", "0")
+    router = send.Router(_project(tmp_path))
+    monkeypatch.setattr("instance_state.instance_state", lambda backend, pane_id: "idle")
+
+    states = router.states("*")
+
+    assert states == {"coder": "idle", "test": STATE_STOPPED, "docs": STATE_STOPPED}
+
+
+def test_role_targets_include_stopped_instances(tmp_path, monkeypatch):
+    monkeypatch.setenv("CMW_CONFIG_CACHE", "0")
+    router = send.Router(_project(tmp_path))
+
+    assert router.expand_targets("developer") == ["coder"]
+    assert router.expand_targets("developer", configured=True) == ["coder", "docs"]
@@ -0,0 +1,149 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import outbox
+from outbox import STATUS_DELIVERED, STATUS_DELIVERING, STATUS_FAILED, STATUS_PENDING, Outbox
+
+
+@pytest.fixture
+def box(tmp_path):
+    return Outbox(tmp_path)
+
+
+def live_owner():
+    """An owner id of this process's main thread, which is alive"""
+    return f"{os.getpid()}:{threading.main_thread().ident}:other"
+
+
+def dead_owner():
+    """An owner id of a process that has exited"""
+    proc = subprocess.Popen([sys.executable, "-c", ""])
+    proc.wait()
+    return f"{proc.pid}:1:gone"
+
+
+def set_writer(box, instance, owner, lease_until):
+    box._db().execute(
+        "INSERT OR REPLACE INTO writers (instance, owner, lease_until) VALUES (?, ?, ?)",
+        (instance, owner, lease_until),
+    )
+
+
+def claim(box, msg_id, owner):
+    box._db().execute(
+        "UPDATE messages SET status = ?, claimed_by = ? WHERE id = ?",
+        (STATUS_DELIVERING, owner, msg_id),
+    )
+
+
+def test_enqueue_is_idempotent_per_id(box):
+    assert box.enqueue("Coder", "hello", "m1") == ("m1", True)
+    assert box.enqueue("coder", "hello again", "m1") == ("m1", False)
+    rows = box._db().execute("SELECT instance, body FROM messages").fetchall()
+    assert [tuple(r) for r in rows] == [("coder", "hello")]
+
+
+def test_drain_delivers_in_enqueue_order(box):
+    for n in range(5):
+        box.enqueue("coder", f"message {n}", f"m{n}")
+    sent = []
+    assert box.drain("coder", lambda inst, body: sent.append(body) or "ok")
+    assert sent == [f"message {n}" for n in range(5)]
+    assert box.get("m4")["status"] == STATUS_DELIVERED
+    assert box.get("m4")["result"] == "ok"
+    assert box._db().execute("SELECT COUNT(*) FROM writers").fetchone()[0] == 0
+
+
+def test_failing_message_is_retried_then_failed(tmp_path, monkeypatch):
+    monkeypatch.setenv("CMW_OUTBOX_RETRIES", "2")
+    monkeypatch.setenv("CMW_OUTBOX_BACKOFF", "0.01")
+    box = Outbox(tmp_path)
+    box.enqueue("coder", "first", "m1")
+    box.enqueue("coder", "second", "m2")
+    sent = []
+
+    def deliver(inst, body):
+        sent.append(body)
+        if body == "first":
+            raise RuntimeError("pane gone")
+        return "ok"
+
+    assert box.drain("coder", deliver)
+    assert sent == ["first", "first", "second"]
+    row = box.get("m1")
+    assert (row["status"], row["attempts"], row["last_error"]) == (STATUS_FAILED, 2, "pane gone")
+    assert box.get("m2")["status"] == STATUS_DELIVERED
+
+
+def test_live_writer_keeps_its_lease(box):
+    box.enqueue("coder", "hello", "m1")
+    set_writer(box, "coder", live_owner(), time.time() + 60)
+    assert not box.drain("coder", lambda inst, body: pytest.fail("delivered twice"))
+    assert box.get("m1")["status"] == STATUS_PENDING
+
+
+def test_lapsed_lease_is_handed_over(box):
+    box.enqueue("coder", "hello", "m1")
+    set_writer(box, "coder", live_owner(), time.time() - 1)
+    sent = []
+    assert box.drain("coder", lambda inst, body: sent.append(body))
+    assert sent == ["hello"]
+
+
+def test_lease_of_a_dead_writer_is_taken_over(box):
+    box.enqueue("coder", "hello", "m1")
+    set_writer(box, "coder", dead_owner(), time.time() + 60)
+    sent = []
+    assert box.drain("coder", lambda inst, body: sent.append(body))
+    assert sent == ["hello"]
+
+
+def test_message_claimed_by_a_dead_writer_is_delivered_again(box):
+    owner = dead_owner()
+    box.enqueue("coder", "hello", "m1")
+    box.enqueue("coder", "after", "m2")
+    claim(box, "m1", owner)
+    set_writer(box, "coder", owner, time.time() + 60)
+    sent = []
+    assert box.drain("coder", lambda inst, body: sent.append(body))
+    assert sent == ["hello", "after"]
+    row = box.get("m1")
+    assert (row["status"], row["claimed_by"]) == (STATUS_DELIVERED, None)
+
+
+def test_message_in_flight_with_a_live_writer_is_not_retyped(box):
+    box.enqueue("coder", "hello", "m1")
+    claim(box, "m1", live_owner())
+    set_writer(box, "coder", live_owner(), time.time() - 1)
+    assert not box.drain("coder", lambda inst, body: pytest.fail("typed twice"))
+    assert box.get("m1")["status"] == STATUS_DELIVERING
+
+
+def test_lease_is_renewed_during_a_long_delivery(box, monkeypatch):
+    monkeypatch.setattr(outbox, "HEARTBEAT_SECONDS", 0.02)
+    box.enqueue("coder", "hello", "m1")
+    leases = []
+
+    def deliver(inst, body):
+        db = box._db()
+        for _ in range(3):
+            leases.append(db.execute("SELECT lease_until FROM writers").fetchone()[0])
+            time.sleep(0.1)
+        return "ok"
+
+    assert box.drain("coder", deliver)
+    assert leases[0] < leases[1] < leases[2]
+
+
+def test_kick_and_wait(box):
+    box.enqueue("coder", "hello", "m1")
+    box.kick("coder", lambda inst, body: "typed")
+    row = box.wait("m1", 5)
+    assert (row["status"], row["result"]) == (STATUS_DELIVERED, "typed")
+    box.join(5)
+    assert box.pending_instances() == []
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import terminal
+
+
+class SlowListing(terminal.WeztermBackend):
+    """Counts `wezterm cli list` runs; each blocks until released"""
+
+    def __init__(self):
+        super().__init__("wezterm-stand-in")
+        self.calls = 0
+        self.release = threading.Event()
+
+    def _list_panes_uncached(self):
+        self.calls += 1
+        self.release.wait(5)
+        return [{"pane_id": self.calls}]
+
+
+def _start(fn, results):
+    thread = threading.Thread(target=lambda: results.append(fn()))
+    thread.start()
+    return thread
+
+
+def test_concurrent_callers_share_one_listing():
+    backend = SlowListing()
+    backend.invalidate_pane_cache()
+    results = []
+    threads = [_start(backend._list_panes, results) for _ in range(4)]
+    time.sleep(0.05)
+    backend.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert backend.calls == 1
+    assert results == [[{"pane_id": 1}]] * 4
+
+
+def test_invalidate_does_not_wait_for_a_running_listing():
+    backend = SlowListing()
+    backend.invalidate_pane_cache()
+    results = []
+    thread = _start(backend._list_panes, results)
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    backend.invalidate_pane_cache()
+    assert time.monotonic() - started < 1
+
+    backend.release.set()
+    thread.join(5)
+    # The listing predates the invalidation, so it is not cached.
+    assert backend._list_panes() == [{"pane_id": 2}]
+    assert backend.calls == 2
+
+
+def test_fresh_caller_does_not_reuse_an_older_listing():
+    backend = SlowListing()
+    backend.invalidate_pane_cache()
+    results = []
+    first = _start(backend._list_panes, results)
+    time.sleep(0.05)
+    fresh = _start(lambda: backend._list_panes(fresh=True), results)
+    time.sleep(0.05)
+    backend.release.set()
+    first.join(5)
+    fresh.join(5)
+    assert backend.calls == 2
+    assert sorted(r[0]["pane_id"] for r in results) == [1, 2]
@@ -0,0 +1,62 @@
+from cmw_start_config import ClaudeInstanceConfig
+from reconcile import plan_reconcile
+
+
+def spec(inst_id, role="", autostart=True):
+    return ClaudeInstanceConfig(id=inst_id, role=role, autostart=autostart)
+
+
+def tab(pane_id, role="", terminal="wezterm"):
+    return {"pane_id": pane_id, "role": role, "terminal": terminal}
+
+
+def test_unchanged_team_is_an_empty_plan():
+    tabs = {"coder": tab("1", "developer"), "ui": tab("2", "designer")}
+    plan = plan_reconcile(
+        [spec("coder", "developer"), spec("ui", "designer")], tabs, {"wezterm": {"1", "2"}}
+    )
+    assert plan.empty
+    assert plan.keep == tabs
+
+
+def test_added_removed_and_renamed_instances():
+    instances = [spec("coder", "backend developer"), spec("test", "QA")]
+    tabs = {"coder": tab("1", "developer"), "ui": tab("2", "designer")}
+    plan = plan_reconcile(instances, tabs, {"wezterm": {"1", "2"}})
+
+    assert [s.id for s in plan.spawn] == ["test"]
+    assert plan.kill == {"ui": tabs["ui"]}
+    assert plan.retitle == {"coder": "backend developer"}
+    assert list(plan.keep) == ["coder"]
+    assert not plan.empty
+
+
+def test_dead_pane_is_respawned():
+    plan = plan_reconcile([spec("coder")], {"coder": tab("1")}, {"wezterm": {"7"}})
+    assert [s.id for s in plan.spawn] == ["coder"]
+    assert plan.dead == ["coder"]
+    assert "pane gone" in plan.summary()[0]
+
+
+def test_removed_instance_with_dead_pane_is_not_killed():
+    plan = plan_reconcile([], {"ui": tab("2")}, {"wezterm": set()})
+    assert plan.empty
+
+
+def test_unlisted_terminal_counts_as_alive():
+    plan = plan_reconcile([spec("coder")], {"coder": tab("%3", terminal="tmux")}, {"tmux": None})
+    assert plan.empty
+
+
+def test_lazy_and_parked_instances_are_not_started():
+    instances = [spec("coder"), spec("docs", autostart=False), spec("test")]
+    plan = plan_reconcile(instances, {"coder": tab("1")}, {"wezterm": {"1"}}, parked={"test"})
+    assert plan.empty
+
+
+def test_running_lazy_instance_is_kept():
+    instances = [spec("docs", "writer", autostart=False)]
+    tabs = {"docs": tab("4", "writer")}
+    plan = plan_reconcile(instances, tabs, {"wezterm": {"4"}})
+    assert plan.empty
+    assert plan.keep == tabs
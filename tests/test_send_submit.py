@@ -0,0 +1,71 @@
+import textwrap
+
+import send
+
+BAR = "─" * 76
+
+
+class ClaudePane:
+    """A pane that renders like Claude: transcript, then the input box"""
+
+    def __init__(self):
+        self.history = ["╭" + BAR + "╮", "│ ✻ Welcome to Claude Code", "╰" + BAR + "╯"]
+        self.input = ""
+        self.enters = 0
+
+    def send_literal(self, pane_id, text):
+        self.input += text
+
+    def send_enter(self, pane_id):
+        self.enters += 1
+        if self.input:
+            # Claude echoes the whole submitted message above the box.
+            self.history.extend("> " + line for line in textwrap.wrap(self.input, 74))
+            self.input = ""
+
+    def get_text(self, pane_id, lines=40):
+        box = textwrap.wrap(self.input, 74) or [""]
+        screen = [*self.history, "╭" + BAR + "╮"]
+        screen += ["│ > " + line for line in box]
+        screen += ["╰" + BAR + "╯", "  ? for shortcuts"]
+        return "\n".join(screen[-lines:])
+
+
+def test_long_message_confirmed_after_one_enter(monkeypatch):
+    monkeypatch.setenv("CMW_SUBMIT_LAND_TIMEOUT", "0.5")
+    monkeypatch.setenv("CMW_SUBMIT_CLEAR_TIMEOUT", "0.2")
+    monkeypatch.setenv("CMW_SUBMIT_POLL", "0.01")
+    pane = ClaudePane()
+    message = ("review the parser changes and report anything odd " * 6).strip()
+    assert len(message) > send.LONG_MESSAGE_THRESHOLD
+
+    timing = send.deliver_message(pane, "1", message)
+
+    assert timing["confirmed"] is True
+    assert timing["enter_attempts"] == 1
+    assert pane.enters == 1
+
+
+def test_message_left_in_box_is_resubmitted(monkeypatch):
+    monkeypatch.setenv("CMW_SUBMIT_LAND_TIMEOUT", "0.5")
+    monkeypatch.setenv("CMW_SUBMIT_CLEAR_TIMEOUT", "0.05")
+    monkeypatch.setenv("CMW_SUBMIT_POLL", "0.01")
+    pane = ClaudePane()
+    submit = pane.send_enter
+    dropped = []
+
+    def flaky_enter(pane_id):
+        # The first Enter arrives before the paste finished and is lost.
+        if not dropped:
+            dropped.append(pane_id)
+            pane.enters += 1
+            return
+        submit(pane_id)
+
+    pane.send_enter = flaky_enter
+    message = "x" * (send.LONG_MESSAGE_THRESHOLD + 50)
+
+    timing = send.deliver_message(pane, "1", message)
+
+    assert timing["confirmed"] is True
+    assert timing["enter_attempts"] == 2
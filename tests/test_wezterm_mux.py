@@ -0,0 +1,137 @@
+import socket
+import threading
+
+import pytest
+
+import wezterm_mux as mux
+
+
+def decode_frame(buf: bytes, offset: int = 0):
+    """(serial, ident, payload, compressed, next_offset) of the frame at `offset`"""
+    length, offset = mux.decode_uvarint(buf, offset)
+    compressed = bool(length & (1 << 63))
+    length &= ~(1 << 63)
+    end = offset + length
+    serial, pos = mux.decode_uvarint(buf, offset)
+    ident, pos = mux.decode_uvarint(buf, pos)
+    return serial, ident, buf[pos:end], compressed, end
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 16383, 16384, 2**32, 2**63 - 1])
+def test_uvarint_round_trip(value):
+    encoded = mux.encode_uvarint(value)
+    assert mux.decode_uvarint(encoded) == (value, len(encoded))
+
+
+def test_uvarint_is_leb128():
+    assert mux.encode_uvarint(300) == b"\xac\x02"
+    with pytest.raises(mux.MuxError):
+        mux.decode_uvarint(b"\xac")
+
+
+def test_str_round_trip():
+    encoded = mux.encode_str("héllo") + b"rest"
+    assert mux.decode_str(encoded) == ("héllo", len(encoded) - 4)
+    with pytest.raises(mux.MuxError):
+        mux.decode_str(b"\x05ab")
+
+
+def test_frame_layout():
+    frame = mux.encode_frame(mux.PDU_WRITE_TO_PANE, 300, b"payload")
+    assert decode_frame(frame) == (300, mux.PDU_WRITE_TO_PANE, b"payload", False, len(frame))
+
+
+def test_pdu_ids_match_wezterm_codec():
+    # codec/src/lib.rs, `pdu! { ... }`
+    assert mux.PDU_ERROR_RESPONSE == 0
+    assert mux.PDU_WRITE_TO_PANE == 9
+    assert mux.PDU_UNIT_RESPONSE == 10
+    assert mux.PDU_SEND_PASTE == 13
+    assert mux.PDU_GET_CODEC_VERSION == 26
+    assert mux.PDU_GET_CODEC_VERSION_RESPONSE == 27
+    assert mux.PDU_KILL_PANE == 35
+    assert mux.PDU_SET_FOCUSED_PANE == 45
+
+
+class MuxServer:
+    """Answers each request with a UnitResponse, after a serial-0 notification"""
+
+    def __init__(self, path):
+        self.requests = []
+        self.errors = {}
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(str(path))
+        self.listener.listen(1)
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        conn, _ = self.listener.accept()
+        buf = b""
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    return
+                buf += data
+                while buf:
+                    try:
+                        serial, ident, payload, _, end = decode_frame(buf)
+                    except mux.MuxError:
+                        break
+                    if end > len(buf):
+                        break
+                    buf = buf[end:]
+                    self.requests.append((ident, payload))
+                    conn.sendall(mux.encode_frame(37, 0, mux.encode_uvarint(1)))
+                    conn.sendall(self._reply(ident, serial))
+
+    def _reply(self, ident, serial):
+        if ident == mux.PDU_GET_CODEC_VERSION:
+            body = mux.encode_uvarint(4) + mux.encode_str("20240203-stand-in")
+            return mux.encode_frame(mux.PDU_GET_CODEC_VERSION_RESPONSE, serial, body)
+        if ident in self.errors:
+            return mux.encode_frame(mux.PDU_ERROR_RESPONSE, serial, mux.encode_str(self.errors[ident]))
+        return mux.encode_frame(mux.PDU_UNIT_RESPONSE, serial, b"")
+
+    def close(self):
+        self.listener.close()
+
+
+@pytest.fixture
+def server(tmp_path):
+    srv = MuxServer(tmp_path / "mux.sock")
+    yield srv
+    srv.close()
+
+
+@pytest.fixture
+def client(server, tmp_path):
+    c = mux.MuxClient(str(tmp_path / "mux.sock"))
+    yield c
+    c.close()
+
+
+def test_handshake_reads_server_version(client, server):
+    client.ensure_connected()
+    assert client.server_version == "20240203-stand-in"
+    assert server.requests == [(mux.PDU_GET_CODEC_VERSION, b"")]
+
+
+def test_each_request_frame(client, server):
+    client.write_to_pane(7, b"ls\r")
+    client.send_paste(300, "héllo")
+    client.kill_pane(8)
+    client.set_focused_pane(9)
+    assert server.requests[1:] == [
+        (mux.PDU_WRITE_TO_PANE, b"\x07" + mux.encode_bytes(b"ls\r")),
+        (mux.PDU_SEND_PASTE, b"\xac\x02" + mux.encode_str("héllo")),
+        (mux.PDU_KILL_PANE, b"\x08"),
+        (mux.PDU_SET_FOCUSED_PANE, b"\x09"),
+    ]
+
+
+def test_error_response_raises(client, server):
+    server.errors[mux.PDU_KILL_PANE] = "pane 8 not found"
+    with pytest.raises(mux.MuxError, match="pane 8 not found"):
+        client.kill_pane(8)